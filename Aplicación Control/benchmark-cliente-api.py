@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Micro-benchmark del cliente de la API de Kubernetes de cluster-control.py
+
+Mide cuántas llamadas por segundo se obtienen al listar los pods de un sitio creando un cliente
+nuevo en cada llamada (load_kube_config + CoreV1Api, comportamiento anterior) frente al cliente
+compartido con pool de conexiones que usa ahora cluster-control.py.
+
+Uso: benchmark-cliente-api.py <nombre sitio> [número de llamadas]
+
+© 2024 - JICR
+
+"""
+
+# Librerías necesarias
+import sys
+import os
+import time
+import importlib
+
+from kubernetes import client, config
+
+def cargaClusterControl():
+    # Función que importa el módulo de cluster-control.py
+    return importlib.import_module("cluster_control")
+
+def listaPodsSinCache(nombreSitio):
+    # Función equivalente a la versión anterior de listaPods: relee el kubeconfig y crea un cliente por llamada
+    config.load_kube_config()
+    v1 = client.CoreV1Api()
+    return v1.list_namespaced_pod(namespace=nombreSitio)
+
+def mide(nombre, funcion, nombreSitio, llamadas):
+    # Función que ejecuta 'llamadas' veces la función dada y muestra las llamadas por segundo obtenidas
+    inicio = time.perf_counter()
+    for _ in range(llamadas):
+        funcion(nombreSitio)
+    duracion = time.perf_counter() - inicio
+    llamadasSegundo = llamadas / duracion
+    print(f"{nombre:<10} {llamadas:>6} llamadas en {duracion:8.3f} s - {llamadasSegundo:8.1f} llamadas/s")
+    return llamadasSegundo
+
+def main():
+    args = sys.argv[1:]
+    if not args or len(args) > 2:
+        sys.stderr.write("\nUso: benchmark-cliente-api.py <nombre sitio> [número de llamadas]\n\n")
+        sys.exit(1)
+
+    nombreSitio = args[0]
+    llamadas = int(args[1]) if len(args) == 2 else 50
+
+    clusterControl = cargaClusterControl()
+
+    antes = mide("antes", listaPodsSinCache, nombreSitio, llamadas)
+    despues = mide("después", clusterControl.listaPods, nombreSitio, llamadas)
+
+    print(f"Mejora: x{despues / antes:.1f}")
+
+if __name__ == "__main__":
+    main()
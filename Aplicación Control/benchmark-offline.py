@@ -0,0 +1,560 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Banco de pruebas sin clúster de cluster-control.py
+
+Ejecuta el despliegue (despliega-lote), el backup de la flota (backup-flota bd) y la eliminación de sitios
+(quita-despliegue-sitio) contra un servidor local que imita la API de Kubernetes (discovery, lecturas,
+server-side apply, borrados y watch) y un kubectl simulado, para 1, 10 y 100 sitios.
+
+De cada escenario mide el tiempo total, las llamadas a la API, los procesos lanzados (y cuántos son kubectl)
+y el pico de memoria (RSS). Cada escenario se ejecuta en un proceso aparte para que el RSS sea el suyo.
+Los resultados se comparan con una base guardada (--guarda-base para crearla o actualizarla). El repositorio
+incluye la base benchmarks/base-offline.json, creada con las opciones por defecto: las llamadas a la API y los
+procesos no dependen de la máquina, pero los tiempos sí, así que al cambiar de máquina conviene volver a crearla
+con --guarda-base antes de comparar.
+
+Uso: benchmark-offline.py [--sitios 1,10,100] [--escenarios despliega,backup,elimina] [--paralelo N]
+                          [--latencia-api ms] [--latencia-listo s] [--latencia-borrado s] [--latencia-kubectl s]
+                          [--base fichero] [--guarda-base] [--tolerancia 0.25]
+
+© 2024 - JICR
+
+"""
+
+# Librerías necesarias
+import sys
+import os
+import json
+import time
+import threading
+import tempfile
+import subprocess
+import importlib
+import itertools
+import logging
+import resource
+import shutil
+import socket
+import uuid
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+DIRECTORIO_SCRIPT = os.path.dirname(os.path.abspath(__file__))
+FICHERO_BASE = os.path.join(DIRECTORIO_SCRIPT, "benchmarks", "base-offline.json")
+
+ESCENARIOS = ["despliega", "backup", "elimina"]
+NODOS = ["kubwebnodo1", "kubwebnodo2", "kubwebnodo3"]
+
+# Recursos que sirve la API simulada: grupo/versión -> [(plural, kind, con namespace)]
+RECURSOS = {
+    "api/v1": [("namespaces", "Namespace", False), ("pods", "Pod", True), ("secrets", "Secret", True),
+               ("services", "Service", True), ("configmaps", "ConfigMap", True),
+               ("persistentvolumeclaims", "PersistentVolumeClaim", True), ("persistentvolumes", "PersistentVolume", False)],
+    "apis/apps/v1": [("deployments", "Deployment", True)],
+    "apis/networking.k8s.io/v1": [("ingresses", "Ingress", True)]
+}
+
+# kubectl simulado: cuenta sus ejecuciones, tarda lo indicado y, para los scripts de backup, deja un fichero
+# en el volumen de dump del sitio como haría el script dentro del pod
+KUBECTL_SIMULADO = """#!/bin/sh
+echo "$*" >> "$BENCH_CONTADOR_KUBECTL"
+sleep "$BENCH_LATENCIA_KUBECTL"
+anterior=""
+for argumento in "$@"; do
+    [ "$anterior" = "-n" ] && namespace="$argumento"
+    anterior="$argumento"
+done
+fecha=$(date +%Y%m%d%H%M%S)
+case "$*" in
+    *backup_database.sh*) head -c 65536 /dev/urandom > "$BENCH_VOLUMENES/$namespace/bd/dump/$namespace-wordpress-DB-$fecha.sql.gz" ;;
+    *backup_uploads.sh*) head -c 65536 /dev/urandom > "$BENCH_VOLUMENES/$namespace/wp/dump/$namespace-UPLOADS-WP-$fecha.tgz" ;;
+esac
+exit 0
+"""
+
+def cargaClusterControl():
+    # Función que importa el módulo de cluster-control.py
+    return importlib.import_module("cluster_control")
+
+class EstadoCluster:
+    # Estado del clúster simulado: objetos por (plural, namespace, nombre), versión global (resourceVersion)
+    # y registro de eventos para los watch. Los deployments crean su pod, que pasa a 'Ready' tras
+    # 'latenciaListo' segundos; los namespaces borrados tardan 'latenciaBorrado' segundos en desaparecer
+
+    def __init__(self, coincideSelector, latenciaListo, latenciaBorrado):
+        self.coincideSelector = coincideSelector
+        self.latenciaListo = latenciaListo
+        self.latenciaBorrado = latenciaBorrado
+        self.condicion = threading.Condition()
+        self.objetos = {}
+        self.aplicados = {}
+        self.eventos = []
+        self.version = 1
+        self.contadorNodos = itertools.count()
+        self.llamadas = {}
+
+    def cuenta(self, clave):
+        with self.condicion:
+            self.llamadas[clave] = self.llamadas.get(clave, 0) + 1
+
+    def registra(self, plural, tipo, objeto):
+        # Guarda un cambio (con el bloqueo tomado): asigna versión, añade el evento y despierta a los watch
+        self.version += 1
+        objeto["metadata"]["resourceVersion"] = str(self.version)
+        clave = (plural, objeto["metadata"].get("namespace"), objeto["metadata"]["name"])
+        if tipo == "DELETED":
+            self.objetos.pop(clave, None)
+            self.aplicados.pop(clave, None)
+        else:
+            self.objetos[clave] = objeto
+        self.eventos.append((self.version, plural, tipo, json.loads(json.dumps(objeto))))
+        self.condicion.notify_all()
+
+    def coincide(self, objeto, namespace, selectorEtiquetas, selectorCampos):
+        metadatos = objeto["metadata"]
+        if namespace is not None and metadatos.get("namespace") != namespace:
+            return False
+        for requisito in filter(None, (selectorCampos or "").split(",")):
+            campo, valor = requisito.split("=", 1)
+            if {"metadata.name": metadatos["name"], "metadata.namespace": metadatos.get("namespace")}.get(campo) != valor:
+                return False
+        return self.coincideSelector(metadatos.get("labels"), selectorEtiquetas)
+
+    def lista(self, plural, namespace, selectorEtiquetas, selectorCampos):
+        with self.condicion:
+            objetos = [objeto for (tipo, _, _), objeto in self.objetos.items()
+                       if tipo == plural and self.coincide(objeto, namespace, selectorEtiquetas, selectorCampos)]
+            return json.loads(json.dumps(objetos)), self.version
+
+    def lee(self, plural, namespace, nombre):
+        with self.condicion:
+            objeto = self.objetos.get((plural, namespace, nombre))
+            return json.loads(json.dumps(objeto)) if objeto else None
+
+    def nuevo(self, plural, apiVersion, kind, namespace, cuerpo):
+        # Completa un objeto recién creado con los campos que pondría el servidor
+        objeto = json.loads(json.dumps(cuerpo))
+        objeto.update({"apiVersion": apiVersion, "kind": kind})
+        metadatos = objeto.setdefault("metadata", {})
+        if namespace is not None:
+            metadatos["namespace"] = namespace
+        metadatos.update({"uid": str(uuid.uuid4()), "creationTimestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())})
+        estados = {"namespaces": {"phase": "Active"}, "persistentvolumeclaims": {"phase": "Bound"},
+                   "persistentvolumes": {"phase": "Bound"}, "deployments": {"replicas": 0}}
+        if plural in estados:
+            objeto["status"] = estados[plural]
+        return objeto
+
+    def crea(self, plural, apiVersion, kind, namespace, cuerpo):
+        with self.condicion:
+            if (plural, namespace, cuerpo["metadata"]["name"]) in self.objetos:
+                return None
+            objeto = self.nuevo(plural, apiVersion, kind, namespace, cuerpo)
+            self.registra(plural, "ADDED", objeto)
+            return json.loads(json.dumps(objeto))
+
+    def aplica(self, plural, apiVersion, kind, namespace, nombre, cuerpo, gestor):
+        # Server-side apply: si el contenido aplicado no cambia, el objeto (y su versión y managedFields) no cambian
+        contenido = json.dumps(cuerpo, sort_keys=True)
+        with self.condicion:
+            clave = (plural, namespace, nombre)
+            anterior = self.objetos.get(clave)
+            if anterior is not None and self.aplicados.get(clave) == contenido:
+                return json.loads(json.dumps(anterior)), False
+            objeto = self.nuevo(plural, apiVersion, kind, namespace, cuerpo)
+            if anterior is not None:
+                objeto["metadata"].update({campo: anterior["metadata"][campo] for campo in ("uid", "creationTimestamp")})
+                objeto["status"] = anterior.get("status", objeto.get("status"))
+            objeto["metadata"]["managedFields"] = [{"manager": gestor, "operation": "Apply", "apiVersion": apiVersion,
+                                                    "time": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())}]
+            self.aplicados[clave] = contenido
+            self.registra(plural, "MODIFIED" if anterior else "ADDED", objeto)
+            if plural == "deployments":
+                self.creaPod(objeto)
+            return json.loads(json.dumps(objeto)), anterior is None
+
+    def creaPod(self, deployment):
+        # Crea (o sustituye) el pod de un deployment y programa su paso a 'Ready'
+        namespace = deployment["metadata"]["namespace"]
+        for (plural, espacio, nombre), pod in list(self.objetos.items()):
+            if plural == "pods" and espacio == namespace and nombre.startswith(deployment["metadata"]["name"] + "-"):
+                self.registra("pods", "DELETED", pod)
+        nombrePod = f"{deployment['metadata']['name']}-{uuid.uuid4().hex[:5]}"
+        plantilla = deployment["spec"]["template"]
+        pod = self.nuevo("pods", "v1", "Pod", namespace, {
+            "metadata": {"name": nombrePod, "labels": plantilla["metadata"].get("labels", {})},
+            "spec": {"nodeName": NODOS[next(self.contadorNodos) % len(NODOS)], "containers": plantilla["spec"]["containers"]},
+            "status": {"phase": "Pending", "conditions": [{"type": "Ready", "status": "False"}]}
+        })
+        self.registra("pods", "ADDED", pod)
+
+        def listo():
+            with self.condicion:
+                actual = self.objetos.get(("pods", namespace, nombrePod))
+                if actual is None:
+                    return
+                actual["status"] = {"phase": "Running", "conditions": [{"type": "Ready", "status": "True"}],
+                                    "containerStatuses": [{"name": "c", "image": "i", "imageID": "", "ready": True, "restartCount": 0}]}
+                self.registra("pods", "MODIFIED", actual)
+                deploy = self.objetos.get(("deployments", namespace, deployment["metadata"]["name"]))
+                if deploy is not None:
+                    deploy["status"] = {"replicas": 1, "readyReplicas": 1}
+                    self.registra("deployments", "MODIFIED", deploy)
+
+        threading.Timer(self.latenciaListo, listo).start()
+
+    def borra(self, plural, namespace, nombre):
+        with self.condicion:
+            objeto = self.objetos.get((plural, namespace, nombre))
+            if objeto is None:
+                return None
+            if plural != "namespaces":
+                self.registra(plural, "DELETED", objeto)
+                return json.loads(json.dumps(objeto))
+            objeto["status"] = {"phase": "Terminating"}
+            objeto["metadata"]["deletionTimestamp"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+            self.registra(plural, "MODIFIED", objeto)
+
+        def eliminaNamespace():
+            with self.condicion:
+                for (tipo, espacio, _), contenido in list(self.objetos.items()):
+                    if espacio == nombre:
+                        self.registra(tipo, "DELETED", contenido)
+                actual = self.objetos.get(("namespaces", None, nombre))
+                if actual is not None:
+                    self.registra("namespaces", "DELETED", actual)
+
+        threading.Timer(self.latenciaBorrado, eliminaNamespace).start()
+        return json.loads(json.dumps(objeto))
+
+class ManejadorAPI(BaseHTTPRequestHandler):
+    # Atiende las peticiones de la API simulada (HTTP/1.1 con keep-alive, como el servidor real)
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        # Cabeceras y cuerpo se escriben por separado: sin TCP_NODELAY el algoritmo de Nagle añadiría ~40 ms por respuesta
+        super().setup()
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.atiende("GET")
+
+    def do_POST(self):
+        self.atiende("POST")
+
+    def do_PATCH(self):
+        self.atiende("PATCH")
+
+    def do_DELETE(self):
+        self.atiende("DELETE")
+
+    def responde(self, codigo, cuerpo):
+        datos = json.dumps(cuerpo).encode()
+        self.send_response(codigo)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(datos)))
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def error(self, codigo, razon, mensaje):
+        self.responde(codigo, {"kind": "Status", "apiVersion": "v1", "metadata": {}, "status": "Failure",
+                               "message": mensaje, "reason": razon, "code": codigo})
+
+    def atiende(self, metodo):
+        estado = self.server.estado
+        url = urlparse(self.path)
+        parametros = {clave: valores[0] for clave, valores in parse_qs(url.query).items()}
+        longitud = int(self.headers.get("Content-Length") or 0)
+        cuerpo = json.loads(self.rfile.read(longitud)) if longitud else None
+        partes = url.path.strip("/").split("/")
+
+        # Discovery
+        if url.path == "/version":
+            estado.cuenta("descubrimiento")
+            return self.responde(200, {"major": "1", "minor": "29", "gitVersion": "v1.29.0"})
+        if url.path == "/api":
+            estado.cuenta("descubrimiento")
+            return self.responde(200, {"kind": "APIVersions", "versions": ["v1"]})
+        if url.path == "/apis":
+            estado.cuenta("descubrimiento")
+            grupos = [{"name": gv.split("/")[1], "versions": [{"groupVersion": gv[5:], "version": gv.split("/")[2]}],
+                       "preferredVersion": {"groupVersion": gv[5:], "version": gv.split("/")[2]}} for gv in RECURSOS if gv.startswith("apis/")]
+            return self.responde(200, {"kind": "APIGroupList", "apiVersion": "v1", "groups": grupos})
+        if url.path.strip("/") in RECURSOS:
+            estado.cuenta("descubrimiento")
+            gv = url.path.strip("/")
+            recursos = [{"name": plural, "singularName": kind.lower(), "namespaced": conNamespace, "kind": kind,
+                         "verbs": ["create", "delete", "get", "list", "patch", "update", "watch"]}
+                        for plural, kind, conNamespace in RECURSOS[gv]]
+            return self.responde(200, {"kind": "APIResourceList", "groupVersion": gv.split("/", 1)[1], "resources": recursos})
+
+        # Recursos: /api/v1/... o /apis/<grupo>/<versión>/...
+        gv, resto = ("api/v1", partes[2:]) if partes[0] == "api" else ("/".join(partes[:3]), partes[3:])
+        if resto[0] == "namespaces" and len(resto) >= 3:
+            namespace, plural, nombre = resto[1], resto[2], (resto[3] if len(resto) > 3 else None)
+        else:
+            namespace, plural, nombre = None, resto[0], (resto[1] if len(resto) > 1 else None)
+        kind = next((kind for recurso, kind, _ in RECURSOS.get(gv, []) if recurso == plural), None)
+        if kind is None:
+            return self.error(404, "NotFound", f"recurso {url.path} desconocido")
+        apiVersion = gv.split("/", 1)[1]
+
+        esWatch = parametros.get("watch", "").lower() == "true"
+        estado.cuenta(f"{'WATCH' if esWatch else metodo} {plural}")
+        time.sleep(self.server.latenciaApi)
+
+        if metodo == "GET" and nombre is None and esWatch:
+            return self.observa(estado, plural, namespace, parametros)
+        if metodo == "GET" and nombre is None:
+            objetos, version = estado.lista(plural, namespace, parametros.get("labelSelector"), parametros.get("fieldSelector"))
+            return self.responde(200, {"kind": f"{kind}List", "apiVersion": apiVersion, "metadata": {"resourceVersion": str(version)}, "items": objetos})
+        if metodo == "GET":
+            objeto = estado.lee(plural, namespace, nombre)
+            return self.responde(200, objeto) if objeto else self.error(404, "NotFound", f'{plural} "{nombre}" not found')
+        if metodo == "POST":
+            objeto = estado.crea(plural, apiVersion, kind, namespace, cuerpo)
+            return self.responde(201, objeto) if objeto else self.error(409, "AlreadyExists", f'{plural} "{cuerpo["metadata"]["name"]}" already exists')
+        if metodo == "PATCH":
+            objeto, creado = estado.aplica(plural, apiVersion, kind, namespace, nombre, cuerpo, parametros.get("fieldManager"))
+            return self.responde(201 if creado else 200, objeto)
+        if metodo == "DELETE":
+            objeto = estado.borra(plural, namespace, nombre)
+            return self.responde(200, objeto) if objeto else self.error(404, "NotFound", f'{plural} "{nombre}" not found')
+        return self.error(405, "MethodNotAllowed", metodo)
+
+    def observa(self, estado, plural, namespace, parametros):
+        # Watch: eventos en líneas JSON con codificación chunked hasta agotar timeoutSeconds
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def envia(tipo, objeto):
+            datos = json.dumps({"type": tipo, "object": objeto}).encode() + b"\n"
+            self.wfile.write(f"{len(datos):X}\r\n".encode() + datos + b"\r\n")
+            self.wfile.flush()
+
+        selectorEtiquetas, selectorCampos = parametros.get("labelSelector"), parametros.get("fieldSelector")
+        limite = time.monotonic() + int(parametros.get("timeoutSeconds", 60))
+        try:
+            # Sin resourceVersion se envía primero el estado actual como eventos ADDED
+            if "resourceVersion" in parametros:
+                cursor = int(parametros["resourceVersion"])
+            else:
+                objetos, cursor = estado.lista(plural, namespace, selectorEtiquetas, selectorCampos)
+                for objeto in objetos:
+                    envia("ADDED", objeto)
+
+            while time.monotonic() < limite:
+                with estado.condicion:
+                    estado.condicion.wait_for(lambda: estado.version > cursor, timeout=max(0, limite - time.monotonic()))
+                    pendientes = [(version, tipo, objeto) for version, recurso, tipo, objeto in estado.eventos
+                                  if version > cursor and recurso == plural and estado.coincide(objeto, namespace, selectorEtiquetas, selectorCampos)]
+                    cursor = estado.version
+                for _, tipo, objeto in pendientes:
+                    envia(tipo, objeto)
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        self.close_connection = True
+
+def iniciaServidor(estado, latenciaApi):
+    # Función que arranca la API simulada en un puerto libre de localhost y devuelve el servidor
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), ManejadorAPI)
+    servidor.daemon_threads = True
+    servidor.estado = estado
+    servidor.latenciaApi = latenciaApi
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+def preparaEntorno(directorio, puerto):
+    # Función que crea el kubeconfig de la API simulada y el kubectl simulado
+    kubeconfig = os.path.join(directorio, "kubeconfig")
+    with open(kubeconfig, "w") as file:
+        json.dump({
+            "apiVersion": "v1", "kind": "Config", "current-context": "benchmark",
+            "clusters": [{"name": "benchmark", "cluster": {"server": f"http://127.0.0.1:{puerto}"}}],
+            "users": [{"name": "benchmark", "user": {"token": "benchmark"}}],
+            "contexts": [{"name": "benchmark", "context": {"cluster": "benchmark", "user": "benchmark"}}]
+        }, file)
+
+    directorioBin = os.path.join(directorio, "bin")
+    os.makedirs(directorioBin, exist_ok=True)
+    kubectl = os.path.join(directorioBin, "kubectl")
+    with open(kubectl, "w") as file:
+        file.write(KUBECTL_SIMULADO)
+    os.chmod(kubectl, 0o755)
+    return kubeconfig, directorioBin
+
+def nombresSitios(sitios):
+    return [f"bench-{numero:04d}" for numero in range(sitios)]
+
+def ejecutaEscenario(escenario, sitios, paralelo):
+    # Función que se ejecuta en el proceso hijo: carga cluster-control.py apuntando al entorno simulado,
+    # ejecuta el escenario y escribe en la salida una línea JSON con sus medidas
+
+    # El log de cluster-control.py se descarta (basicConfig no hace nada si ya hay configuración)
+    logging.basicConfig(handlers=[logging.NullHandler()])
+    clusterControl = cargaClusterControl()
+
+    base = os.environ["BENCH_DIRECTORIO"]
+    clusterControl.DIRECTORIO_SITIOS = f"{base}/sitios"
+    clusterControl.DIRECTORIO_VOLUMENES = os.environ["BENCH_VOLUMENES"]
+    clusterControl.DIRECTORIO_BACKUPS = f"{base}/backups"
+    clusterControl.FICHERO_CATALOGO = f"{base}/backups/catalogo.db"
+    clusterControl.DIRECTORIO_OBJETOS = f"{base}/backups/objetos"
+    clusterControl.DIRECTORIO_INFORMES = f"{base}/backups/informes"
+    clusterControl.FICHERO_POLITICAS = f"{base}/politicas-retencion.json"
+
+    # Contamos los procesos que se lanzan (subprocess.run usa Popen)
+    procesos = [0]
+    class PopenContado(subprocess.Popen):
+        def __init__(self, *args, **kwargs):
+            procesos[0] += 1
+            super().__init__(*args, **kwargs)
+    subprocess.Popen = PopenContado
+
+    nombres = nombresSitios(sitios)
+    salidaOriginal = sys.stdout
+    sys.stdout = open(os.devnull, "w")
+    inicio = time.perf_counter()
+    try:
+        if escenario == "despliega":
+            directorioConfig = f"{base}/configuraciones"
+            os.makedirs(directorioConfig, exist_ok=True)
+            for nombreSitio in nombres:
+                with open(f"{directorioConfig}/{nombreSitio}.json", "w") as file:
+                    json.dump({"website": {"nombreSitio": nombreSitio, "version": "1", "passwordBD": "bd", "passwordWP": "wp",
+                                           "passwordAdminWP": "admin", "mailUserWP": "bench@uca.es", "tituloSitio1": "Banco",
+                                           "tituloSitio2": "Pruebas", "tipoEntidad": "servicio"}}, file)
+            codigoResultado, _ = clusterControl.despliegaLote(directorioConfig, paralelo)
+        elif escenario == "backup":
+            codigoResultado, _ = clusterControl.backupFlota("bd", "dump", clusterControl.PARALELO_POR_NODO, "zstd", f"{base}/informe-backup.json")
+        else:
+            codigoResultado, _ = clusterControl.eliminaDesplieguesSitios(nombres, paralelo)
+    finally:
+        duracion = time.perf_counter() - inicio
+        sys.stdout.close()
+        sys.stdout = salidaOriginal
+
+    print(json.dumps({"codigo": codigoResultado, "segundos": round(duracion, 3), "procesos": procesos[0],
+                      "rssMaximo": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}))
+
+def mide(escenario, sitios, opciones, estado, entorno, contadorKubectl):
+    # Función que ejecuta un escenario en un proceso hijo y devuelve sus medidas junto con las de la API simulada
+    with estado.condicion:
+        estado.llamadas = {}
+    open(contadorKubectl, "w").close()
+
+    proceso = subprocess.run([sys.executable, os.path.abspath(__file__), "--ejecuta", escenario, str(sitios), str(opciones["paralelo"])],
+                             capture_output=True, text=True, env=entorno, timeout=3600)
+    if proceso.returncode != 0:
+        raise RuntimeError(f"El escenario {escenario} con {sitios} sitios ha fallado:\n{proceso.stderr}")
+    medidas = json.loads(proceso.stdout.strip().splitlines()[-1])
+
+    with estado.condicion:
+        llamadas = dict(estado.llamadas)
+    with open(contadorKubectl) as file:
+        medidas["kubectl"] = sum(1 for _ in file)
+    medidas["llamadasAPI"] = sum(cantidad for clave, cantidad in llamadas.items() if clave != "descubrimiento")
+    medidas["descubrimiento"] = llamadas.get("descubrimiento", 0)
+    medidas["detalleLlamadas"] = llamadas
+    return medidas
+
+def comparaConBase(resultados, base, tolerancia):
+    # Función que compara los resultados con la base: el tiempo no puede crecer más de la tolerancia
+    # y las llamadas a la API y los procesos no pueden aumentar. Devuelve la lista de regresiones
+    regresiones = []
+    for clave, medidas in resultados.items():
+        anterior = base.get(clave)
+        if anterior is None:
+            continue
+        if medidas["segundos"] > anterior["segundos"] * (1 + tolerancia):
+            regresiones.append(f"{clave}: tiempo {anterior['segundos']:.2f}s -> {medidas['segundos']:.2f}s")
+        for medida in ("llamadasAPI", "procesos", "kubectl"):
+            if medidas[medida] > anterior[medida]:
+                regresiones.append(f"{clave}: {medida} {anterior[medida]} -> {medidas[medida]}")
+    return regresiones
+
+def main():
+    args = sys.argv[1:]
+
+    # Modo interno: ejecución de un escenario en el proceso hijo
+    if args[:1] == ["--ejecuta"]:
+        ejecutaEscenario(args[1], int(args[2]), int(args[3]))
+        return
+
+    clusterControl = cargaClusterControl()
+    try:
+        sitios = [int(numero) for numero in clusterControl.extraeOpcion(args, "--sitios", "1,10,100").split(",")]
+        escenarios = clusterControl.extraeOpcion(args, "--escenarios", ",".join(ESCENARIOS)).split(",")
+        opciones = {
+            "paralelo": int(clusterControl.extraeOpcion(args, "--paralelo", clusterControl.PARALELO_LOTE)),
+            "latenciaApi": float(clusterControl.extraeOpcion(args, "--latencia-api", "2")) / 1000,
+            "latenciaListo": float(clusterControl.extraeOpcion(args, "--latencia-listo", "0.5")),
+            "latenciaBorrado": float(clusterControl.extraeOpcion(args, "--latencia-borrado", "0.5")),
+            "latenciaKubectl": clusterControl.extraeOpcion(args, "--latencia-kubectl", "0.1")
+        }
+        ficheroBase = clusterControl.extraeOpcion(args, "--base", FICHERO_BASE)
+        tolerancia = float(clusterControl.extraeOpcion(args, "--tolerancia", "0.25"))
+        guardaBase = clusterControl.extraeIndicador(args, "--guarda-base")
+    except ValueError as e:
+        sys.stderr.write(f"\nError: {e}\n\n")
+        sys.exit(1)
+    if args or any(escenario not in ESCENARIOS for escenario in escenarios):
+        sys.stderr.write(__doc__)
+        sys.exit(1)
+
+    resultados = {}
+    print(f"{'ESCENARIO':<10} {'SITIOS':>6} {'TIEMPO':>9} {'API':>7} {'PROCESOS':>9} {'KUBECTL':>8} {'RSS':>9}")
+    for numeroSitios in sitios:
+        # Cada tamaño empieza con un clúster vacío; sus escenarios se encadenan (desplegar, copiar, eliminar)
+        directorio = tempfile.mkdtemp(prefix="benchmark-offline-")
+        estado = EstadoCluster(clusterControl.coincideSelector, opciones["latenciaListo"], opciones["latenciaBorrado"])
+        servidor = iniciaServidor(estado, opciones["latenciaApi"])
+        try:
+            kubeconfig, directorioBin = preparaEntorno(directorio, servidor.server_address[1])
+            contadorKubectl = os.path.join(directorio, "kubectl.log")
+            entorno = dict(os.environ, KUBECONFIG=kubeconfig, PATH=f"{directorioBin}:{os.environ.get('PATH', '')}",
+                           CLUSTER_CONTROL_SOCKET=os.path.join(directorio, "sin-demonio.sock"),
+                           BENCH_DIRECTORIO=directorio, BENCH_VOLUMENES=os.path.join(directorio, "volumenes"),
+                           BENCH_CONTADOR_KUBECTL=contadorKubectl, BENCH_LATENCIA_KUBECTL=opciones["latenciaKubectl"])
+
+            for escenario in escenarios:
+                medidas = mide(escenario, numeroSitios, opciones, estado, entorno, contadorKubectl)
+                resultados[f"{escenario}/{numeroSitios}"] = medidas
+                estadoEscenario = "" if medidas["codigo"] == 200 else "  (con errores)"
+                print(f"{escenario:<10} {numeroSitios:>6} {medidas['segundos']:>8.2f}s {medidas['llamadasAPI']:>7} {medidas['procesos']:>9} "
+                      f"{medidas['kubectl']:>8} {medidas['rssMaximo'] / 1024:>7.1f}MB{estadoEscenario}")
+        finally:
+            servidor.shutdown()
+            shutil.rmtree(directorio, ignore_errors=True)
+
+    # Comparación con la base guardada
+    if guardaBase:
+        os.makedirs(os.path.dirname(os.path.abspath(ficheroBase)), exist_ok=True)
+        with open(ficheroBase, "w") as file:
+            json.dump({"opciones": opciones, "resultados": resultados}, file, indent=2)
+        print(f"Base guardada en {ficheroBase}")
+    elif os.path.exists(ficheroBase):
+        with open(ficheroBase) as file:
+            base = json.load(file)
+        if base.get("opciones") != opciones:
+            print("Aviso: la base se midió con otras latencias; la comparación puede no ser significativa")
+        regresiones = comparaConBase(resultados, base["resultados"], tolerancia)
+        if regresiones:
+            print("Regresiones respecto a la base:")
+            for regresion in regresiones:
+                print(f"  {regresion}")
+            sys.exit(1)
+        print("Sin regresiones respecto a la base")
+    else:
+        print(f"No hay base en {ficheroBase} con la que comparar (ejecute con --guarda-base para crearla)")
+
+if __name__ == "__main__":
+    main()
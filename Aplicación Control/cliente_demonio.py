@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+"""
+Cliente del demonio de cluster-control.py
+
+Envía un comando al demonio (cluster-control.py demonio) y muestra su salida a medida que llega. Solo usa módulos
+ligeros: cluster-control.py lo importa antes que cluster_control, que solo se carga si el comando se ejecuta en el
+propio proceso (no hay demonio o el comando no se le envía).
+
+© 2024 - JICR
+
+"""
+
+# Librerías necesarias
+import sys
+import os
+import json
+import socket
+
+# Modo demonio: socket Unix en el que escucha y versión del código (el cliente no usa un demonio con otra versión)
+SOCKET_DEMONIO = os.environ.get("CLUSTER_CONTROL_SOCKET", "/opt/control/cluster-control.sock")
+VERSION_CODIGO = "-".join(str(os.stat(os.path.join(os.path.dirname(os.path.abspath(__file__)), modulo)).st_mtime_ns)
+                          for modulo in ("cluster_control.py", "cliente_demonio.py"))
+
+# Parámetros de cada comando que son rutas de ficheros (el cliente las envía al demonio como rutas absolutas)
+PARAMETROS_FICHERO = {"despliega": [0], "despliega-lote": [0], "crea-semilla": [0]}
+OPCIONES_FICHERO = ["--informe", "--traza", "--fichero"]
+
+# Comandos que se ejecutan siempre en el proceso del cliente, y los que solo con alguna opción: los que siguen en
+# marcha hasta que se interrumpen (el demonio, el servidor de métricas, el seguimiento de logs). En un hilo del
+# demonio no terminarían con el Ctrl-C del cliente: el puerto de métricas seguiría ocupado y los logs siguiéndose
+COMANDOS_CLIENTE = ["demonio", "metricas"]
+OPCIONES_CLIENTE = {"muestra-logs": ["--follow"]}
+
+def ejecutaEnCliente(argumentos):
+    # Función que indica si un comando se ejecuta siempre en el proceso del cliente, sin enviarlo al demonio
+    accion = argumentos[0] if argumentos else None
+    return accion in COMANDOS_CLIENTE or any(opcion in argumentos[1:] for opcion in OPCIONES_CLIENTE.get(accion, []))
+
+def absolutizaRutas(argumentos):
+    # Función que convierte en absolutas las rutas de ficheros de los argumentos de un comando,
+    # ya que el demonio no comparte el directorio de trabajo del cliente
+    argumentos = list(argumentos)
+    for posicion in PARAMETROS_FICHERO.get(argumentos[0] if argumentos else None, []):
+        if posicion + 1 < len(argumentos):
+            argumentos[posicion + 1] = os.path.abspath(argumentos[posicion + 1])
+    for posicion in range(1, len(argumentos) - 1):
+        if argumentos[posicion] in OPCIONES_FICHERO:
+            argumentos[posicion + 1] = os.path.abspath(argumentos[posicion + 1])
+    return argumentos
+
+def ejecutaEnDemonio(argumentos, rutaSocket=SOCKET_DEMONIO):
+    # Función que envía un comando al demonio y muestra su salida a medida que llega
+    # Devuelve el código de salida del comando, o None si no hay demonio disponible (se ejecuta en el proceso)
+    # Si el demonio rechaza el comando (otra versión del código) se avisa por la salida de error
+    try:
+        conexion = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        conexion.connect(rutaSocket)
+    except OSError:
+        return None
+
+    with conexion:
+        conexion.sendall((json.dumps({"argumentos": absolutizaRutas(argumentos), "version": VERSION_CODIGO}) + "\n").encode())
+        for linea in conexion.makefile("r", encoding="utf-8"):
+            mensaje = json.loads(linea)
+            if "salida" in mensaje:
+                sys.stdout.write(mensaje["salida"])
+                sys.stdout.flush()
+            elif "error" in mensaje:
+                sys.stderr.write(mensaje["error"])
+            elif "rechazado" in mensaje:
+                sys.stderr.write(f"Demonio no utilizado: {mensaje['rechazado']}\n")
+                return None
+            elif "codigo" in mensaje:
+                return mensaje["codigo"]
+
+    sys.stderr.write("Se ha perdido la conexión con el demonio\n")
+    return 1
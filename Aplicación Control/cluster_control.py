@@ -0,0 +1,5136 @@
+# -*- coding: utf-8 -*-
+
+"""
+Cluster Control Script for Kubernetes
+
+Este módulo proporciona una serie de comandos para gestionar y controlar el clúster de Kubernetes.
+Permite realizar operaciones como desplegar sitios, reiniciar contenedores, mostrar logs, y manejar backups, entre otros.
+Se ejecuta con cluster-control.py: importado como módulo, su código compilado queda en __pycache__.
+
+© 2024 - JICR 
+
+"""
+
+# Librerías necesarias
+import sys
+import logging
+import os
+import subprocess
+import base64
+import hashlib
+import time
+import json
+import threading
+import glob
+import datetime
+import heapq
+import queue
+import collections
+import gzip
+import stat
+import re
+import sqlite3
+import shutil
+import textwrap
+import socket
+import socketserver
+import importlib
+import importlib.util
+import contextlib
+import functools
+import secrets
+import email.utils
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Cliente del demonio (socket, versión del código y comandos que no se le envían)
+from cliente_demonio import SOCKET_DEMONIO, VERSION_CODIGO, ejecutaEnCliente
+
+class ModuloDiferido:
+    # Módulo que se importa la primera vez que se usa uno de sus atributos
+    # El SDK de kubernetes y yaml tardan cientos de ms en importarse; así solo los pagan los comandos que los usan
+
+    def __init__(self, nombre):
+        self._nombre = nombre
+        self._modulo = None
+
+    def __getattr__(self, atributo):
+        if self._modulo is None:
+            self._modulo = importlib.import_module(self._nombre)
+        return getattr(self._modulo, atributo)
+
+yaml = ModuloDiferido("yaml")
+client = ModuloDiferido("kubernetes.client")
+config = ModuloDiferido("kubernetes.config")
+watch = ModuloDiferido("kubernetes.watch")
+dynamic = ModuloDiferido("kubernetes.dynamic")
+
+# Servidor HTTP del endpoint de métricas (solo lo importa el comando 'metricas')
+servidorHTTP = ModuloDiferido("http.server")
+
+# Cliente websocket de las sesiones exec
+wsClient = ModuloDiferido("kubernetes.stream.ws_client")
+
+# Compresión zstd multihilo para los backups (opcional; si no está instalada se usa gzip)
+zstandard = ModuloDiferido("zstandard")
+
+def zstdDisponible():
+    # Función que indica si el módulo zstandard está instalado (sin importarlo)
+    return importlib.util.find_spec("zstandard") is not None
+
+class ListaPorHilo:
+    # Lista con un contenido independiente para cada hilo: en modo demonio cada petición acumula sus propios errores
+
+    def __init__(self):
+        self.local = threading.local()
+
+    def _lista(self):
+        if not hasattr(self.local, "lista"):
+            self.local.lista = []
+        return self.local.lista
+
+    def append(self, elemento):
+        self._lista().append(elemento)
+
+    def clear(self):
+        self._lista().clear()
+
+    def __iter__(self):
+        return iter(self._lista())
+
+    def __len__(self):
+        return len(self._lista())
+
+    def __getitem__(self, indice):
+        return self._lista()[indice]
+
+    def __repr__(self):
+        return repr(self._lista())
+
+# Lista para almacenar los errores durante la ejecución del programa
+errores = ListaPorHilo()
+
+# Lista de nodos del clúster Kubernetes
+listaNodosCluster = "          - kubwebnodo1\n          - kubwebnodo2\n          - kubwebnodo3"
+
+# Definir las constantes
+DIRECTORIO_SITIOS = "/opt/control/sitios"
+DIRECTORIO_VOLUMENES = "/volumenes"
+DIRECTORIO_BACKUPS = "/opt/control/backups"
+
+# Tiempo máximo (en segundos) que se espera a que arranquen la BD y WordPress (en el despliegue el pod de WordPress
+# espera a su vez a la BD, así que se espera la suma de ambos)
+TIMEOUT_LISTO_BD = 600
+TIMEOUT_LISTO_WP = 600
+
+# Tiempo máximo (en segundos) que se espera a que termine de eliminarse el namespace de un sitio
+TIMEOUT_ELIMINA_NAMESPACE = 300
+
+# Imágenes de los contenedores de los sitios
+IMAGEN_BD = "mysql:8.0"
+IMAGEN_WP = "nexusimgrepo.uca.es/uca-wordpress/uca_wordpress:0.1"
+
+# Perfiles de rendimiento de MySQL: opciones de my.cnf, recursos del contenedor y tamaño de los datos hasta el que se
+# recomienda cada uno (ver recomiendaPerfil). El campo 'perfilBD' de la configuración del sitio elige uno por su nombre
+# o da un diccionario con el perfil de partida ("base") y valores propios, de my.cnf o de RECURSOS_PERFIL_BD
+PERFILES_BD = {
+    "pequeno": {"hastaDatos": 512 * 1024 ** 2, "cpu": "100m", "memoria": "384Mi", "limiteMemoria": "512Mi",
+                "mycnf": {"innodb_buffer_pool_size": "128M", "innodb_redo_log_capacity": "64M", "innodb_log_buffer_size": "8M",
+                          "max_connections": "40", "table_open_cache": "400", "tmp_table_size": "16M", "max_heap_table_size": "16M",
+                          "performance_schema": "OFF"}},
+    "mediano": {"hastaDatos": 4 * 1024 ** 3, "cpu": "250m", "memoria": "1Gi", "limiteMemoria": "1536Mi",
+                "mycnf": {"innodb_buffer_pool_size": "512M", "innodb_redo_log_capacity": "256M", "innodb_log_buffer_size": "16M",
+                          "max_connections": "100", "table_open_cache": "1000", "tmp_table_size": "32M", "max_heap_table_size": "32M",
+                          "performance_schema": "ON"}},
+    "grande": {"hastaDatos": None, "cpu": "1", "memoria": "3Gi", "limiteMemoria": "4Gi",
+               "mycnf": {"innodb_buffer_pool_size": "2G", "innodb_redo_log_capacity": "1G", "innodb_log_buffer_size": "64M",
+                         "max_connections": "200", "table_open_cache": "2000", "tmp_table_size": "64M", "max_heap_table_size": "64M",
+                         "performance_schema": "ON"}}
+}
+ALIAS_PERFILES_BD = {"small": "pequeno", "medium": "mediano", "large": "grande"}
+RECURSOS_PERFIL_BD = ["cpu", "memoria", "limiteMemoria"]
+
+# Perfil de los sitios sin 'perfilBD' (None: configuración y recursos por defecto de la imagen, como hasta ahora)
+PERFIL_BD_DEFECTO = None
+
+# Anotaciones de la plantilla del pod de la BD con el perfil aplicado y su hash (un cambio de perfil reinicia MySQL)
+ANOTACION_PERFIL_BD = "kubweb.uca.es/perfil-bd"
+ANOTACION_HASH_PERFIL_BD = "kubweb.uca.es/hash-perfil-bd"
+
+# Semillas: volúmenes (datos de MySQL y uploads) de un sitio plantilla ya inicializado, una por versión de las imágenes
+# Un sitio nuevo copia la semilla en lugar de inicializar MySQL e instalar WordPress desde cero (ver creaSemilla)
+DIRECTORIO_SEMILLAS = "/opt/control/semillas"
+MARCA_SEMILLA = "semilla.json"
+
+# Ficheros propios de cada servidor MySQL que no se copian en la semilla (UUID, sockets, certificados y binlogs)
+FICHEROS_EXCLUIDOS_SEMILLA = ["auto.cnf", "*.pid", "*.sock", "*.sock.lock", "*.pem", "binlog.*"]
+
+# Reserva de sitios en espera: namespaces con BD y WordPress ya desplegados e inicializados que 'despliega' reclama
+# para los sitios nuevos. El sitio conserva el namespace de la reserva (ver namespaceSitio); la profundidad y los
+# datos de los sitios en espera se pueden cambiar en FICHERO_RESERVA
+FICHERO_RESERVA = "/opt/control/reserva.json"
+RESERVA = {"profundidad": 0, "version": "1", "mailUserWP": "kubweb@uca.es", "tipoEntidad": "", "perfilBD": PERFIL_BD_DEFECTO}
+PREFIJO_RESERVA = "reserva-"
+
+# Número máximo de conexiones HTTP que se mantienen abiertas (keep-alive) hacia la API de Kubernetes
+# Los comandos que trabajan en paralelo lo amplían con ampliaPoolApi
+POOL_CONEXIONES_API = 16
+
+# Cliente de la API de Kubernetes compartido por todas las funciones del script (se crea bajo demanda)
+_apiClient = None
+_bloqueoApiClient = threading.Lock()
+_clienteDinamico = None
+
+# Gestor de campos con el que se registran los cambios hechos por server-side apply
+FIELD_MANAGER = "cluster-control"
+
+# Versión de las plantillas de manifiestos (forma parte del hash de cada fichero generado)
+VERSION_PLANTILLAS = "1"
+
+# Anotaciones con las que se marcan los objetos desplegados con el hash de su manifiesto y del sitio
+ANOTACION_HASH_MANIFIESTO = "kubweb.uca.es/hash-manifiesto"
+ANOTACION_HASH_SITIO = "kubweb.uca.es/hash-sitio"
+
+# Cachés del demonio (ver iniciaCaches) de cada tipo de objeto de los manifiestos de los sitios
+CACHES_POR_TIPO = {"Namespace": "namespaces", "PersistentVolume": "volumenes", "Secret": "secretos", "Deployment": "deployments",
+                   "Service": "servicios", "ConfigMap": "configmaps", "PersistentVolumeClaim": "pvcs", "Ingress": "ingresses"}
+
+# Número de sitios que se despliegan a la vez por defecto en un despliegue por lotes
+PARALELO_LOTE = 4
+
+# Etiqueta 'tier' de los pods de cada tipo de contenedor de un sitio
+SELECTOR_CONTENEDOR = {"bd": "tier=mysql", "wordpress": "tier=frontend"}
+
+# Tamaño de los bloques en los que se leen los logs de los pods
+TAMANO_BLOQUE_LOG = 64 * 1024
+
+# Parámetros de los backups en streaming al almacén del servidor de control
+TAMANO_BLOQUE_BACKUP = 1024 * 1024
+NIVEL_ZSTD = 3
+EXTENSIONES_COMPRESION = {"zstd": ".zst", "gzip": ".gz"}
+
+# Almacén de trozos direccionado por contenido compartido por los snapshots de uploads de todos los sitios
+DIRECTORIO_OBJETOS = f"{DIRECTORIO_BACKUPS}/objetos"
+TAMANO_TROZO_SNAPSHOT = 4 * 1024 * 1024
+EXTENSION_SNAPSHOT = ".snap.json"
+
+# Backups de toda la flota: nº de backups simultáneos por nodo (los PV son locales al nodo) e informes de tiempos
+PARALELO_POR_NODO = 1
+DIRECTORIO_INFORMES = f"{DIRECTORIO_BACKUPS}/informes"
+
+# Formatos de backup de cada tipo de contenedor (el primero es el de por defecto)
+FORMATOS_BACKUP = {"bd": ["dump", "streaming", "tablas"], "wordpress": ["dump", "snapshot"]}
+
+# Cachés del estado del clúster (list + watch) que mantiene el demonio: antigüedad máxima (en segundos) desde
+# la última confirmación del servidor para responder desde memoria; los watch se renuevan a la mitad de ese tiempo
+ANTIGUEDAD_MAXIMA_CACHE = 60
+ESPERA_REINTENTO_CACHE = 5
+
+# Script de entrada (cluster-control.py), con el que se lanzan los comandos en otro proceso
+SCRIPT_CONTROL = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cluster-control.py")
+
+# Métricas en formato Prometheus (comando 'metricas'): puerto del endpoint /metrics, cada cuántos segundos se
+# recorren los volúmenes de los sitios para medir lo que ocupan y cubetas (en segundos) de los histogramas de duración
+PUERTO_METRICAS = 9477
+INTERVALO_ESCANEO_VOLUMENES = 300
+CUBETAS_DURACION = [1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600]
+
+# Volúmenes de cada sitio que se miden: nombre -> subdirectorio en DIRECTORIO_VOLUMENES/<sitio>
+VOLUMENES_SITIO = {"bd-data": "bd/data", "bd-dump": "bd/dump", "wp-dump": "wp/dump", "wp-uploads": "wp/uploads"}
+
+# Posiciones de los parámetros que son nombres de sitio, que se sustituyen por el namespace de la reserva que ocupan
+# (en los comandos de varios sitios, todos los parámetros)
+PARAMETROS_SITIO = {"lista-pods": [0], "recomienda-perfil": [0], "inicializa-sitio": [0], "estado-pods": [0], "reinicia-contenedor": [0], "muestra-logs": [0],
+                    "ejecuta-backup-bd": [0], "ejecuta-backup-wp": [0], "listar-backup-bd": [0], "listar-backup-wp": [0],
+                    "reindexa-backups": [0], "restaurar-backup-wp": [0], "restaurar-backup-bd": [0]}
+COMANDOS_VARIOS_SITIOS = ["quita-despliegue-sitio", "poda-backups"]
+
+# Catálogo SQLite de backups: se actualiza cada vez que se escribe un backup y evita recorrer /volumenes al listarlos
+# Guarda también la duración de cada despliegue, backup, restauración y eliminación: el historial (que poda
+# 'poda-backups --todos') y los contadores por cubeta de los histogramas de las métricas, ya agregados
+FICHERO_CATALOGO = f"{DIRECTORIO_BACKUPS}/catalogo.db"
+ESQUEMA_CATALOGO = """
+CREATE TABLE IF NOT EXISTS backups (
+    ruta TEXT PRIMARY KEY,
+    sitio TEXT NOT NULL,
+    tipo TEXT NOT NULL,
+    fichero TEXT NOT NULL,
+    formato TEXT NOT NULL,
+    marca INTEGER NOT NULL,
+    tamano INTEGER NOT NULL,
+    compresion TEXT NOT NULL,
+    checksum TEXT
+);
+CREATE INDEX IF NOT EXISTS backups_sitio_tipo_marca ON backups (sitio, tipo, marca);
+CREATE INDEX IF NOT EXISTS backups_tipo_marca ON backups (tipo, marca);
+CREATE TABLE IF NOT EXISTS operaciones (
+    operacion TEXT NOT NULL,
+    variante TEXT NOT NULL,
+    argumento TEXT NOT NULL,
+    marca INTEGER NOT NULL,
+    duracion REAL NOT NULL,
+    resultado TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS operaciones_marca ON operaciones (marca);
+CREATE TABLE IF NOT EXISTS duraciones (
+    operacion TEXT NOT NULL,
+    variante TEXT NOT NULL,
+    resultado TEXT NOT NULL,
+    cubeta TEXT NOT NULL,
+    numero INTEGER NOT NULL,
+    suma REAL NOT NULL,
+    PRIMARY KEY (operacion, variante, resultado, cubeta)
+);
+CREATE TABLE IF NOT EXISTS reservas (
+    namespace TEXT PRIMARY KEY,
+    estado TEXT NOT NULL,
+    sitio TEXT UNIQUE,
+    creada INTEGER NOT NULL,
+    reclamada INTEGER
+);
+"""
+
+# Política de retención por defecto (abuelo-padre-hijo): nº de backups diarios, semanales y mensuales a conservar
+# Se puede ajustar para toda la flota y para cada sitio en FICHERO_POLITICAS:
+#   {"defecto": {"diarias": 7, ...}, "sitios": {"<nombre>": {"mensuales": 12, ...}}}
+POLITICA_RETENCION = {"diarias": 7, "semanales": 4, "mensuales": 6}
+FICHERO_POLITICAS = "/opt/control/politicas-retencion.json"
+
+# Capacidad de los volúmenes de dump de cada sitio y margen sobre el tamaño estimado de un backup nuevo
+CAPACIDAD_VOLUMEN_DUMP = 5 * 1024 ** 3
+MARGEN_ESPACIO_BACKUP = 1.5
+
+# Volcado consistente de la BD del sitio (se ejecuta en el pod MySQL, la contraseña se pasa por entorno)
+COMANDO_MYSQLDUMP = 'MYSQL_PWD="$MYSQL_ROOT_PASSWORD" mysqldump -uroot --single-transaction --quick --hex-blob --routines --triggers "$MYSQL_DATABASE"'
+
+# Backup por tablas: el mismo volcado consistente, sin bloqueos ni comentarios para poder repartirlo por tablas
+# en el servidor de control (una sentencia por línea), en trozos de TAMANO_TROZO_TABLA bytes sin comprimir
+COMANDO_MYSQLDUMP_TABLAS = 'MYSQL_PWD="$MYSQL_ROOT_PASSWORD" mysqldump -uroot --single-transaction --quick --hex-blob --routines --triggers --skip-add-locks --skip-disable-keys --skip-comments --default-character-set=utf8mb4 "$MYSQL_DATABASE"'
+COMANDO_MYSQL = 'MYSQL_PWD="$MYSQL_ROOT_PASSWORD" mysql -uroot --default-character-set=utf8mb4 "$MYSQL_DATABASE"'
+
+# Cambio de contraseñas de la BD (ver cambiaContrasenaBD): lee de la entrada la contraseña anterior y la nueva, una por
+# línea (no van en la línea de comandos), espera a que mysqld acepte conexiones y entra con la anterior o, si ya se
+# cambió en un intento previo, con la nueva; el resto de la entrada son las sentencias
+COMANDO_CAMBIA_CONTRASENA_BD = """{{ read -r ANTERIOR; read -r NUEVA
+for intento in $(seq {espera}); do mysqladmin -uroot --connect-timeout=2 ping >/dev/null 2>&1 && break; sleep 1; done
+for MYSQL_PWD in "$ANTERIOR" "$NUEVA"; do export MYSQL_PWD; mysql -uroot -e 'SELECT 1' >/dev/null 2>&1 && exec mysql -uroot; done
+echo 'No se puede entrar en MySQL ni con la contraseña anterior ni con la nueva' >&2; exit 1; }}"""
+EXTENSION_TABLAS = ".tablas.json"
+TAMANO_TROZO_TABLA = 64 * 1024 * 1024
+PARALELO_RESTAURACION = 4
+
+# Sentencias de sesión para cargar los trozos (mismos ajustes que pone mysqldump en la cabecera del volcado)
+PRELUDIO_CARGA = b"SET NAMES utf8mb4; SET TIME_ZONE='+00:00'; SET SQL_MODE='NO_AUTO_VALUE_ON_ZERO'; SET FOREIGN_KEY_CHECKS=0; SET UNIQUE_CHECKS=0; SET AUTOCOMMIT=0;\n"
+EPILOGO_CARGA = b"COMMIT;\n"
+
+# Configuración básica de logging
+# El fichero de log no se abre hasta que se escribe el primer mensaje (delay=True)
+logging.basicConfig(handlers=[logging.FileHandler('/opt/control/logs/cluster-control.log', delay=True)], level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger()
+
+class SalidaPorHilo:
+    # Sustituto de sys.stdout que envía lo que escribe cada hilo al destino que tenga asignado
+    # (o a la salida original si no tiene ninguno). Permite ejecutar funciones que usan print()
+    # en paralelo sin que se mezclen sus mensajes
+
+    def __init__(self, original):
+        self.original = original
+        self.local = threading.local()
+
+    def asignaDestino(self, destino):
+        self.local.destino = destino
+
+    def destino(self):
+        return getattr(self.local, "destino", None) or self.original
+
+    def write(self, texto):
+        return self.destino().write(texto)
+
+    def flush(self):
+        self.destino().flush()
+
+class LineasConPrefijo:
+    # Destino de salida que escribe cada línea completa precedida de un prefijo (p. ej. el nombre del sitio)
+
+    def __init__(self, salida, prefijo, bloqueo):
+        self.salida = salida
+        self.prefijo = prefijo
+        self.bloqueo = bloqueo
+        self.pendiente = ""
+
+    def write(self, texto):
+        self.pendiente += texto
+        *lineas, self.pendiente = self.pendiente.split("\n")
+        if lineas:
+            with self.bloqueo:
+                for linea in lineas:
+                    self.salida.write(f"{self.prefijo}{linea}\n")
+                self.salida.flush()
+        return len(texto)
+
+    def flush(self):
+        if self.pendiente:
+            self.write("\n")
+
+@contextlib.contextmanager
+def salidaPorHilos():
+    # Bloque en el que sys.stdout reparte lo que escribe cada hilo a su propio destino (ver SalidaPorHilo)
+    # Si la salida ya se reparte por hilos (modo demonio) se reutiliza; los mensajes van al destino del hilo que llama
+    salidaAnterior = sys.stdout
+    if isinstance(salidaAnterior, SalidaPorHilo):
+        yield salidaAnterior
+        return
+
+    salida = SalidaPorHilo(salidaAnterior)
+    sys.stdout = salida
+    try:
+        yield salida
+    finally:
+        sys.stdout = salidaAnterior
+
+class Traza:
+    # Registro de los tramos (fases) de un comando con su inicio y duración, que se guarda en formato
+    # Chrome trace (se abre con chrome://tracing o https://ui.perfetto.dev); cada hilo se muestra en su propia línea
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.eventos = []
+        self.hilos = {}
+        self.bloqueo = threading.Lock()
+
+    def registra(self, nombre, inicio, duracion, argumentos):
+        hilo = threading.current_thread()
+        evento = {"name": nombre, "ph": "X", "pid": os.getpid(), "tid": hilo.ident, "ts": round((inicio - self.inicio) * 1e6),
+                  "dur": round(duracion * 1e6), "args": {clave: str(valor) for clave, valor in argumentos.items()}}
+        with self.bloqueo:
+            self.eventos.append(evento)
+            self.hilos[hilo.ident] = hilo.name
+
+    def guarda(self, fichero):
+        with self.bloqueo:
+            nombresHilos = [{"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": ident, "args": {"name": nombre}} for ident, nombre in self.hilos.items()]
+            eventos = nombresHilos + sorted(self.eventos, key=lambda evento: evento["ts"])
+        with open(fichero, "w") as file:
+            json.dump({"traceEvents": eventos, "displayTimeUnit": "ms"}, file)
+
+# Traza activa y tramos abiertos de cada hilo (en modo demonio cada petición tiene los suyos)
+tramosHilo = threading.local()
+
+def trazaActual():
+    return getattr(tramosHilo, "traza", None)
+
+def asignaTraza(traza):
+    tramosHilo.traza = traza
+    tramosHilo.abiertos = []
+
+@contextlib.contextmanager
+def tramo(nombre, **argumentos):
+    # Mide una fase de un comando: su duración se escribe en el log (DEBUG) con la ruta de tramos que la contienen
+    # y, si hay una traza activa, se registra en ella. Devuelve el diccionario de argumentos del tramo, al que
+    # se pueden añadir datos (p. ej. el código de resultado) antes de que termine
+    abiertos = getattr(tramosHilo, "abiertos", None)
+    if abiertos is None:
+        abiertos = tramosHilo.abiertos = []
+    abiertos.append(nombre)
+    inicio = time.perf_counter()
+    try:
+        yield argumentos
+    finally:
+        duracion = time.perf_counter() - inicio
+        detalle = " ".join(f"{clave}={valor}" for clave, valor in argumentos.items())
+        logger.debug(f"Tramo {'/'.join(abiertos)}: {duracion * 1000:.0f} ms {detalle}".rstrip())
+        abiertos.pop()
+        traza = trazaActual()
+        if traza is not None:
+            traza.registra(nombre, inicio, duracion, argumentos)
+
+def trazada(nombre, parametro="sitio", operacion=None):
+    # Decorador que mide como un tramo cada llamada a la función, con su primer parámetro (por defecto el sitio)
+    # y el código que devuelve. Si se indica 'operacion', la duración se registra además en el catálogo para
+    # los histogramas de las métricas
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def envoltura(primero, *args, **kwargs):
+            inicio = time.monotonic()
+            with tramo(nombre, **{parametro: primero}) as datos:
+                codigoResultado, resultado = funcion(primero, *args, **kwargs)
+                datos["codigo"] = codigoResultado
+            if operacion is not None:
+                registraOperacion(operacion, nombre, primero, time.monotonic() - inicio, codigoResultado)
+            return codigoResultado, resultado
+        return envoltura
+    return decorador
+
+def conTraza(funcion):
+    # Función que prepara 'funcion' para ejecutarse en otro hilo (p. ej. un pool) registrando sus tramos en la traza del hilo actual
+    traza = trazaActual()
+    def envoltura(*args, **kwargs):
+        asignaTraza(traza)
+        try:
+            return funcion(*args, **kwargs)
+        finally:
+            asignaTraza(None)
+    return envoltura
+
+def printUso():
+    # Función para mostrar por pantalla la sintaxis del programa
+    uso = """\nUso: cluster-control.py COMANDO ...
+
+COMANDO:
+
+despliega <fichero JSON configuración> [--sin-semilla]              - Despliega el sitio (si es nuevo, en una reserva en espera
+          [--sin-reserva] [--forzar]                                  o a partir de la semilla de las imágenes actuales)
+                                                                      (--forzar: aplica aunque el sitio no tenga cambios)
+recomienda-perfil <nombre>                                          - Perfil de BD (perfilBD: pequeno, mediano, grande) recomendado
+                                                                      según lo que ocupan los datos del sitio
+repone-reserva [--profundidad N] [--paralelo N]                     - Prepara sitios en espera hasta tener N en la reserva
+                                                                      (por defecto, la profundidad de reserva.json)
+crea-semilla <fichero JSON configuración> [--reemplaza]            - Crea la semilla de las imágenes actuales desplegando
+                                                                      el sitio plantilla del fichero (que después elimina)
+despliega-lote <directorio | fichero lista> [--paralelo N]         - Despliega varios sitios a la vez
+quita-despliegue-sitio <nombre> [<nombre> ...] [--paralelo N]     - Elimina el despliegue de uno o varios sitios
+inicializa-sitio <nombre>                                           - Inicializa sitio Wordpress
+estado-pods <nombre>                                                - Estado de los pods de un sitio
+estado-flota [--json]                                               - Estado de todos los sitios del clúster
+estado-cache                                                        - Estado de las cachés del demonio (aciertos/fallos)
+metricas [--puerto N | --fichero ruta [--intervalo 1m]]            - Métricas de la flota para Prometheus: endpoint /metrics
+                                                                      o fichero para el textfile collector de node_exporter
+reinicia-contenedor <nombre> <"wordpress" | "bd">                   - Reinicia contenedor (sitio o bd)
+muestra-logs <nombre> <"wordpress" | "bd"> [--follow] [--tail N]   - Muestra logs (sitio o bd)
+             [--since 10m] [--contenedor nombre]
+ejecuta-backup-bd <nombre> [--streaming | --por-tablas]            - Ejecuta backup BD manual de la aplicacion
+                  [--compresion zstd|gzip]                            (--streaming: directo al almacén de backups;
+                                                                       --por-tablas: trozos por tabla, restauración en paralelo)
+ejecuta-backup-wp <nombre> [--snapshot]                            - Ejecuta backup Wordpress manual de la aplicacion
+                                                                      (--snapshot: incremental y deduplicado)
+backup-flota <"bd" | "wp"> [--formato F] [--por-nodo K]              - Backup de todos los sitios, como máximo K por nodo,
+             [--compresion zstd|gzip] [--informe fichero]            empezando por los de backup más antiguo
+listar-backup-bd <nombre | --todos> [--ultimo] [--anteriores-a 30d] - Lista los backup de base de datos disponibles
+listar-backup-wp <nombre | --todos> [--ultimo] [--anteriores-a 30d] - Lista los backup de wordpress disponibles
+reindexa-backups [<nombre>]                                         - Reconstruye el catálogo de backups desde disco
+poda-backups <nombre | --todos> [--tipo bd|wp] [--diarias N]        - Elimina backups antiguos (abuelo-padre-hijo)
+             [--semanales N] [--mensuales N] [--dry-run] [--paralelo N]   (con --todos, también el historial de operaciones
+                                                                       más antiguo que los meses que se conservan)
+restaurar-backup-bd <nombre> <fichero> [--paralelo N]              - Restaura el backup de BD de <fichero> en el sitio <nombre>
+restaurar-backup-wd <nombre> <fichero>                              - Restaura el backup de WP de <fichero> en el sitio <nombre>
+demonio [--socket ruta]                                             - Atiende los comandos por un socket Unix manteniendo
+                                                                      el cliente de la API y las cachés (el resto de
+                                                                      comandos lo usan si está en marcha)
+
+Todos los comandos admiten --traza <fichero>: guarda la duración de cada fase en formato Chrome trace
+(chrome://tracing o https://ui.perfetto.dev)
+
+"""
+    # Escribe el texto de uso en la salida estándar de error
+    sys.stderr.write(uso)
+
+def crearDirectorio(ruta):
+        # Función para crear un directorio dado        
+        try:
+            # Intenta crear el directorio con permisos 777
+            os.makedirs(ruta, mode=0o777, exist_ok=True)
+        except OSError as e:
+            # Si ocurre un error, lo agrega a la lista de errores
+            errores.append(f"No se ha podido crear el directorio {ruta}: {str(e)}")
+            return False
+        return True
+
+def crearDirectoriosVolumenes(nombreSitio):
+    # Función para crear todos los directorios necesarios para los despliegues
+
+    # Intenta crear el directorio principal para el sitio
+    if not crearDirectorio(f"{DIRECTORIO_VOLUMENES}/{nombreSitio}"):
+        return 500, errores
+
+    # Intenta crear el directorio para la base de datos
+    if not crearDirectorio(f"{DIRECTORIO_VOLUMENES}/{nombreSitio}/bd"):
+        return 500, errores
+
+    # Intenta crear el directorio de datos para la base de datos
+    if not crearDirectorio(f"{DIRECTORIO_VOLUMENES}/{nombreSitio}/bd/data"):
+        return 500, errores
+
+    # Intenta crear el directorio de backup para la base de dato
+    if not crearDirectorio(f"{DIRECTORIO_VOLUMENES}/{nombreSitio}/bd/dump"):
+        return 500, errores
+
+    # Intenta crear el directorio para WordPress
+    if not crearDirectorio(f"{DIRECTORIO_VOLUMENES}/{nombreSitio}/wp"):
+        return 500, errores
+
+    # Intenta crear el directorio de subidas para WordPress
+    if not crearDirectorio(f"{DIRECTORIO_VOLUMENES}/{nombreSitio}/wp/uploads"):
+        return 500, errores
+    
+    # Intenta crear el directorio de backup para WordPress
+    if not crearDirectorio(f"{DIRECTORIO_VOLUMENES}/{nombreSitio}/wp/dump"):
+        return 500, errores
+
+    # Registra un mensaje de depuración indicando la finalización de la creación de directorios
+    logger.debug(f"Finalización de la creación de directorios para {nombreSitio}")
+    return 200, "Directorio(s) creado(s) exitosamente"
+
+def versionSemilla():
+    # Función que devuelve el identificador de la semilla que corresponde a las imágenes actuales de BD y WordPress
+    return re.sub(r"[^A-Za-z0-9.+-]+", "_", f"{IMAGEN_BD}+{IMAGEN_WP.rsplit('/', 1)[-1]}")
+
+def rutaSemilla():
+    # Función que devuelve el directorio de la semilla de las imágenes actuales, o None si aún no se ha creado
+    # (las semillas cuya marca no guarda la contraseña de BD del sitio plantilla no sirven: hay que volver a crearlas)
+    ruta = f"{DIRECTORIO_SEMILLAS}/{versionSemilla()}"
+    try:
+        with open(f"{ruta}/{MARCA_SEMILLA}") as f:
+            return ruta if "passwordBD" in json.load(f) else None
+    except (OSError, ValueError):
+        return None
+
+def sitioNuevo(nombreSitio):
+    # Función que indica si el sitio aún no tiene datos de BD en su volumen (no se ha desplegado nunca)
+    ruta = f"{DIRECTORIO_VOLUMENES}/{nombreSitio}/bd/data"
+    return not os.path.isdir(ruta) or not os.listdir(ruta)
+
+def leeMarcaSemilla(nombreSitio):
+    # Función que devuelve la marca de un sitio creado a partir de una semilla ({"semilla", "fecha", "reescrito",
+    # "contrasenaCambiada" y, hasta que se cambia, "passwordBD" con la contraseña de la plantilla}), o None
+    try:
+        with open(f"{DIRECTORIO_VOLUMENES}/{nombreSitio}/bd/{MARCA_SEMILLA}") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def guardaMarcaSemilla(nombreSitio, marca):
+    # Función que guarda la marca de un sitio sembrado junto a su volumen de datos de BD (solo legible por root)
+    with open(os.open(f"{DIRECTORIO_VOLUMENES}/{nombreSitio}/bd/{MARCA_SEMILLA}", os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w") as f:
+        json.dump(marca, f)
+
+def copiaDirectorio(origen, destino):
+    # Función que copia el contenido de 'origen' en 'destino' conservando propietarios, permisos y fechas
+    # (--reflink=auto: en sistemas de ficheros con copy-on-write la copia es casi instantánea)
+    os.makedirs(destino, exist_ok=True)
+    proceso = subprocess.run(["cp", "-a", "--reflink=auto", f"{origen}/.", destino], capture_output=True, text=True)
+    if proceso.returncode != 0:
+        raise OSError(proceso.stderr.strip() or f"cp terminó con código {proceso.returncode}")
+
+def siembraSitio(nombreSitio, semilla):
+    # Función que copia la semilla en los volúmenes (ya creados y vacíos) de un sitio nuevo y lo marca como sembrado
+    # La marca guarda la contraseña de BD de la plantilla hasta que se cambia por la del sitio (cambiaContrasenaSemilla)
+    try:
+        with open(f"{semilla}/{MARCA_SEMILLA}") as f:
+            passwordPlantilla = json.load(f)["passwordBD"]
+        for volumen in ("bd/data", "wp/uploads"):
+            copiaDirectorio(f"{semilla}/{volumen}", f"{DIRECTORIO_VOLUMENES}/{nombreSitio}/{volumen}")
+        guardaMarcaSemilla(nombreSitio, {"semilla": os.path.basename(semilla), "fecha": datetime.datetime.now().isoformat(timespec="seconds"),
+                                         "reescrito": False, "contrasenaCambiada": False, "passwordBD": passwordPlantilla})
+    except (OSError, ValueError, KeyError) as e:
+        errores.append(f"No se ha podido copiar la semilla {semilla} en los volúmenes de {nombreSitio}: {str(e)}")
+        return 500, errores
+
+    logger.debug(f"Volúmenes de {nombreSitio} copiados de la semilla {semilla}")
+    return 200, f"Volúmenes copiados de la semilla {os.path.basename(semilla)}"
+
+def cambiaContrasenaSemilla(nombreSitio, passwordBD):
+    # Función que en un sitio sembrado sustituye, una sola vez y en cuanto arranca MySQL, la contraseña de BD del sitio
+    # plantilla (la del directorio de datos copiado) por la del sitio; después la marca ya no guarda la de la plantilla
+    # Los sitios sembrados con versiones anteriores la cambiaban en cada arranque con --init-file desde el secreto
+    # mysql-semilla-init (sus marcas no tienen "contrasenaCambiada"): basta con eliminar ese secreto
+    marca = leeMarcaSemilla(nombreSitio)
+    if marca is None or marca.get("contrasenaCambiada"):
+        return 200, None
+
+    if "contrasenaCambiada" not in marca:
+        try:
+            getCoreV1Api().delete_namespaced_secret("mysql-semilla-init", nombreSitio)
+        except client.exceptions.ApiException as e:
+            if e.status != 404:
+                return 500, f"No se ha podido eliminar el secreto mysql-semilla-init de {nombreSitio}: {e.reason}"
+        guardaMarcaSemilla(nombreSitio, dict(marca, contrasenaCambiada=True))
+        return 200, "Secreto mysql-semilla-init eliminado"
+
+    nombrePod = esperaPodListo(nombreSitio, "tier=mysql", TIMEOUT_LISTO_BD, enMarcha=True)
+    if nombrePod is None:
+        return 500, f"El pod Base de Datos de {nombreSitio} no ha arrancado para cambiar su contraseña"
+    codigoResultado, resultado = cambiaContrasenaBD(nombreSitio, nombrePod, marca["passwordBD"], passwordBD)
+    if codigoResultado == 200:
+        marca = dict(marca, contrasenaCambiada=True)
+        del marca["passwordBD"]
+        guardaMarcaSemilla(nombreSitio, marca)
+    return codigoResultado, resultado
+
+def crearNamespace(nombreSitio):
+    # Función para crear un namespace
+
+    v1 = getCoreV1Api()
+
+    # Verifica si existe el namespace y si está activo (en la caché si está vigente)
+    try:
+        vigente, namespace = leeCache("namespaces", None, nombreSitio)
+        if not vigente:
+            namespace = v1.read_namespace(name=nombreSitio)
+        if namespace is None:
+            raise client.exceptions.ApiException(status=404, reason="Not Found")
+        if namespace.status.phase == "Active":
+            return 200, "Namespace ya existe"
+        errores.append(f"El namespace {nombreSitio} está en estado {namespace.status.phase}")
+        return 500, errores
+    except client.exceptions.ApiException as e:
+        if e.status != 404:
+            errores.append(f"No se ha podido consultar el namespace {nombreSitio}: {e.reason}")
+            return 500, errores
+
+    # Si el namespace no existe, intenta crearlo
+    try:
+        v1.create_namespace(body=client.V1Namespace(metadata=client.V1ObjectMeta(name=nombreSitio)))
+    except client.exceptions.ApiException as e:
+        # La caché puede no reflejar aún un namespace recién creado
+        if e.status == 409:
+            return 200, "Namespace ya existe"
+        errores.append(f"No se ha podido crear el namespace {nombreSitio}: {e.reason}")
+        return 500, errores
+
+    logger.debug(f"Namespace creado para {nombreSitio}")
+    return 200, "Namespace creado exitosamente"
+
+def leeSecreto(nombreSitio, clave):
+    # Función que devuelve un secreto del despliegue, o None si no existe
+    try:
+        return getCoreV1Api().read_namespaced_secret(name=clave, namespace=nombreSitio)
+    except client.exceptions.ApiException as e:
+        if e.status != 404:
+            logger.error(f"No se pudo obtener el secreto {clave}: {e.reason}")
+        return None
+
+def leeMetadatosSecreto(nombreSitio, clave):
+    # Función que devuelve los metadatos y el tipo de un secreto (de la caché si está vigente), o None si no existe
+    vigente, secreto = leeCache("secretos", nombreSitio, clave)
+    return secreto if vigente else leeSecreto(nombreSitio, clave)
+
+def verificaSecretoRepositorioExiste(nombreSitio):
+    # Función para verificar si existe el secreto en el despliegue para acceder al repositorio Nexus
+    secreto = leeMetadatosSecreto(nombreSitio, "registry-nexusimgrepo")
+    return secreto is not None and secreto.type == "kubernetes.io/dockerconfigjson"
+
+def crearSecretoRepo(nombreSitio):
+    # Función para crear el secreto en el despliegue para acceder al repositorio Nexus
+
+    # Contenido equivalente al de 'kubectl create secret docker-registry'
+    auth = base64.b64encode(b"user:password").decode()
+    dockerConfig = {"auths": {"nexusimgrepo.uca.es": {"username": "user", "password": "password", "email": "kubweb@uca.es", "auth": auth}}}
+    secreto = client.V1Secret(
+        metadata=client.V1ObjectMeta(name="registry-nexusimgrepo", namespace=nombreSitio),
+        type="kubernetes.io/dockerconfigjson",
+        data={".dockerconfigjson": base64.b64encode(json.dumps(dockerConfig).encode()).decode()}
+    )
+    try:
+        getCoreV1Api().create_namespaced_secret(namespace=nombreSitio, body=secreto)
+        return True
+    except client.exceptions.ApiException as e:
+        # La caché puede no reflejar aún un secreto recién creado
+        if e.status == 409:
+            return True
+        logger.error(f"No se pudo crear el secreto: {e.reason}")
+        return False
+
+def crearSecretoRepositorio(nombreSitio): 
+    # Función para verificar que un determinado secreto existe en el despliegue y, si no existe, crearlo   
+    try:
+        # Verificamos existencia del secreto
+        if verificaSecretoRepositorioExiste(nombreSitio):
+            logger.debug(f"Secreto de repositorio para {nombreSitio} ya existe")
+            return 200, "Secreto de repositorio ya existe"
+        else:
+            # Creamos secreto si no existe
+            if crearSecretoRepo(nombreSitio):
+                logger.debug(f"Secreto de repositorio creado para {nombreSitio}")
+                return 200, "Secreto creado exitosamente"
+            errores.append(f"No se ha podido crear el secreto de acceso al repositorio de la aplicación {nombreSitio}")
+            return 500, errores
+    except Exception as e:
+        errores.append(f"Error al crear el secreto de acceso al repositorio de la aplicación {nombreSitio}: {str(e)}")
+        logger.error(f"Ocurrió un error al crear el secreto al repositorio de la aplicación: {str(e)}")
+        return 500, errores
+
+def verificaSecretoOpaqueExiste(nombreSitio, clave):
+    # Función para verificar si existe un determinado secreto del tipo Opaque en el despliegue
+    secreto = leeMetadatosSecreto(nombreSitio, clave)
+    return secreto is not None and secreto.type == "Opaque"
+
+def crearSecretoOpaque(nombreSitio, clave, password):
+    # Función para crear un determinado secreto de tipo Opaque en el despliegue
+
+    # Comprobamos si ya existe el secreto en el despliegue
+    if verificaSecretoOpaqueExiste(nombreSitio, clave):
+        return 200, f"Secreto {clave} ya existe"
+
+    secreto = client.V1Secret(
+        metadata=client.V1ObjectMeta(name=clave, namespace=nombreSitio),
+        type="Opaque",
+        data={"password": password}
+    )
+    try:
+        getCoreV1Api().create_namespaced_secret(namespace=nombreSitio, body=secreto)
+        return 200, f"Secreto {clave} creado exitosamente"
+    except client.exceptions.ApiException as e:
+        if e.status == 409:
+            return 200, f"Secreto {clave} ya existe"
+        logger.error(f"No se pudo crear el secreto: {e.reason}")
+        errores.append(f"No se pudo crear el secreto {clave}: {e.reason}")
+        return 500, errores
+
+def calculaHash(*partes):
+    # Función que calcula el hash SHA-256 de un conjunto de cadenas
+    return hashlib.sha256("\0".join(partes).encode()).hexdigest()
+
+def leeHash(ruta):
+    # Función que devuelve el hash guardado junto a un fichero (<ruta>.sha256), o None si no existe
+    try:
+        with open(f"{ruta}.sha256", "r") as file:
+            return file.read().strip()
+    except OSError:
+        return None
+
+def guardaHash(ruta, valor):
+    # Función que guarda el hash de un fichero junto a él (<ruta>.sha256)
+    with open(f"{ruta}.sha256", "w") as file:
+        file.write(f"{valor}\n")
+
+def guardaManifiesto(ruta, contenido):
+    # Función que guarda un manifiesto y su hash de contenido (plantilla + parámetros)
+    # Si el fichero ya existe con el mismo hash no se reescribe. Devuelve True si se ha escrito
+    hashContenido = calculaHash(VERSION_PLANTILLAS, contenido)
+    if os.path.exists(ruta) and leeHash(ruta) == hashContenido:
+        return False
+
+    with open(ruta, "w") as file:
+        file.write(contenido)
+    guardaHash(ruta, hashContenido)
+    return True
+
+def compruebaHashSitio(nombreSitio, hashSitio, ficherosSitio):
+    # Función que comprueba que todos los objetos de los manifiestos del sitio (y el secreto del repositorio) existen
+    # en el clúster marcados con el hash dado y que los deployments tienen todas sus réplicas listas
+    # En el demonio, con las cachés vigentes, no hace ninguna llamada a la API; sin ellas hace una lista por tipo de
+    # objeto con namespace y una lectura por objeto sin namespace: 11 llamadas para un sitio sin cambios (medidas con
+    # el banco de pruebas). Solo mira la anotación de hash: un cambio manual que la conserve no se detecta (ver
+    # 'despliega --forzar')
+    esperados = {}
+    for ficheroYAML in ficherosSitio:
+        with open(ficheroYAML, 'r') as file:
+            for objeto in yaml.safe_load_all(file):
+                if objeto:
+                    esperados.setdefault((objeto["apiVersion"], objeto["kind"]), []).append(objeto["metadata"]["name"])
+
+    # Los objetos de las cachés y del cliente dinámico se comparan en su forma JSON (diccionarios)
+    dinamico = getClienteDinamico()
+    serializa = getApiClient().sanitize_for_serialization
+    try:
+        for (apiVersion, tipo), nombres in esperados.items():
+            recurso = dinamico.resources.get(api_version=apiVersion, kind=tipo)
+            if recurso.namespaced:
+                objetos = listaCache(CACHES_POR_TIPO.get(tipo), nombreSitio)
+                if objetos is None:
+                    objetos = dinamico.get(recurso, namespace=nombreSitio).to_dict()["items"]
+                else:
+                    objetos = [serializa(objeto) for objeto in objetos]
+                encontrados = {objeto["metadata"]["name"]: objeto for objeto in objetos}
+                if tipo == "Secret" and "registry-nexusimgrepo" not in encontrados:
+                    return False
+            else:
+                encontrados = {}
+                for nombre in nombres:
+                    vigente, objeto = leeCache(CACHES_POR_TIPO.get(tipo), None, nombre)
+                    if vigente:
+                        objeto = objeto and serializa(objeto)
+                    else:
+                        try:
+                            objeto = dinamico.get(recurso, name=nombre).to_dict()
+                        except dynamic.exceptions.NotFoundError:
+                            objeto = None
+                    if objeto is not None:
+                        encontrados[nombre] = objeto
+
+            for nombre in nombres:
+                objeto = encontrados.get(nombre)
+                if objeto is None or objeto["metadata"].get("deletionTimestamp"):
+                    return False
+                if (objeto["metadata"].get("annotations") or {}).get(ANOTACION_HASH_SITIO) != hashSitio:
+                    return False
+                if tipo == "Deployment" and (objeto.get("status", {}).get("readyReplicas") or 0) < (objeto["spec"].get("replicas") or 1):
+                    return False
+    except Exception as e:
+        logger.debug(f"No se pudieron comprobar los objetos de {nombreSitio}: {str(e)}")
+        return False
+    return True
+
+def sqlContrasenaBD(password):
+    # Función que devuelve las sentencias que fijan la contraseña de root y wordpress de la BD de un sitio (ver
+    # cambiaContrasenaBD). Son idempotentes y no fallan si falta algún usuario
+    literal = password.replace("\\", "\\\\").replace("'", "\\'")
+    return "".join(f"ALTER USER IF EXISTS {usuario} IDENTIFIED BY '{literal}';\n" for usuario in ("'root'@'localhost'", "'root'@'%'", "'wordpress'@'%'"))
+
+def perfilBD(valor):
+    # Función que devuelve el perfil de MySQL ({"nombre", "cpu", "memoria", "limiteMemoria", "mycnf"}) que indica el campo
+    # 'perfilBD' de la configuración de un sitio (ver PERFILES_BD), o None si no tiene. Lanza ValueError si no es válido
+    if valor is None:
+        return None
+    if isinstance(valor, str):
+        base, propios = valor, {}
+    elif isinstance(valor, dict):
+        propios = dict(valor)
+        base = propios.pop("base", "mediano")
+    else:
+        raise ValueError(f"perfilBD debe ser el nombre de un perfil o un diccionario: {valor!r}")
+
+    base = ALIAS_PERFILES_BD.get(base, base)
+    if base not in PERFILES_BD:
+        raise ValueError(f"Perfil de BD desconocido: {base} (perfiles: {', '.join(PERFILES_BD)})")
+
+    perfil = {"nombre": f"{base}+propio" if propios else base, "mycnf": dict(PERFILES_BD[base]["mycnf"])}
+    perfil.update({recurso: PERFILES_BD[base][recurso] for recurso in RECURSOS_PERFIL_BD})
+    for clave, dato in propios.items():
+        dato = str(dato)
+        if (clave not in RECURSOS_PERFIL_BD and not re.fullmatch(r"[a-z0-9_-]+", clave)) or not re.fullmatch(r"[A-Za-z0-9_.,/+-]+", dato):
+            raise ValueError(f"Valor no válido en perfilBD: {clave} = {dato!r}")
+        if clave in RECURSOS_PERFIL_BD:
+            perfil[clave] = dato
+        else:
+            perfil["mycnf"][clave] = dato
+    return perfil
+
+def crearDeploymentBD(nombreSitio, version, passwordBD, sembrado=False, perfil=None):
+    # Función que genera el fichero YAML de despliegue para la base de datos MySQL
+
+    # En un sitio creado a partir de una semilla el directorio de datos ya está inicializado: la BD responde en pocos
+    # segundos, así que se comprueba antes (las contraseñas de la plantilla se cambian por exec, ver cambiaContrasenaSemilla)
+    esperaInicial, periodo = 60, 10
+    if sembrado:
+        esperaInicial, periodo = 5, 5
+
+    # Perfil de rendimiento (ver perfilBD): my.cnf en un ConfigMap montado en conf.d y recursos del contenedor; su hash en
+    # la plantilla del pod hace que un cambio de perfil reinicie MySQL (el fichero se monta con subPath y no se refresca)
+    configuracionPerfil = anotacionesPerfil = montajePerfil = recursosPerfil = volumenPerfil = ""
+    if perfil is not None:
+        mycnf = "[mysqld]\n" + "".join(f"{clave} = {dato}\n" for clave, dato in perfil["mycnf"].items())
+        configuracionPerfil = f"""
+---
+apiVersion: v1
+kind: ConfigMap
+metadata:
+  name: mysql-config
+  namespace: {nombreSitio}
+data:
+  perfil.cnf: |
+{textwrap.indent(mycnf.rstrip(), "        ")}"""
+        anotacionesPerfil = f'''
+      annotations:
+        {ANOTACION_PERFIL_BD}: "{perfil['nombre']}"
+        {ANOTACION_HASH_PERFIL_BD}: "{calculaHash(mycnf, perfil['cpu'], perfil['memoria'], perfil['limiteMemoria'])}"'''
+        montajePerfil = """
+            - mountPath: /etc/mysql/conf.d/perfil.cnf
+              name: mysql-config-vol
+              subPath: perfil.cnf"""
+        recursosPerfil = f'''
+          resources:
+            requests:
+              cpu: "{perfil['cpu']}"
+              memory: "{perfil['memoria']}"
+            limits:
+              memory: "{perfil['limiteMemoria']}"'''
+        volumenPerfil = """
+        - name: mysql-config-vol
+          configMap:
+            name: mysql-config"""
+
+    deployBdContent = f"""apiVersion: v1
+kind: Namespace
+metadata:
+  name: {nombreSitio}
+---
+apiVersion: v1
+kind: PersistentVolume
+metadata:
+  name: {nombreSitio}-bd-data-pv
+  namespace: {nombreSitio}
+spec:
+  capacity:
+    storage: 1Gi
+  volumeMode: Filesystem
+  accessModes:
+  - ReadWriteOnce
+  persistentVolumeReclaimPolicy: Delete
+  storageClassName: local-storage
+  local:
+    path: /volumenes/{nombreSitio}/bd/data
+  nodeAffinity:
+    required:
+      nodeSelectorTerms:
+      - matchExpressions:
+        - key: kubernetes.io/hostname
+          operator: In
+          values:
+{listaNodosCluster}
+---   
+apiVersion: v1
+kind: PersistentVolume
+metadata:
+  name: {nombreSitio}-bd-dump-pv
+  namespace: {nombreSitio}
+spec:
+  capacity:
+    storage: 5Gi
+  volumeMode: Filesystem
+  accessModes:
+    - ReadWriteOnce
+  persistentVolumeReclaimPolicy: Delete
+  storageClassName: local-storage
+  local:
+    path: /volumenes/{nombreSitio}/bd/dump
+  nodeAffinity:
+    required:
+      nodeSelectorTerms:
+      - matchExpressions:
+        - key: kubernetes.io/hostname
+          operator: In
+          values:
+{listaNodosCluster}
+---
+kind: PersistentVolumeClaim
+apiVersion: v1
+metadata:
+  name: bd-data-pvc
+  namespace: {nombreSitio}  
+spec:
+  accessModes:
+    - ReadWriteOnce
+  storageClassName: local-storage
+  resources:
+    requests:
+      storage: 1Gi
+  volumeName: {nombreSitio}-bd-data-pv
+---
+kind: PersistentVolumeClaim
+apiVersion: v1
+metadata:
+  name: bd-dump-pvc
+  namespace: {nombreSitio}  
+spec:
+  accessModes:
+    - ReadWriteOnce
+  storageClassName: local-storage
+  resources:
+    requests:
+      storage: 5Gi
+  volumeName: {nombreSitio}-bd-dump-pv  
+---
+apiVersion: v1
+kind: Secret
+metadata:
+   name: mysql-bd-secret-config
+   namespace: {nombreSitio}
+type: Opaque
+data:
+   password: {passwordBD}{configuracionPerfil}
+---
+apiVersion: v1
+kind: ConfigMap
+metadata:
+  name: mysql-opt-scripts
+  namespace: {nombreSitio}
+data:
+  check_mysql.sh: |
+        #!/bin/bash
+
+        ## Script comprobación BD Wordpress está levantada
+
+        mysql -u$MYSQL_USER -p$MYSQL_PASSWORD -e "USE $MYSQL_DATABASE;"
+    
+  backup_database.sh: |
+        #!/bin/bash
+        set -e
+
+        dt=$(date '+%d/%m/%Y %H:%M:%S');
+        fileDt=$(date '+%Y%m%d%H%M%S');
+        backUpFileName="{nombreSitio}-$MYSQL_DATABASE-DB-$fileDt.gz"
+        backUpFilePath="/dump/$backUpFileName"
+
+        echo "$dt - Comienza copia BD {nombreSitio} en fichero: $backUpFilePath";
+        echo "$dt - Ejecutando mysqldump | gzip > $backUpFilePath"
+
+        mysqldump -uroot -p$MYSQL_ROOT_PASSWORD $MYSQL_DATABASE | gzip > $backUpFilePath
+
+        if [ $? -ne 0 ]; then
+          rm $backUpFilePath
+          echo "No se puede realizar copia. Compruebe los parámetros de conexión a la BD"
+          exit 1
+        fi
+
+        echo "$dt - Copia BD de {nombreSitio} completada en fichero: $backUpFilePath"; 
+          
+---
+apiVersion: apps/v1
+kind: Deployment
+metadata:
+  name: {nombreSitio}-bd
+  namespace: {nombreSitio}  
+spec:
+  replicas: 1
+  revisionHistoryLimit: 0
+  selector:
+    matchLabels:
+      tier: mysql
+  template:
+    metadata:
+      labels:
+        app: {nombreSitio}
+        tier: mysql {anotacionesPerfil}
+    spec:
+      imagePullSecrets:
+        - name: registry-nexusimgrepo
+      containers:
+        - name: mysql
+          image: {IMAGEN_BD}
+          imagePullPolicy: Always
+          securityContext:
+            allowPrivilegeEscalation: true
+          ports:
+            - containerPort: 3306 
+          env:
+            - name: MYSQL_USER
+              value: wordpress
+            - name: MYSQL_DATABASE
+              value: wordpress
+            - name: MYSQL_PASSWORD
+              valueFrom:
+                secretKeyRef:
+                  name: mysql-bd-secret-config
+                  key: password
+            - name: MYSQL_ROOT_PASSWORD
+              valueFrom:
+                secretKeyRef:
+                  name: mysql-bd-secret-config
+                  key: password                     
+          volumeMounts:             
+            - mountPath: /var/lib/mysql
+              name: mysql-persistent-storage             
+            - mountPath: /dump
+              name: volumen-mysql-dump
+            - mountPath: /opt/scripts 
+              name: mysql-opt-scripts-vol{montajePerfil}
+          readinessProbe:
+            exec:              
+              command: ["/bin/bash", "/opt/scripts/check_mysql.sh"]
+            initialDelaySeconds: {esperaInicial}
+            periodSeconds: {periodo}
+            failureThreshold: 3              {recursosPerfil}
+      volumes:
+        - name: mysql-persistent-storage
+          persistentVolumeClaim:
+            claimName: bd-data-pvc
+        - name: volumen-mysql-dump
+          persistentVolumeClaim:
+            claimName: bd-dump-pvc
+        - name: mysql-opt-scripts-vol
+          configMap:
+            name: mysql-opt-scripts{volumenPerfil}
+---
+apiVersion: v1
+kind: Service
+metadata:
+  name: {nombreSitio}-mysql-service
+  namespace: {nombreSitio}
+spec:
+  ports:
+  - port: 3306    
+  selector:
+    app: {nombreSitio}
+    tier: mysql
+  clusterIP: None 
+"""
+# Volcamos el texto en un fichero en la ubicación correspondiente (solo si ha cambiado)
+    try:
+        if guardaManifiesto(f"{DIRECTORIO_SITIOS}/{nombreSitio}/{nombreSitio}-bd-{version}.yaml", deployBdContent):
+            logger.debug(f"Fichero de despliegue de BD creado para {nombreSitio}")
+            return 200, "Fichero de despliegue de BD creado exitosamente"
+        else:
+            return 200, "Fichero de despliegue de BD sin cambios"
+    except Exception as e:
+        errores.append(f"Error al crear el fichero de despliegue de BD de la aplicación {nombreSitio}: {str(e)}")
+        logger.error(f"Ocurrió un error al Fichero de despliegue de BD de la aplicación: {str(e)}")
+        return 500, errores
+
+# Inicialización de un sitio WordPress en una única sesión exec: el paquete PHP se ejecuta con 'wp eval-file', de modo
+# que PHP y WordPress arrancan una sola vez para todos los pasos (WP_INSTALLING permite cargarlo antes de instalarlo)
+# Cada paso escribe una línea JSON {"paso", "inicio", "ms", "ok", "mensaje"}; los tiempos son en ms desde que arrancó PHP
+# Con el argumento 'semilla' (primer despliegue de un sitio sembrado) se reescriben además los datos propios del sitio
+COMANDO_INICIALIZA_WP = ["sudo", "-E", "-u", "www-data", "wp", '--exec=define("WP_INSTALLING", true);', "eval-file", "/opt/scripts/wordpress-inicializa.php"]
+SCRIPT_INICIALIZA_WP = r"""<?php
+// Paquete de inicialización del sitio (instalación, tema, ajustes UCA, rol y usuario gestor) en un solo arranque
+// (eval-file incluye este fichero dentro de un método: se usa una constante en lugar de variables globales)
+define('INICIO_PROCESO', $_SERVER['REQUEST_TIME_FLOAT']);
+
+function informa($paso, $inicio, $fin, $ok, $mensaje) {
+    echo json_encode(['paso' => $paso, 'inicio' => round(($inicio - INICIO_PROCESO) * 1000, 1), 'ms' => round(($fin - $inicio) * 1000, 1),
+                      'ok' => $ok, 'mensaje' => (string) $mensaje]), "\n";
+}
+
+function paso($paso, $funcion) {
+    $inicio = microtime(true);
+    try {
+        $mensaje = $funcion();
+        $ok = true;
+    } catch (Throwable $e) {
+        $mensaje = $e->getMessage();
+        $ok = false;
+    }
+    informa($paso, $inicio, microtime(true), $ok, $mensaje);
+    if (!$ok) {
+        exit(1);
+    }
+}
+
+function urlSitio() {
+    $url = getenv('WORDPRESS_SITE_URL');
+    return preg_match('|^https?://|', $url) ? $url : 'http://' . $url;
+}
+
+function ajustesSitio() {
+    $ajustes = json_decode(file_get_contents('/opt/scripts/theme_uca_settings_default.json'), true);
+    if ($ajustes === null) {
+        throw new Exception('theme_uca_settings_default.json no es un JSON válido');
+    }
+    return $ajustes;
+}
+
+// Arranque de PHP, WP-CLI y WordPress hasta llegar a este fichero
+informa('arranque', INICIO_PROCESO, microtime(true), true, '');
+
+paso('core install', function () {
+    if (is_blog_installed()) {
+        return 'ya instalado';
+    }
+    if (!function_exists('wp_new_blog_notification')) {
+        function wp_new_blog_notification() {}
+    }
+    require_once ABSPATH . 'wp-admin/includes/upgrade.php';
+    $url = urlSitio();
+    $resultado = wp_install(getenv('WORDPRESS_SITE_NAME'), getenv('WORDPRESS_ADMIN_USER'), getenv('WORDPRESS_ADMIN_MAIL'), true, '', wp_slash(getenv('WORDPRESS_ADMIN_PASSWORD')));
+    if (is_wp_error($resultado)) {
+        throw new Exception($resultado->get_error_message());
+    }
+    update_option('siteurl', $url);
+    update_option('home', $url);
+    return 'instalado';
+});
+
+// Sitio creado a partir de una semilla (argumento 'semilla'): WordPress ya está instalado con los datos del sitio
+// plantilla y se sustituyen por los del sitio (URL, títulos, ajustes UCA, correos y contraseñas de admin y gestor)
+if (in_array('semilla', $args, true)) {
+    paso('reescribe sitio', function () {
+        add_filter('send_password_change_email', '__return_false');
+        add_filter('send_email_change_email', '__return_false');
+        $url = urlSitio();
+        update_option('siteurl', $url);
+        update_option('home', $url);
+        update_option('blogname', getenv('WORDPRESS_SITE_NAME'));
+        update_option('admin_email', getenv('WORDPRESS_ADMIN_MAIL'));
+        update_option('theme_uca_settings', ajustesSitio());
+        foreach ([['WORDPRESS_ADMIN_USER', 'WORDPRESS_ADMIN_MAIL', 'WORDPRESS_ADMIN_PASSWORD'], ['WORDPRESS_USER', 'WORDPRESS_USER_MAIL', 'WORDPRESS_PASSWORD']] as [$login, $correo, $clave]) {
+            $usuario = get_user_by('login', getenv($login));
+            if ($usuario) {
+                $id = wp_update_user(['ID' => $usuario->ID, 'user_email' => getenv($correo), 'user_pass' => getenv($clave)]);
+                if (is_wp_error($id)) {
+                    throw new Exception($id->get_error_message());
+                }
+            }
+        }
+        return $url;
+    });
+}
+
+paso('theme activate', function () {
+    $tema = wp_get_theme('theme_main_uca');
+    if (!$tema->exists()) {
+        throw new Exception('no existe el tema theme_main_uca');
+    }
+    switch_theme($tema->get_stylesheet());
+    return $tema->get_stylesheet();
+});
+
+paso('option add theme_uca_settings', function () {
+    if (get_option('theme_uca_settings') !== false) {
+        return 'ya existe';
+    }
+    add_option('theme_uca_settings', ajustesSitio());
+    return 'creada';
+});
+
+paso('role create gestor', function () {
+    if (get_role('gestor')) {
+        return 'ya existe';
+    }
+    add_role('gestor', 'Gestor', get_role('editor')->capabilities);
+    return 'creado como copia de editor';
+});
+
+foreach ([['create_users', 'list_users', 'edit_users', 'delete_users', 'promote_users'], ['activate_plugins'], ['manage_options'],
+          ['edit_theme_options'], ['wpml_manage_wp_menus_sync']] as $permisos) {
+    paso('cap add ' . implode(' ', $permisos), function () use ($permisos) {
+        $rol = get_role('gestor');
+        foreach ($permisos as $permiso) {
+            $rol->add_cap($permiso);
+        }
+        return '';
+    });
+}
+
+paso('user create', function () {
+    $usuario = getenv('WORDPRESS_USER');
+    if (username_exists($usuario)) {
+        return 'ya existe';
+    }
+    $id = wp_insert_user(['user_login' => $usuario, 'user_email' => getenv('WORDPRESS_USER_MAIL'), 'user_pass' => getenv('WORDPRESS_PASSWORD'), 'role' => 'gestor']);
+    if (is_wp_error($id)) {
+        throw new Exception($id->get_error_message());
+    }
+    return "usuario $id";
+});
+"""
+
+def crearDeploymentWP(nombreSitio, version, passWP, passAdminWP, mailUserWP, tituloSitio1, tituloSitio2, tipoEntidad, nombreHost=None):
+    # Función que genera el fichero YAML de despliegue para la base de datos MySQL
+    # 'nombreHost' solo difiere del sitio en los que ocupan el namespace de una reserva
+    # El contenedor de inicio 'espera-bd' (con la misma imagen, que así se descarga mientras arranca MySQL) espera a que
+    # el servicio de la BD acepte conexiones: al ser headless, solo resuelve cuando el pod de la BD está listo
+  nombreHost = nombreHost or f"{nombreSitio}.uca.es"
+
+  deployWpContent = f'''apiVersion: v1  
+kind: Service
+metadata:
+  name: {nombreSitio}-wp-service
+  namespace: {nombreSitio}
+spec:
+  ports:
+    - port: 80
+  selector:
+    app: {nombreSitio}
+    tier: frontend
+  type: ClusterIP
+---
+apiVersion: v1
+kind: Secret
+metadata:
+   name: wordpress-admin-secret-config
+   namespace: {nombreSitio}
+type: Opaque
+data:
+   password: {passWP}
+---
+apiVersion: v1
+kind: Secret
+metadata:
+   name: wordpress-user-secret-config
+   namespace: {nombreSitio}
+type: Opaque
+data:
+   password: {passAdminWP}
+---
+apiVersion: v1
+kind: PersistentVolume
+metadata:
+  name: {nombreSitio}-wp-data-pv
+  namespace: {nombreSitio}
+spec:
+  capacity:
+    storage: 20Gi
+  volumeMode: Filesystem
+  accessModes:
+  - ReadWriteOnce
+  persistentVolumeReclaimPolicy: Delete
+  storageClassName: local-storage
+  local:
+    path: /volumenes/{nombreSitio}/wp/uploads
+  nodeAffinity:
+    required:
+      nodeSelectorTerms:
+      - matchExpressions:
+        - key: kubernetes.io/hostname
+          operator: In
+          values:
+{listaNodosCluster}
+---
+apiVersion: v1
+kind: PersistentVolume
+metadata:
+  name: {nombreSitio}-wp-dump-pv
+  namespace: {nombreSitio}
+spec:
+  capacity:
+    storage: 5Gi
+  volumeMode: Filesystem
+  accessModes:
+  - ReadWriteOnce
+  persistentVolumeReclaimPolicy: Delete
+  storageClassName: local-storage
+  local:
+    path: /volumenes/{nombreSitio}/wp/dump
+  nodeAffinity:
+    required:
+      nodeSelectorTerms:
+      - matchExpressions:
+        - key: kubernetes.io/hostname
+          operator: In
+          values:
+{listaNodosCluster}
+---
+apiVersion: v1
+kind: PersistentVolumeClaim
+metadata:
+  name: wp-data-pvc
+  namespace: {nombreSitio}
+  labels:
+    app: {nombreSitio}
+spec:
+  accessModes:
+    - ReadWriteOnce
+  storageClassName: local-storage
+  resources:
+    requests:
+      storage: 20Gi
+  volumeName: {nombreSitio}-wp-data-pv
+---
+apiVersion: v1
+kind: PersistentVolumeClaim
+metadata:
+  name: wp-dump-pvc
+  namespace: {nombreSitio}
+  labels:
+    app: {nombreSitio}
+spec:
+  accessModes:
+    - ReadWriteOnce
+  storageClassName: local-storage
+  resources:
+    requests:
+      storage: 5Gi
+  volumeName: {nombreSitio}-wp-dump-pv
+---
+apiVersion: v1
+kind: ConfigMap
+metadata:
+  name: wordpress-opt-scripts
+  namespace: {nombreSitio}
+data:
+  wordpress-inicializa.php: |
+{textwrap.indent(SCRIPT_INICIALIZA_WP, "        ")}
+  theme_uca_settings_default.json: |
+      {{"theme_uca_fTituloLinea1":"{tituloSitio1}",
+      "theme_uca_fTituloLinea2":"{tituloSitio2}",
+      "theme_uca_fDescripcion":"",
+      "theme_uca_fPresentacion":"uca_general",
+      "theme_uca_fTipoEntidad":"{tipoEntidad}",
+      "theme_uca_fCategoriaEnt":"uca_cat_default",
+      "theme_uca_fPropiedadAnalytics":"UA-80714150-10",
+      "theme_uca_fBuscadorAvanzado":"1",
+      "theme_uca_fSavedData":"YES",
+      "theme_uca_fCodPersonal":"",
+      "theme_uca_fCodPersonal_aux":"",
+      "theme_uca_fPersonalDefaultSort":"name::Nombre",
+      "theme_uca_fMenuResponsables":"1",
+      "theme_uca_fMenuPersonal":"1",
+      "theme_uca_fMail":"",
+      "theme_uca_fTlfno":"555 444 333",
+      "theme_uca_fFax":"555 444 333",
+      "theme_uca_fPostal":"Avda. Universidad de C\u00e1diz, n\u00ba 10, 11519 Campus Universitario de Puerto Real",
+      "theme_uca_fContactForm":"",
+      "theme_uca_fMapaLatitud":"36.52988",
+      "theme_uca_fMapaLongitud":"-6.21177",
+      "theme_uca_fFacebook":"https:\/\/www.facebook.com\/universidaddecadiz",
+      "theme_uca_fTwitter":"https:\/\/twitter.com\/univcadiz",
+      "theme_uca_fRss":"https:\/\/www.uca.es\/es\/rss",
+      "theme_uca_fYoutube":"https:\/\/www.youtube.com\/videosUCA",
+      "theme_uca_fInstagram":"https:\/\/www.instagram.com\/univcadiz\/",
+      "theme_uca_fFlickr":"https:\/\/www.flickr.com\/photos\/147802205@N03\/albums",
+      "theme_uca_fVk":""
+      }}
+
+  backup_uploads.sh: |
+        #!/bin/bash
+        set -e
+
+        dt=$(date '+%d/%m/%Y %H:%M:%S');
+        fileDt=$(date '+%Y%m%d%H%M%S');
+        backUpFileName="{nombreSitio}-UPLOADS-WP-$fileDt.tgz"
+        backUpFilePath="/dump/$backUpFileName"
+
+        echo "$dt - Comienza copia Uploads {nombreSitio} en fichero: $backUpFilePath";
+        echo "$dt - Ejecutando tar > $backUpFilePath"
+
+        cd /var/www/html/wp-content/uploads/
+
+        tar cvzf $backUpFilePath .
+
+        if [ $? -ne 0 ]; then
+          rm $backUpFilePath
+          echo "No se puede realizar copia."
+          exit 1
+        fi
+
+        echo "$dt - Copia Uploads de {nombreSitio} completada en fichero: $backUpFilePath"; 
+          
+---
+apiVersion: apps/v1
+kind: Deployment
+metadata:
+  name: {nombreSitio}-wordpress
+  namespace: {nombreSitio} 
+spec:
+  selector:
+    matchLabels:      
+      tier: frontend
+  strategy:
+    type: Recreate
+  template:
+    metadata:
+      labels:
+        app: {nombreSitio}        
+        tier: frontend
+    spec:
+      imagePullSecrets:
+        - name: registry-nexusimgrepo
+      initContainers:
+      - name: espera-bd
+        image: {IMAGEN_WP}
+        imagePullPolicy: Always
+        command: ["bash", "-c", "until (exec 3<>/dev/tcp/{nombreSitio}-mysql-service/3306) 2>/dev/null; do echo 'Esperando a {nombreSitio}-mysql-service'; sleep 2; done"]
+      containers:
+      - image: {IMAGEN_WP} #wordpress:6.5-apache
+        imagePullPolicy: Always
+        securityContext:
+          allowPrivilegeEscalation: true
+        name: wordpress
+        env:
+          - name: WORDPRESS_SITE_URL
+            value: {nombreHost}
+            #value: kubwebpool001.uca.es
+          - name: WORDPRESS_SITE_NAME
+            value: Prueba
+          - name: WORDPRESS_ADMIN_USER
+            value: aducawp
+          - name: WORDPRESS_ADMIN_PASSWORD
+            valueFrom:
+              secretKeyRef:
+                name: wordpress-admin-secret-config
+                key: password
+          - name: WORDPRESS_ADMIN_MAIL
+            value: web.ai@uca.es
+          - name: WORDPRESS_USER
+            value: gestor
+          - name: WORDPRESS_PASSWORD
+            valueFrom:
+              secretKeyRef:
+                name: wordpress-user-secret-config
+                key: password
+          - name: WORDPRESS_USER_MAIL
+            value: {mailUserWP}
+          - name: WORDPRESS_DB_HOST
+            value: {nombreSitio}-mysql-service
+          - name: WORDPRESS_DB_PASSWORD
+            valueFrom:
+              secretKeyRef:
+                name: mysql-bd-secret-config
+                key: password
+          - name: WORDPRESS_DB_USER
+            value: wordpress
+        ports:
+          - containerPort: 80
+            name: wordpress
+        volumeMounts:
+          - name: wordpress-persistent-storage
+            mountPath: /var/www/html/wp-content/uploads
+          - name: wordpress-opt-scripts-vol
+            mountPath: /opt/scripts 
+          - name: volumen-wordpress-dump
+            mountPath: /dump
+                     
+      volumes:
+        - name: wordpress-persistent-storage
+          persistentVolumeClaim:
+            claimName: wp-data-pvc
+        - name: wordpress-opt-scripts-vol
+          configMap:
+            name: wordpress-opt-scripts
+        - name: volumen-wordpress-dump
+          persistentVolumeClaim:
+            claimName: wp-dump-pvc
+  '''
+
+  # Volcamos el texto en un fichero en la ubicación correspondiente (solo si ha cambiado)
+  try:
+    if guardaManifiesto(f"{DIRECTORIO_SITIOS}/{nombreSitio}/{nombreSitio}-wp-{version}.yaml", deployWpContent):
+            logger.debug(f"Fichero de despliegue de WordPress creado para {nombreSitio}")
+            return 200, "Fichero de despliegue de WordPress creado exitosamente"
+    else:
+            return 200, "Fichero de despliegue de WordPress sin cambios"
+  except Exception as e:
+        errores.append(f"Error al crear el fichero de despliegue de WordPress de la aplicación {nombreSitio}: {str(e)}")
+        logger.error(f"Ocurrió un error al Fichero de despliegue de WordPress de la aplicación: {str(e)}")
+        return 500, errores
+
+def crearDeploymentIngress(nombreSitio, nombreHost=None):
+  # Función que genera el fichero YAML de despliegue del ingress
+    
+  # Creamos el alias que daremos de alta en el DNS (el del sitio que ocupa el namespace, si es una reserva)
+  nombreHost = nombreHost or f"{nombreSitio}.uca.es"  
+  
+  # Contenido del fichero de despliegue YAML del ingress
+  deployIngressContent = f"""
+  apiVersion: networking.k8s.io/v1
+  kind: Ingress
+  metadata:
+    name: {nombreSitio}-ingress
+    namespace: {nombreSitio}
+  spec:   
+    rules:
+      - host: {nombreHost}
+        http:
+          paths:
+          - path: /
+            pathType: Prefix
+            backend:
+              service:
+                name: {nombreSitio}-wp-service 
+                port:
+                  number: 80
+  """
+  # Volcamos el texto en un fichero en la ubicación correspondiente (solo si ha cambiado)
+  try:
+      if guardaManifiesto(f"{DIRECTORIO_SITIOS}/{nombreSitio}/{nombreSitio}-ingress.yaml", deployIngressContent):
+          logger.debug(f"Fichero de despliegue de Ingress creado para {nombreSitio}")
+          return 200, "Fichero de despliegue de Ingress creado exitosamente"
+      else:
+          return 200, "Fichero de despliegue de Ingress sin cambios"
+  except Exception as e:
+      errores.append(f"Error al crear el fichero de despliegue de Ingress de la aplicación {nombreSitio}: {str(e)}")
+      logger.error(f"Ocurrió un error al Fichero de despliegue de Ingress de la aplicación: {str(e)}")
+      return 500, errores 
+
+def applyModifica(aplicado, fechaRespuesta):
+    # Función que indica si un server-side apply ha modificado el objeto que devuelve
+    # El servidor actualiza la hora de la entrada de managedFields de FIELD_MANAGER cuando el apply cambia algún
+    # campo y la deja igual si no cambia nada; se compara con la cabecera Date de la respuesta (ambas son del
+    # reloj del servidor, con resolución de segundos). Si falta alguno de los dos datos se supone que lo ha modificado
+    entradas = [entrada for entrada in (aplicado.get("metadata", {}).get("managedFields") or [])
+                if entrada.get("manager") == FIELD_MANAGER and entrada.get("operation") == "Apply" and entrada.get("time")]
+    if not entradas or not fechaRespuesta:
+        return True
+    try:
+        horaEntrada = datetime.datetime.strptime(entradas[0]["time"], "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=datetime.timezone.utc)
+        horaRespuesta = email.utils.parsedate_to_datetime(fechaRespuesta)
+    except (TypeError, ValueError):
+        return True
+    return (horaRespuesta - horaEntrada).total_seconds() <= 1
+
+def aplicaManifiesto(nombreSitio, ficheroYAML, anotaciones=None):
+    # Función que aplica en el clúster (server-side apply) todos los objetos de un fichero YAML
+    # añadiendo a cada uno las anotaciones dadas
+    # Devuelve una lista con el resultado de cada objeto: {"tipo", "nombre", "resultado", "mensaje"}
+    # donde 'resultado' es "created", "configured", "unchanged" o "error"
+
+    # Leemos y procesamos el fichero YAML una sola vez
+    with open(ficheroYAML, 'r') as file:
+        objetos = [objeto for objeto in yaml.safe_load_all(file) if objeto]
+
+    dinamico = getClienteDinamico()
+    resultados = []
+
+    for objeto in objetos:
+        tipo = objeto.get("kind")
+        nombre = objeto.get("metadata", {}).get("name")
+        if anotaciones:
+            objeto["metadata"].setdefault("annotations", {}).update(anotaciones)
+        try:
+            recurso = dinamico.resources.get(api_version=objeto["apiVersion"], kind=tipo)
+
+            # Los objetos sin namespace (Namespace, PersistentVolume) no admiten metadata.namespace
+            if recurso.namespaced:
+                namespace = objeto["metadata"].setdefault("namespace", nombreSitio)
+            else:
+                objeto["metadata"].pop("namespace", None)
+                namespace = None
+
+            # La respuesta sin deserializar conserva el código HTTP: 201 si el apply ha creado el objeto
+            respuesta = dinamico.server_side_apply(recurso, body=objeto, name=nombre, namespace=namespace, field_manager=FIELD_MANAGER, force_conflicts=True, serialize=False)
+            aplicado = json.loads(respuesta.data)
+
+            if respuesta.status == 201:
+                resultado = "created"
+            elif applyModifica(aplicado, respuesta.headers.get("Date")):
+                resultado = "configured"
+            else:
+                resultado = "unchanged"
+            resultados.append({"tipo": tipo, "nombre": nombre, "resultado": resultado, "mensaje": ""})
+
+        except Exception as e:
+            mensaje = getattr(e, "summary", lambda: str(e))()
+            resultados.append({"tipo": tipo, "nombre": nombre, "resultado": "error", "mensaje": mensaje})
+
+    return resultados
+
+def despliegaYAML(nombreSitio, ficheroYAML, anotaciones=None):
+    # Función que despliega en el cluster un fichero YAML dado en un determinado namespace
+
+    errorDespliega = False
+    changedAlgo = False
+
+    logger.debug(f"Aplicando {ficheroYAML} en {nombreSitio}\n")
+
+    try:
+        resultados = aplicaManifiesto(nombreSitio, ficheroYAML, anotaciones)
+    except Exception as e:
+        logger.error(f"Ocurrió una excepción aplicando {ficheroYAML}: {e}")
+        errores.append(f"Ocurrió una excepción aplicando {ficheroYAML}: {str(e)}")
+        return 500, errores
+
+    # Procesamos el resultado de cada objeto
+    for resultado in resultados:
+        logger.debug(f"apply - {resultado['tipo']}/{resultado['nombre']} {resultado['resultado']}\n")
+        if resultado["resultado"] in ("created", "configured"):
+            changedAlgo = True
+        elif resultado["resultado"] == "error":
+            errores.append(f"Error al aplicar {resultado['tipo']}/{resultado['nombre']}: {resultado['mensaje']}")
+            errorDespliega = True
+
+    # Manejo de resultados
+    if errorDespliega:
+        logger.error(f"Errores al aplicar {ficheroYAML}: {errores}")
+        return 500, errores
+    else:
+        if changedAlgo:
+            logger.info(f"Algunos recursos fueron creados o configurados - {ficheroYAML}")
+            return 200, f"Algunos recursos fueron creados o configurados - {ficheroYAML}"
+        else:
+            logger.info(f"No se realizaron cambios en el despliegue - {ficheroYAML}")
+            return 200, f"No se realizaron cambios en el despliegue - {ficheroYAML}"
+
+def anotacionesSitio(ficheroYAML, hashSitio):
+    # Función que devuelve las anotaciones de hash con las que se marcan los objetos de un manifiesto del sitio
+    return {ANOTACION_HASH_MANIFIESTO: leeHash(ficheroYAML) or "", ANOTACION_HASH_SITIO: hashSitio}
+
+@trazada("despliega", "fichero", operacion="despliegue")
+def despliegaSitio(ficheroConfig, usaSemilla=True, usaReserva=True, forzar=False):
+    # Función que a partir de un fichero JSON de configuración establece los parámetros del sitio a desplegar
+    # Cada fase se mide como un tramo (ver --traza). Un sitio nuevo ocupa una reserva en espera si la hay y, si no,
+    # parte de la semilla de las imágenes actuales si existe (salvo con usaReserva=False / usaSemilla=False)
+    # Con forzar=True se aplican los manifiestos aunque el sitio parezca desplegado sin cambios
+
+    # Leemos fichero
+    siteConfig = leeJSON(ficheroConfig) 
+
+    # Establecemos parámetros
+    nombreSitio = siteConfig['nombreSitio']
+    version = siteConfig['version']
+    passwordBaseDatos = siteConfig['passwordBD']
+    passwordWP = siteConfig['passwordWP']
+    passwordAdminWP = siteConfig['passwordAdminWP']
+    mailUserWP = siteConfig['mailUserWP']
+    tituloSitio1 = siteConfig['tituloSitio1']
+    tituloSitio2 = siteConfig['tituloSitio2']
+    tipoEntidad = siteConfig['tipoEntidad']
+    try:
+        perfil = perfilBD(siteConfig.get('perfilBD', PERFIL_BD_DEFECTO))
+    except ValueError as e:
+        errores.append(str(e))
+        return 500, errores
+ 
+    logger.info(f"Comando: despliega {nombreSitio} {version}")
+    logger.debug(f"Comando: despliega {nombreSitio} {version}")
+
+    # Un sitio nuevo reclama la reserva libre más antigua y se despliega en su namespace: su BD ya está en marcha y solo
+    # cambian su contraseña (la de la reserva pasa a ser la del sitio), el host, el pod de WordPress y los datos del sitio
+    # El nombre del sitio solo queda apuntado en el catálogo (ver reservasSitios)
+    inicio = time.monotonic()
+    nombreHost = f"{nombreSitio}.uca.es"
+    try:
+        reserva = reservasSitios([nombreSitio]).get(nombreSitio)
+        if reserva is None and usaReserva and not os.path.exists(f"{DIRECTORIO_SITIOS}/{nombreSitio}"):
+            with tramo("reclama-reserva"):
+                namespace = reclamaReserva(nombreSitio)
+            if namespace is not None:
+                lanzaReposicion()
+                reserva = reservasSitios([nombreSitio]).get(nombreSitio)
+    except sqlite3.Error as e:
+        errores.append(f"No se han podido consultar las reservas del catálogo: {str(e)}")
+        return 500, errores
+    if reserva is not None:
+        print(f"El sitio {nombreSitio} ocupa la reserva {reserva['namespace']}")
+        nombreSitio = reserva["namespace"]
+    reclamada = reserva is not None and reserva["estado"] == "reclamada"
+
+    # Codificamos contraseñas 
+    passwordBasedatosBase64 = base64.b64encode(passwordBaseDatos.encode()).decode()
+    passwordWPBase64 = base64.b64encode(passwordWP.encode()).decode()
+    passwordAdminWPBase64 = base64.b64encode(passwordAdminWP.encode()).decode()
+    
+    yaExiste = False
+    creadoVolumenBd = False
+    hayErrores = False
+    
+    # Creamos directorio en el servidor para dejar todos los ficheros de despliegue del sitio
+    if not os.path.exists(f"{DIRECTORIO_SITIOS}/{nombreSitio}"):
+        try:
+            os.makedirs(f"{DIRECTORIO_SITIOS}/{nombreSitio}", mode=0o700)
+        except OSError:
+            errores.append(f"No se ha podido crear el directorio {DIRECTORIO_SITIOS}/{nombreSitio}")
+            return 500, errores
+    
+    # Los sitios sembrados (ahora o en un despliegue anterior) arrancan la BD sobre un directorio de datos ya inicializado
+    semilla = rutaSemilla() if usaSemilla and sitioNuevo(nombreSitio) else None
+    sembrado = semilla is not None or leeMarcaSemilla(nombreSitio) is not None
+
+    with tramo("renderiza-manifiestos"):
+        # Creamos fichero de despliegue de la base de datos
+        codigoResultado, resultado = crearDeploymentBD(nombreSitio, version, passwordBasedatosBase64, sembrado, perfil)
+        if codigoResultado == 200:
+            print(resultado)
+        else:
+            hayErrores = True
+            print("Error:", resultado)
+
+        # Creamos fichero de despliegue para el ingress
+        codigoResultado, resultado = crearDeploymentIngress(nombreSitio, nombreHost)
+        if codigoResultado == 200:
+            print(resultado)
+        else:
+            hayErrores = True
+            print("Error:", resultado)
+
+        # Creamos fichero de despliegue para Wordpress
+        codigoResultado, resultado = crearDeploymentWP(nombreSitio, version, passwordWPBase64, passwordAdminWPBase64, mailUserWP, tituloSitio1, tituloSitio2, tipoEntidad, nombreHost)
+        if codigoResultado == 200:
+            print(resultado)
+        else:
+            hayErrores = True
+            print("Error:", resultado)
+
+    # Hash del sitio: combinación de los hashes de sus tres manifiestos
+    ficherosSitio = [
+        f"{DIRECTORIO_SITIOS}/{nombreSitio}/{nombreSitio}-bd-{version}.yaml",
+        f"{DIRECTORIO_SITIOS}/{nombreSitio}/{nombreSitio}-wp-{version}.yaml",
+        f"{DIRECTORIO_SITIOS}/{nombreSitio}/{nombreSitio}-ingress.yaml"
+    ]
+    rutaHashSitio = f"{DIRECTORIO_SITIOS}/{nombreSitio}/{nombreSitio}"
+    hashSitio = calculaHash(*[leeHash(fichero) or "" for fichero in ficherosSitio])
+
+    # Si el último despliegue correcto se hizo con los mismos manifiestos y todos los objetos del clúster
+    # siguen existiendo marcados con ese hash (y los deployments listos), no hay nada que aplicar ni esperar
+    with tramo("comprueba-cambios"):
+        sinCambios = not forzar and not hayErrores and leeHash(rutaHashSitio) == hashSitio and compruebaHashSitio(nombreSitio, hashSitio, ficherosSitio)
+    if sinCambios:
+        print(f"El sitio {nombreSitio} ya está desplegado sin cambios")
+        return 200, "Despliegue sin cambios"
+
+    # Creamos namespace
+    with tramo("namespace"):
+        codigoResultado, resultado = crearNamespace(nombreSitio)
+    if codigoResultado == 200:
+        print(resultado)
+    else:
+        print("Error:", resultado)
+
+    # Creamos directorios para los volúmentes persistentes
+    with tramo("directorios-volumenes"):
+        codigoResultado, resultado = crearDirectoriosVolumenes(nombreSitio)
+    if codigoResultado == 200:
+        print(resultado)
+    else:
+        hayErrores = True
+        print("Error:", resultado)
+
+    # Copiamos la semilla en los volúmenes del sitio nuevo (sin ella MySQL no debe arrancar sobre una copia a medias)
+    if semilla is not None and codigoResultado == 200:
+        with tramo("copia-semilla", semilla=os.path.basename(semilla)):
+            codigoResultado, resultado = siembraSitio(nombreSitio, semilla)
+        if codigoResultado == 200:
+            print(resultado)
+        else:
+            print("Error:", resultado)
+            return 500, resultado
+
+    # Creamos credenciales para repositorio de imágenes
+    with tramo("secretos"):
+        codigoResultado, resultado = crearSecretoRepositorio(nombreSitio)
+    if codigoResultado == 200:
+        print(resultado)
+    else:
+        print("Error:", resultado)
+
+    # Al ocupar una reserva se cambia la contraseña de su BD en marcha antes de aplicar el secreto con la del sitio
+    podReserva = None
+    if reclamada:
+        with tramo("contrasena-bd"):
+            codigoResultado, resultado, podReserva = cambiaContrasenaReserva(nombreSitio, passwordBaseDatos)
+        if codigoResultado != 200:
+            print("Error:", resultado)
+            return 500, resultado
+        print(resultado)
+
+    # Desplegamos base de datos, Wordpress e Ingress de una vez: el contenedor de inicio del pod de WordPress espera
+    # a que el servicio de la BD responda, así que la descarga de la imagen y el arranque de WordPress se solapan
+    # con el arranque de MySQL
+    with tramo("aplica"):
+        for ficheroYAML in ficherosSitio:
+            codigoResultado, resultado = despliegaYAML(nombreSitio, ficheroYAML, anotacionesSitio(ficheroYAML, hashSitio))
+            if codigoResultado == 200:
+                print(resultado)
+            else:
+                hayErrores = True
+                print("Error:", resultado)
+
+    # El pod de BD de la reserva se sustituye por uno con la contraseña nueva en su entorno (la usan la prueba de
+    # disponibilidad y los backups); arranca en pocos segundos sobre el directorio de datos ya inicializado
+    if podReserva is not None:
+        try:
+            getCoreV1Api().delete_namespaced_pod(podReserva, nombreSitio)
+        except client.exceptions.ApiException as e:
+            if e.status != 404:
+                hayErrores = True
+                print(f"Error: no se ha podido reiniciar el pod {podReserva}: {e.reason}")
+
+    # Un sitio recién sembrado arranca con la contraseña de BD de la plantilla: hasta cambiarla la BD no está lista
+    with tramo("contrasena-bd"):
+        codigoResultado, resultado = cambiaContrasenaSemilla(nombreSitio, passwordBaseDatos)
+    if codigoResultado != 200:
+        print("Error:", resultado)
+        return 500, resultado
+    if resultado is not None:
+        print(resultado)
+
+    # Esperamos solo a que el pod de Wordpress esté listo (lo que implica que la BD ya responde) para inicializar
+    # el sitio; al ocupar una reserva, al pod que arranca con el host del sitio (el de la reserva se sustituye)
+    print("Esperando a WP...")
+    with tramo("espera-wp") as datos:
+        podWP = datos["pod"] = esperaPodListo(nombreSitio, "tier=frontend", TIMEOUT_LISTO_BD + TIMEOUT_LISTO_WP, lambda pod: variablePod(pod, "WORDPRESS_SITE_URL") == nombreHost)
+    if podWP is None:
+        bdLista = any(pod.metadata.deletion_timestamp is None and isPodReady(pod.status.conditions) for pod in listaPodsSitio(nombreSitio, "tier=mysql"))
+        mensaje = "El pod WordPress no está listo tras la espera" + ("" if bdLista else " (el pod Base de Datos tampoco está listo)")
+        print(mensaje)
+        return 500, mensaje
+
+    # En el primer despliegue de un sitio sembrado o que ocupa una reserva se reescriben los datos del sitio plantilla
+    # (o de la reserva) por los suyos
+    print(f"El pod {podWP} está listo. Inicializando sitio Wordpress...")
+    marcaSemilla = leeMarcaSemilla(nombreSitio)
+    reescribe = reclamada or (marcaSemilla is not None and not marcaSemilla.get("reescrito"))
+    codigoResultado, resultado = inicializaSitioWP(nombreSitio, reescribe, podWP)
+    if codigoResultado == 200:
+        print(resultado)
+        if marcaSemilla is not None and not marcaSemilla.get("reescrito"):
+            guardaMarcaSemilla(nombreSitio, dict(marcaSemilla, reescrito=True))
+        if reclamada:
+            actualizaReserva(nombreSitio, "asignada")
+            # La configuración de la reserva (con su contraseña de BD, ya sustituida) deja de hacer falta
+            try:
+                os.remove(f"{DIRECTORIO_SITIOS}/{nombreSitio}/reserva.json")
+            except OSError:
+                pass
+    else:
+        hayErrores = True
+        print("Error:", resultado)
+
+    # La duración de la ocupación de una reserva se registra aparte para las métricas de la reserva
+    if reclamada:
+        registraOperacion("reclamo", "despliega", reserva["sitio"], time.monotonic() - inicio, 500 if hayErrores else 200)
+
+    # Devolvemos el resultado del despliegue
+    if hayErrores:
+        return 500, "Despliegue con errores"
+    else:
+        # Registramos el hash del sitio desplegado correctamente para poder omitir redespliegues sin cambios
+        guardaHash(rutaHashSitio, hashSitio)
+        return 200, "Despliegue exitoso"
+
+def leeListaSitios(origen):
+    # Función que devuelve la lista de ficheros JSON de configuración de un lote de sitios
+    # 'origen' puede ser un directorio (se toman todos sus *.json) o un fichero con una ruta por línea
+    if os.path.isdir(origen):
+        return sorted(glob.glob(os.path.join(origen, "*.json")))
+
+    ficheros = []
+    with open(origen, 'r') as file:
+        for linea in file:
+            linea = linea.strip()
+            if linea and not linea.startswith("#"):
+                # Las rutas relativas se interpretan respecto al directorio del fichero lista
+                ficheros.append(os.path.join(os.path.dirname(os.path.abspath(origen)), linea))
+    return ficheros
+
+def despliegaLote(origen, paralelo=PARALELO_LOTE):
+    # Función que despliega a la vez varios sitios, como máximo 'paralelo' simultáneamente
+    # Cada sitio muestra sus mensajes en líneas propias con el prefijo [nombreSitio] y al final
+    # se muestra una tabla resumen con el resultado y la duración de cada despliegue
+    try:
+        ficheros = leeListaSitios(origen)
+    except OSError as e:
+        errores.append(f"No se ha podido leer la lista de sitios {origen}: {str(e)}")
+        return 500, errores
+
+    if not ficheros:
+        return 500, f"No se han encontrado ficheros de configuración en {origen}"
+
+    # Cada despliegue mantiene abiertos a la vez un watch y las peticiones normales
+    ampliaPoolApi(2 * paralelo)
+
+    bloqueoSalida = threading.Lock()
+
+    def despliegaUno(ficheroConfig):
+        # Despliega un sitio del lote, devolviendo (nombre, código, resultado, duración)
+        try:
+            nombreSitio = leeJSON(ficheroConfig)['nombreSitio']
+        except Exception as e:
+            return os.path.basename(ficheroConfig), 500, f"Configuración no válida: {str(e)}", 0.0
+
+        destino = LineasConPrefijo(salidaOriginal, f"[{nombreSitio}] ", bloqueoSalida)
+        salida.asignaDestino(destino)
+        inicio = time.monotonic()
+        try:
+            codigoResultado, resultado = despliegaSitio(ficheroConfig)
+        except Exception as e:
+            logger.error(f"Error desplegando {nombreSitio}: {str(e)}")
+            codigoResultado, resultado = 500, f"Excepción: {str(e)}"
+        duracion = time.monotonic() - inicio
+        print(resultado)
+        destino.flush()
+        salida.asignaDestino(None)
+        return nombreSitio, codigoResultado, resultado, duracion
+
+    logger.info(f"Comando: despliega-lote {origen} ({len(ficheros)} sitios, paralelo {paralelo})")
+
+    with salidaPorHilos() as salida:
+        salidaOriginal = salida.destino()
+        with ThreadPoolExecutor(max_workers=paralelo) as pool:
+            resultados = list(pool.map(conTraza(despliegaUno), ficheros))
+
+    # Tabla resumen del lote
+    fallidos = 0
+    print(f"\n{'SITIO':<30} {'RESULTADO':<10} {'DURACIÓN':>10}")
+    for nombreSitio, codigoResultado, resultado, duracion in resultados:
+        estado = "OK" if codigoResultado == 200 else "ERROR"
+        if codigoResultado != 200:
+            fallidos += 1
+        print(f"{nombreSitio:<30} {estado:<10} {duracion:>9.1f}s")
+
+    if fallidos:
+        return 500, f"Despliegue por lotes con errores: {fallidos} de {len(resultados)} sitios fallidos"
+    else:
+        return 200, f"Despliegue por lotes exitoso: {len(resultados)} sitios"
+
+def esperaNamespaceEliminado(nombreSitio, timeout):
+    # Función que espera, mediante la API watch, a que el namespace de un sitio termine de eliminarse
+    # Devuelve True si el namespace ya no existe y False si se agota el tiempo de espera
+    v1 = getCoreV1Api()
+    selector = f"metadata.name={nombreSitio}"
+    limite = time.monotonic() + timeout
+    w = watch.Watch()
+
+    while True:
+        # Listamos para saber si aún existe y desde qué versión observar los cambios
+        namespaces = v1.list_namespace(field_selector=selector)
+        if not namespaces.items:
+            return True
+
+        restante = int(limite - time.monotonic())
+        if restante <= 0:
+            return False
+
+        try:
+            for evento in w.stream(v1.list_namespace, field_selector=selector, resource_version=namespaces.metadata.resource_version, timeout_seconds=restante):
+                if evento['type'] == "DELETED":
+                    w.stop()
+                    return True
+        except client.exceptions.ApiException as e:
+            if e.status != 410:
+                raise
+
+@trazada("elimina", operacion="eliminacion")
+def eliminaDespliegueSitio(nombreSitio):
+    # Función para eliminar todos los objetos asociados un despliegue
+    # Los volúmenes y el namespace (que arrastra deployments, servicios, pods y PVCs) se eliminan
+    # a la vez y después se espera a que el namespace termine de eliminarse
+
+    v1 = getCoreV1Api()
+
+    # Borrados a realizar: (descripción, función de la API, argumentos)
+    borrados = [(f"namespace/{nombreSitio}", v1.delete_namespace, {"name": nombreSitio})]
+    for pvc in ("bd-data-pvc", "wp-data-pvc", "bd-dump-pvc", "wp-dump-pvc"):
+        borrados.append((f"persistentvolumeclaim/{pvc}", v1.delete_namespaced_persistent_volume_claim, {"name": pvc, "namespace": nombreSitio}))
+    for pv in ("wp-data-pv", "bd-data-pv", "bd-dump-pv", "wp-dump-pv"):
+        # Los volúmenes que la caché sabe que no existen no se piden a la API
+        vigente, volumen = leeCache("volumenes", None, f"{nombreSitio}-{pv}")
+        if vigente and volumen is None:
+            continue
+        borrados.append((f"persistentvolume/{nombreSitio}-{pv}", v1.delete_persistent_volume, {"name": f"{nombreSitio}-{pv}"}))
+
+    def borra(borrado):
+        descripcion, funcion, argumentos = borrado
+        try:
+            funcion(**argumentos)
+            return f"{descripcion} deleted", False
+        except client.exceptions.ApiException as e:
+            if e.status == 404:
+                return f"{descripcion} no existe", False
+            return f"Error: {descripcion}: {e.reason}", True
+
+    with tramo("borrados", objetos=len(borrados)), ThreadPoolExecutor(max_workers=len(borrados)) as pool:
+        resultados = list(pool.map(borra, borrados))
+
+    resultado = "".join(f"{linea}\n" for linea, _ in resultados)
+    hayErrores = any(error for _, error in resultados)
+
+    # Esperamos a que el namespace desaparezca para que el sitio pueda volver a desplegarse
+    try:
+        with tramo("espera-namespace"):
+            eliminado = esperaNamespaceEliminado(nombreSitio, TIMEOUT_ELIMINA_NAMESPACE)
+        if eliminado:
+            resultado += f"namespace/{nombreSitio} eliminado por completo\n"
+        else:
+            resultado += f"Error: el namespace {nombreSitio} sigue eliminándose tras {TIMEOUT_ELIMINA_NAMESPACE} s\n"
+            hayErrores = True
+    except Exception as e:
+        resultado += f"Error esperando la eliminación del namespace {nombreSitio}: {str(e)}\n"
+        hayErrores = True
+
+    # Si el namespace era una reserva (libre u ocupada por un sitio), deja de serlo
+    if not hayErrores and os.path.exists(FICHERO_CATALOGO):
+        try:
+            actualizaReserva(nombreSitio)
+        except sqlite3.Error as e:
+            resultado += f"Error al quitar la reserva {nombreSitio} del catálogo: {str(e)}\n"
+            hayErrores = True
+
+    if hayErrores:
+        return 500, resultado
+    return 200, resultado
+
+def eliminaDesplieguesSitios(nombresSitios, paralelo=PARALELO_LOTE):
+    # Función que elimina el despliegue de varios sitios a la vez, como máximo 'paralelo' simultáneamente
+
+    # Cada sitio lanza 9 borrados simultáneos además del watch de su namespace
+    ampliaPoolApi(10 * paralelo)
+
+    def eliminaUno(nombreSitio):
+        inicio = time.monotonic()
+        codigoResultado, resultado = eliminaDespliegueSitio(nombreSitio)
+        return nombreSitio, codigoResultado, resultado, time.monotonic() - inicio
+
+    with ThreadPoolExecutor(max_workers=paralelo) as pool:
+        resultados = list(pool.map(conTraza(eliminaUno), nombresSitios))
+
+    salida = ""
+    fallidos = 0
+    for nombreSitio, codigoResultado, resultado, duracion in resultados:
+        if codigoResultado != 200:
+            fallidos += 1
+        salida += f"== {nombreSitio} ({duracion:.1f}s)\n{resultado}"
+
+    if fallidos:
+        return 500, salida + f"Eliminación con errores: {fallidos} de {len(resultados)} sitios"
+    return 200, salida + f"Eliminados {len(resultados)} sitios"
+
+def esperaPodsDetenidos(nombreSitio, timeout):
+    # Función que espera, mediante la API watch, a que no quede ningún pod en el namespace del sitio
+    # Devuelve True si ya no hay pods y False si se agota el tiempo de espera
+    v1 = getCoreV1Api()
+    limite = time.monotonic() + timeout
+    w = watch.Watch()
+
+    while True:
+        pods = v1.list_namespaced_pod(namespace=nombreSitio)
+        vivos = {pod.metadata.name for pod in pods.items}
+        if not vivos:
+            return True
+
+        restante = int(limite - time.monotonic())
+        if restante <= 0:
+            return False
+
+        try:
+            for evento in w.stream(v1.list_namespaced_pod, namespace=nombreSitio, resource_version=pods.metadata.resource_version, timeout_seconds=restante):
+                if evento['type'] == "DELETED":
+                    vivos.discard(evento['object'].metadata.name)
+                elif evento['type'] == "ADDED":
+                    vivos.add(evento['object'].metadata.name)
+                if not vivos:
+                    w.stop()
+                    return True
+        except client.exceptions.ApiException as e:
+            if e.status != 410:
+                raise
+
+@trazada("crea-semilla", "fichero")
+def creaSemilla(ficheroConfig, reemplaza=False):
+    # Función que crea la semilla de las imágenes actuales a partir de un sitio plantilla: lo despliega e inicializa
+    # desde cero, detiene sus pods para que MySQL cierre limpiamente, copia sus volúmenes de datos de BD y uploads
+    # y elimina el sitio plantilla. Solo hace falta una vez por versión de las imágenes (ver versionSemilla)
+    destino = f"{DIRECTORIO_SEMILLAS}/{versionSemilla()}"
+    if os.path.exists(destino) and not reemplaza:
+        return 500, f"Ya existe la semilla {versionSemilla()} (use --reemplaza para volver a crearla)"
+
+    configuracionPlantilla = leeJSON(ficheroConfig)
+    nombreSitio = configuracionPlantilla['nombreSitio']
+    if not sitioNuevo(nombreSitio):
+        return 500, f"El sitio plantilla {nombreSitio} ya tiene datos en {DIRECTORIO_VOLUMENES}/{nombreSitio}: use un sitio nuevo"
+
+    logger.info(f"Comando: crea-semilla {versionSemilla()} desde {nombreSitio}")
+
+    # Desplegamos e inicializamos el sitio plantilla sin semilla
+    codigoResultado, resultado = despliegaSitio(ficheroConfig, usaSemilla=False, usaReserva=False)
+    if codigoResultado != 200:
+        return 500, f"No se ha podido desplegar el sitio plantilla {nombreSitio}: {resultado}"
+
+    # Detenemos WordPress y MySQL para copiar un directorio de datos consistente
+    with tramo("detiene-pods"):
+        try:
+            for deployment in (f"{nombreSitio}-wordpress", f"{nombreSitio}-bd"):
+                getAppsV1Api().patch_namespaced_deployment_scale(deployment, nombreSitio, {"spec": {"replicas": 0}})
+            detenidos = esperaPodsDetenidos(nombreSitio, TIMEOUT_LISTO_BD)
+        except client.exceptions.ApiException as e:
+            return 500, f"No se han podido detener los pods de {nombreSitio}: {e.reason}"
+    if not detenidos:
+        return 500, f"Los pods de {nombreSitio} siguen en marcha tras {TIMEOUT_LISTO_BD} s"
+
+    # Copiamos los volúmenes en un directorio temporal que sustituye a la semilla al terminar
+    parcial = f"{destino}.parcial"
+    with tramo("copia-volumenes"):
+        try:
+            shutil.rmtree(parcial, ignore_errors=True)
+            for volumen in ("bd/data", "wp/uploads"):
+                copiaDirectorio(f"{DIRECTORIO_VOLUMENES}/{nombreSitio}/{volumen}", f"{parcial}/{volumen}")
+            for patron in FICHEROS_EXCLUIDOS_SEMILLA:
+                for fichero in glob.glob(f"{parcial}/bd/data/{patron}"):
+                    os.remove(fichero)
+            # La marca guarda la contraseña de BD de la plantilla, que los sitios sembrados cambian por la suya
+            with open(os.open(f"{parcial}/{MARCA_SEMILLA}", os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w") as f:
+                json.dump({"version": versionSemilla(), "imagenes": [IMAGEN_BD, IMAGEN_WP], "sitio": nombreSitio,
+                           "fecha": datetime.datetime.now().isoformat(timespec="seconds"), "passwordBD": configuracionPlantilla['passwordBD']}, f)
+            if os.path.exists(destino):
+                shutil.rmtree(destino)
+            os.replace(parcial, destino)
+        except OSError as e:
+            shutil.rmtree(parcial, ignore_errors=True)
+            return 500, f"No se ha podido copiar la semilla desde {nombreSitio}: {str(e)}"
+
+    # Eliminamos el sitio plantilla y sus volúmenes
+    codigoResultado, resultado = eliminaDespliegueSitio(nombreSitio)
+    if codigoResultado != 200:
+        return 500, f"Semilla {versionSemilla()} creada, pero no se ha podido eliminar el sitio plantilla:\n{resultado}"
+    shutil.rmtree(f"{DIRECTORIO_VOLUMENES}/{nombreSitio}", ignore_errors=True)
+
+    return 200, f"Semilla {versionSemilla()} creada en {destino} a partir de {nombreSitio}"
+
+def leeConfiguracionReserva():
+    # Función que devuelve la configuración de la reserva de sitios en espera: valores por defecto y fichero de la reserva
+    ajustes = dict(RESERVA)
+    try:
+        with open(FICHERO_RESERVA, "r") as file:
+            ajustes.update(json.load(file))
+    except FileNotFoundError:
+        pass
+    return ajustes
+
+def consultaReservas(condicion="1", valores=()):
+    # Función que devuelve las filas de la tabla de reservas del catálogo que cumplen la condición dada
+    # Si el catálogo aún no existe no hay reservas (y no se crea solo para consultarlo)
+    if not os.path.exists(FICHERO_CATALOGO):
+        return []
+    conexion = abreCatalogo()
+    try:
+        return [dict(fila) for fila in conexion.execute(f"SELECT * FROM reservas WHERE {condicion}", valores)]
+    finally:
+        conexion.close()
+
+def reservasSitios(nombresSitios):
+    # Función que devuelve {sitio: fila del catálogo} de los sitios indicados que ocupan una reserva
+    # El catálogo es el único registro del nombre del sitio que ocupa una reserva: el namespace no se renombra (no se
+    # puede), así que kubectl, los volúmenes, DIRECTORIO_SITIOS y los backups (DIRECTORIO_BACKUPS/reserva-xxxxxx/)
+    # siguen usando el nombre del namespace; los comandos traducen el nombre del sitio aquí (ver resuelveSitios)
+    nombresSitios = list(dict.fromkeys(nombresSitios))
+    if not nombresSitios:
+        return {}
+    marcas = ", ".join("?" for _ in nombresSitios)
+    return {fila["sitio"]: fila for fila in consultaReservas(f"sitio IN ({marcas})", tuple(nombresSitios))}
+
+def resuelveSitios(argumentos):
+    # Función que sustituye en los argumentos de un comando los nombres de los sitios que ocupan una reserva por
+    # su namespace, con el que trabajan el resto de funciones (volúmenes, manifiestos, backups...)
+    argumentos = list(argumentos)
+    accion = argumentos[0] if argumentos else None
+    if accion in COMANDOS_VARIOS_SITIOS:
+        posiciones = range(1, len(argumentos))
+    else:
+        posiciones = [posicion + 1 for posicion in PARAMETROS_SITIO.get(accion, []) if posicion + 1 < len(argumentos)]
+    if not posiciones:
+        return argumentos
+
+    try:
+        reservas = reservasSitios(argumentos[posicion] for posicion in posiciones)
+    except sqlite3.Error as e:
+        logger.warning(f"No se han podido consultar las reservas del catálogo: {e}")
+        return argumentos
+    for posicion in posiciones:
+        if argumentos[posicion] in reservas:
+            argumentos[posicion] = reservas[argumentos[posicion]]["namespace"]
+    return argumentos
+
+def reclamaReserva(nombreSitio):
+    # Función que asigna al sitio la reserva libre más antigua y devuelve su namespace, o None si no hay ninguna
+    # (una única sentencia UPDATE: dos despliegues simultáneos no pueden reclamar la misma reserva)
+    if not os.path.exists(FICHERO_CATALOGO):
+        return None
+    conexion = abreCatalogo()
+    try:
+        with conexion:
+            conexion.execute("UPDATE reservas SET estado = 'reclamada', sitio = ?, reclamada = ? WHERE namespace = "
+                             "(SELECT namespace FROM reservas WHERE estado = 'libre' ORDER BY creada LIMIT 1)", (nombreSitio, int(time.time())))
+        fila = conexion.execute("SELECT namespace FROM reservas WHERE sitio = ?", (nombreSitio,)).fetchone()
+    finally:
+        conexion.close()
+    return fila["namespace"] if fila else None
+
+def actualizaReserva(namespace, estado=None):
+    # Función que cambia el estado de una reserva, o la quita del catálogo si no se indica estado
+    conexion = abreCatalogo()
+    try:
+        with conexion:
+            if estado is None:
+                conexion.execute("DELETE FROM reservas WHERE namespace = ?", (namespace,))
+            else:
+                conexion.execute("UPDATE reservas SET estado = ? WHERE namespace = ?", (estado, namespace))
+    finally:
+        conexion.close()
+
+def cambiaContrasenaReserva(namespace, passwordBD):
+    # Función que al ocupar una reserva cambia la contraseña de su BD (la aleatoria de la reserva) por la del sitio
+    # Devuelve (200/500, mensaje, pod de BD en el que se ha cambiado)
+    try:
+        anterior = leeJSON(f"{DIRECTORIO_SITIOS}/{namespace}/reserva.json")['passwordBD']
+    except (OSError, ValueError, KeyError) as e:
+        return 500, f"No se puede leer la configuración de la reserva {namespace}: {str(e)}", None
+
+    nombrePod = buscaPod(namespace, "bd") or esperaPodListo(namespace, "tier=mysql", TIMEOUT_LISTO_BD, enMarcha=True)
+    if nombrePod is None:
+        return 500, f"No se encuentra pod Base de Datos de la reserva {namespace}", None
+    codigoResultado, resultado = cambiaContrasenaBD(namespace, nombrePod, anterior, passwordBD)
+    return codigoResultado, resultado, nombrePod
+
+# Reposición de la reserva dentro del demonio: hilo en curso y si se ha pedido otra mientras tanto
+_reposicion = {"hilo": None, "pendiente": False}
+_bloqueoReposicion = threading.Lock()
+
+def lanzaReposicion():
+    # Función que repone la reserva en segundo plano. En el demonio se hace en un hilo del mismo proceso, uno como
+    # máximo: si ya hay uno en curso, al terminar vuelve a reponer. Fuera de él, en un proceso independiente que
+    # sobrevive al comando (varias reposiciones a la vez no preparan de más, ver reponeReserva)
+    if _modoDemonio:
+        with _bloqueoReposicion:
+            if _reposicion["hilo"] is not None:
+                _reposicion["pendiente"] = True
+                return
+            _reposicion["hilo"] = threading.Thread(target=reponeEnDemonio, name="repone-reserva", daemon=True)
+            _reposicion["hilo"].start()
+        return
+
+    try:
+        subprocess.Popen([sys.executable, SCRIPT_CONTROL, "repone-reserva"], stdin=subprocess.DEVNULL,
+                         stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+    except OSError as e:
+        logger.error(f"No se ha podido lanzar la reposición de la reserva: {e}")
+
+def reponeEnDemonio():
+    # Función del hilo de reposición del demonio: repone la reserva hasta que no quedan peticiones pendientes
+    while True:
+        try:
+            codigoResultado, resultado = reponeReserva(leeConfiguracionReserva()["profundidad"])
+            if codigoResultado == 200:
+                logger.info(f"Reposición de la reserva:\n{resultado}")
+            else:
+                logger.error(f"Reposición de la reserva con errores:\n{resultado}")
+        except Exception as e:
+            logger.error(f"Error en la reposición de la reserva: {str(e)}")
+        with _bloqueoReposicion:
+            if not _reposicion["pendiente"]:
+                _reposicion["hilo"] = None
+                return
+            _reposicion["pendiente"] = False
+
+@trazada("repone-reserva", "profundidad")
+def reponeReserva(profundidad, paralelo=PARALELO_LOTE):
+    # Función que despliega sitios en espera hasta que la reserva (libres y en preparación) tiene 'profundidad' sitios
+    # Las reservas fallidas (y las que llevan en preparación más de TIMEOUT_LISTO_BD + TIMEOUT_LISTO_WP) se eliminan
+    ajustes = leeConfiguracionReserva()
+    caducidad = int(time.time()) - TIMEOUT_LISTO_BD - TIMEOUT_LISTO_WP
+
+    # Calculamos y apuntamos las reservas que faltan en una sola transacción (puede haber varias reposiciones a la vez)
+    conexion = abreCatalogo()
+    try:
+        with conexion:
+            conexion.execute("BEGIN IMMEDIATE")
+            conexion.execute("UPDATE reservas SET estado = 'fallida' WHERE estado = 'preparando' AND creada < ?", (caducidad,))
+            fallidas = [fila["namespace"] for fila in conexion.execute("SELECT namespace FROM reservas WHERE estado = 'fallida'")]
+            activas = conexion.execute("SELECT COUNT(*) FROM reservas WHERE estado IN ('libre', 'preparando')").fetchone()[0]
+            nuevas = [f"{PREFIJO_RESERVA}{secrets.token_hex(3)}" for _ in range(max(0, profundidad - activas))]
+            conexion.executemany("INSERT INTO reservas (namespace, estado, creada) VALUES (?, 'preparando', ?)", [(namespace, int(time.time())) for namespace in nuevas])
+    finally:
+        conexion.close()
+
+    if not nuevas and not fallidas:
+        return 200, f"Reserva completa: {activas} sitios en espera"
+
+    def preparaUna(namespace):
+        # Los sitios en espera usan la semilla si existe; su configuración (con la contraseña de la BD, que el sitio
+        # que la reclame conserva) se guarda junto a sus manifiestos
+        ficheroConfig = f"{DIRECTORIO_SITIOS}/{namespace}/reserva.json"
+        try:
+            os.makedirs(f"{DIRECTORIO_SITIOS}/{namespace}", mode=0o700, exist_ok=True)
+            with open(os.open(ficheroConfig, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w") as f:
+                json.dump({"website": {"nombreSitio": namespace, "version": ajustes["version"], "passwordBD": secrets.token_urlsafe(18),
+                                       "passwordWP": secrets.token_urlsafe(18), "passwordAdminWP": secrets.token_urlsafe(18),
+                                       "mailUserWP": ajustes["mailUserWP"], "tituloSitio1": "Sitio en espera", "tituloSitio2": "",
+                                       "tipoEntidad": ajustes["tipoEntidad"], "perfilBD": ajustes["perfilBD"]}}, f)
+            codigoResultado, resultado = despliegaSitio(ficheroConfig)
+        except Exception as e:
+            codigoResultado, resultado = 500, str(e)
+        actualizaReserva(namespace, "libre" if codigoResultado == 200 else "fallida")
+        return namespace, codigoResultado, resultado
+
+    def eliminaUna(namespace):
+        codigoResultado, resultado = eliminaDespliegueSitio(namespace)
+        if codigoResultado == 200:
+            shutil.rmtree(f"{DIRECTORIO_VOLUMENES}/{namespace}", ignore_errors=True)
+            shutil.rmtree(f"{DIRECTORIO_SITIOS}/{namespace}", ignore_errors=True)
+        return namespace, codigoResultado, resultado
+
+    with ThreadPoolExecutor(max_workers=paralelo) as pool:
+        preparadas = list(pool.map(conTraza(preparaUna), nuevas))
+        fallidas += [namespace for namespace, codigoResultado, _ in preparadas if codigoResultado != 200]
+        eliminadas = list(pool.map(conTraza(eliminaUna), fallidas))
+
+    salida = "".join(f"{namespace}: {'en espera' if codigoResultado == 200 else 'Error: ' + str(resultado)}\n" for namespace, codigoResultado, resultado in preparadas)
+    salida += "".join(f"{namespace}: {'eliminada' if codigoResultado == 200 else 'Error al eliminarla: ' + str(resultado)}\n" for namespace, codigoResultado, resultado in eliminadas)
+    listas = sum(1 for _, codigoResultado, _ in preparadas if codigoResultado == 200)
+    if listas < len(nuevas):
+        return 500, salida + f"Reposición con errores: {listas} de {len(nuevas)} sitios en espera preparados"
+    return 200, salida + f"Reposición completa: {listas} sitios en espera preparados"
+
+def getApiClient():
+    # Función que devuelve el cliente de la API de Kubernetes compartido por todo el proceso
+    # La primera llamada lee el kubeconfig y crea el pool de conexiones urllib3, que se reutiliza
+    # (keep-alive) en todas las llamadas posteriores en lugar de abrir una sesión TLS nueva cada vez
+    global _apiClient
+
+    if _apiClient is None:
+        with _bloqueoApiClient:
+            if _apiClient is None:
+                configuracion = client.Configuration()
+                config.load_kube_config(client_configuration=configuracion)
+                configuracion.connection_pool_maxsize = POOL_CONEXIONES_API
+                _apiClient = client.ApiClient(configuration=configuracion)
+                logger.debug(f"Cliente de la API de Kubernetes creado para {configuracion.host}")
+    return _apiClient
+
+def ampliaPoolApi(conexiones):
+    # Función que asegura que el pool de conexiones del cliente compartido admite al menos 'conexiones' conexiones
+    # simultáneas. El tamaño de cada pool de urllib3 se fija al crearlo, así que si el cliente ya existe (modo demonio
+    # o llamadas anteriores) se cambia el tamaño con el que el pool_manager crea sus pools y se cierran los actuales
+    # (clear() solo los olvida): sus conexiones libres se cierran y las de las peticiones en curso, al terminar
+    apiClient = getApiClient()
+    with _bloqueoApiClient:
+        configuracion = apiClient.configuration
+        if (configuracion.connection_pool_maxsize or 0) < conexiones:
+            configuracion.connection_pool_maxsize = conexiones
+            poolManager = apiClient.rest_client.pool_manager
+            anteriores = [poolManager.pools.get(clave) for clave in poolManager.pools.keys()]
+            poolManager.connection_pool_kw["maxsize"] = conexiones
+            poolManager.clear()
+            for pool in anteriores:
+                if pool is not None:
+                    pool.close()
+            logger.debug(f"Pool de conexiones de la API ampliado a {conexiones} conexiones")
+    return apiClient
+
+def getCoreV1Api():
+    # Función que devuelve la API CoreV1 de Kubernetes sobre el cliente compartido
+    return client.CoreV1Api(getApiClient())
+
+def getAppsV1Api():
+    # Función que devuelve la API AppsV1 de Kubernetes sobre el cliente compartido
+    return client.AppsV1Api(getApiClient())
+
+def getClienteDinamico():
+    # Función que devuelve el cliente dinámico de Kubernetes (usado para aplicar manifiestos de cualquier tipo)
+    # El descubrimiento de recursos se hace una sola vez por proceso
+    global _clienteDinamico
+
+    if _clienteDinamico is None:
+        apiClient = getApiClient()
+        with _bloqueoApiClient:
+            if _clienteDinamico is None:
+                _clienteDinamico = dynamic.DynamicClient(apiClient)
+    return _clienteDinamico
+
+def coincideSelector(etiquetas, selector):
+    # Función que indica si unas etiquetas cumplen un selector de etiquetas ('app', 'tier=mysql', 'tier in (a,b)')
+    etiquetas = etiquetas or {}
+    for requisito in re.split(r",(?![^()]*\))", selector or ""):
+        requisito = requisito.strip()
+        if not requisito:
+            continue
+        if coincidencia := re.match(r"(\S+)\s+in\s+\((.*)\)$", requisito):
+            if etiquetas.get(coincidencia.group(1)) not in [valor.strip() for valor in coincidencia.group(2).split(",")]:
+                return False
+        elif "!=" in requisito:
+            clave, valor = requisito.split("!=", 1)
+            if etiquetas.get(clave.strip()) == valor.strip():
+                return False
+        elif "=" in requisito:
+            clave, valor = requisito.split("=", 1)
+            if etiquetas.get(clave.strip()) != valor.lstrip("=").strip():
+                return False
+        elif requisito not in etiquetas:
+            return False
+    return True
+
+class CacheRecurso:
+    # Caché de un tipo de objeto del clúster al estilo de los 'informers': lista inicial y después watch desde
+    # su resourceVersion, en un hilo propio, para mantener en memoria el estado actual
+    # Solo responde si ha tenido contacto con el servidor en los últimos ANTIGUEDAD_MAXIMA_CACHE segundos;
+    # si no, la consulta cuenta como fallo y quien llama debe preguntar a la API
+
+    def __init__(self, nombre, funcionLista, transforma=None):
+        self.nombre = nombre
+        self.funcionLista = funcionLista
+        self.transforma = transforma or (lambda objeto: objeto)
+        self.objetos = {}
+        self.bloqueo = threading.Lock()
+        self.sincronizada = False
+        self.ultimoContacto = 0.0
+        self.aciertos = 0
+        self.fallos = 0
+
+    def inicia(self):
+        threading.Thread(target=self.sincroniza, name=f"cache-{self.nombre}", daemon=True).start()
+
+    def clave(self, objeto):
+        return (objeto.metadata.namespace, objeto.metadata.name)
+
+    def sincroniza(self):
+        while True:
+            try:
+                # Lista completa: estado inicial y versión desde la que observar los cambios
+                lista = self.funcionLista()()
+                versionRecurso = lista.metadata.resource_version
+                with self.bloqueo:
+                    self.objetos = {self.clave(objeto): self.transforma(objeto) for objeto in lista.items}
+                    self.sincronizada = True
+                    self.ultimoContacto = time.monotonic()
+                logger.debug(f"Caché {self.nombre}: {len(lista.items)} objetos (versión {versionRecurso})")
+
+                while True:
+                    w = watch.Watch()
+                    for evento in w.stream(self.funcionLista(), resource_version=versionRecurso, allow_watch_bookmarks=True,
+                                           timeout_seconds=ANTIGUEDAD_MAXIMA_CACHE // 2):
+                        objeto = evento["object"]
+                        versionRecurso = objeto.metadata.resource_version
+                        with self.bloqueo:
+                            if evento["type"] in ("ADDED", "MODIFIED"):
+                                self.objetos[self.clave(objeto)] = self.transforma(objeto)
+                            elif evento["type"] == "DELETED":
+                                self.objetos.pop(self.clave(objeto), None)
+                            self.ultimoContacto = time.monotonic()
+                    with self.bloqueo:
+                        self.ultimoContacto = time.monotonic()
+            except client.exceptions.ApiException as e:
+                # 410: la versión ya no está disponible en el servidor, hay que volver a listar
+                if e.status != 410:
+                    logger.warning(f"Caché {self.nombre}: {e.reason}, se reintenta en {ESPERA_REINTENTO_CACHE} s")
+                    time.sleep(ESPERA_REINTENTO_CACHE)
+            except Exception as e:
+                logger.warning(f"Caché {self.nombre}: {str(e)}, se reintenta en {ESPERA_REINTENTO_CACHE} s")
+                time.sleep(ESPERA_REINTENTO_CACHE)
+
+    def antiguedad(self):
+        return time.monotonic() - self.ultimoContacto if self.sincronizada else None
+
+    def vigente(self):
+        # Indica si la caché puede responder y cuenta la consulta como acierto o fallo
+        with self.bloqueo:
+            vigente = self.sincronizada and time.monotonic() - self.ultimoContacto <= ANTIGUEDAD_MAXIMA_CACHE
+            if vigente:
+                self.aciertos += 1
+            else:
+                self.fallos += 1
+            return vigente
+
+    def lista(self, namespace=None, selector=None):
+        # Devuelve los objetos (de un namespace y con un selector de etiquetas) o None si la caché no está vigente
+        if not self.vigente():
+            return None
+        with self.bloqueo:
+            objetos = list(self.objetos.values())
+        return [objeto for objeto in objetos
+                if (namespace is None or objeto.metadata.namespace == namespace) and coincideSelector(objeto.metadata.labels, selector)]
+
+    def lee(self, namespace, nombre):
+        # Devuelve (vigente, objeto o None si no existe)
+        if not self.vigente():
+            return False, None
+        with self.bloqueo:
+            return True, self.objetos.get((namespace, nombre))
+
+# Cachés activas (solo en modo demonio): nombre -> CacheRecurso
+_caches = {}
+
+# Indica si el proceso es el demonio (ver demonio)
+_modoDemonio = False
+
+def metadatosSecreto(secreto):
+    # Función que reduce un secreto a sus metadatos y tipo: la caché no guarda el contenido de los secretos
+    return client.V1Secret(metadata=secreto.metadata, type=secreto.type)
+
+def soloMetadatos(objeto):
+    # Función que reduce un objeto a sus metadatos (las cachés de objetos de los sitios solo miran sus anotaciones)
+    return type(objeto)(api_version=objeto.api_version, kind=objeto.kind, metadata=objeto.metadata)
+
+def iniciaCaches():
+    # Función que arranca las cachés de pods, namespaces, volúmenes persistentes y secretos (sin su contenido), y las
+    # del resto de objetos de los manifiestos de los sitios (deployments completos, los demás solo con sus metadatos),
+    # y espera a que hagan la lista inicial (como máximo ANTIGUEDAD_MAXIMA_CACHE segundos)
+    definiciones = [
+        CacheRecurso("pods", lambda: getCoreV1Api().list_pod_for_all_namespaces),
+        CacheRecurso("namespaces", lambda: getCoreV1Api().list_namespace),
+        CacheRecurso("volumenes", lambda: getCoreV1Api().list_persistent_volume),
+        CacheRecurso("secretos", lambda: getCoreV1Api().list_secret_for_all_namespaces, metadatosSecreto),
+        CacheRecurso("deployments", lambda: getAppsV1Api().list_deployment_for_all_namespaces),
+        CacheRecurso("servicios", lambda: getCoreV1Api().list_service_for_all_namespaces, soloMetadatos),
+        CacheRecurso("configmaps", lambda: getCoreV1Api().list_config_map_for_all_namespaces, soloMetadatos),
+        CacheRecurso("pvcs", lambda: getCoreV1Api().list_persistent_volume_claim_for_all_namespaces, soloMetadatos),
+        CacheRecurso("ingresses", lambda: client.NetworkingV1Api(getApiClient()).list_ingress_for_all_namespaces, soloMetadatos)
+    ]
+    for cache in definiciones:
+        _caches[cache.nombre] = cache
+        cache.inicia()
+
+    limite = time.monotonic() + ANTIGUEDAD_MAXIMA_CACHE
+    while time.monotonic() < limite and not all(cache.sincronizada for cache in definiciones):
+        time.sleep(0.1)
+
+def listaCache(nombre, namespace=None, selector=None):
+    # Función que consulta una caché; devuelve None si no está activa o no está vigente (hay que usar la API)
+    cache = _caches.get(nombre)
+    return cache.lista(namespace, selector) if cache else None
+
+def leeCache(nombre, namespace, nombreObjeto):
+    # Función que busca un objeto en una caché; devuelve (vigente, objeto o None)
+    cache = _caches.get(nombre)
+    return cache.lee(namespace, nombreObjeto) if cache else (False, None)
+
+def estadoCaches():
+    # Función que muestra el estado de las cachés: objetos, aciertos, fallos y antigüedad
+    if not _caches:
+        return 500, "Las cachés solo están activas en modo demonio"
+
+    print(f"{'CACHÉ':<12} {'OBJETOS':>8} {'ACIERTOS':>9} {'FALLOS':>7} {'ANTIGÜEDAD':>11}")
+    for cache in _caches.values():
+        antiguedad = cache.antiguedad()
+        print(f"{cache.nombre:<12} {len(cache.objetos):>8} {cache.aciertos:>9} {cache.fallos:>7} {'-' if antiguedad is None else f'{antiguedad:.1f}s':>11}")
+    return 200, "Estado de las cachés mostrado correctamente"
+
+def listaPodsSitio(nombreSitio, selector=None):
+    # Función que devuelve los pods de un sitio (con un selector de etiquetas), desde la caché si está vigente
+    pods = listaCache("pods", nombreSitio, selector)
+    if pods is None:
+        pods = getCoreV1Api().list_namespaced_pod(namespace=nombreSitio, label_selector=selector or "").items
+    return pods
+
+def listaPodsFlota(selector):
+    # Función que devuelve los pods de todos los sitios con un selector de etiquetas, desde la caché si está vigente
+    pods = listaCache("pods", None, selector)
+    if pods is None:
+        pods = getCoreV1Api().list_pod_for_all_namespaces(label_selector=selector).items
+    return pods
+
+def listaPods(nombreSitio):
+  # Función para listar todos los pods asociados a un sitio
+
+  # Obtener la lista de Pods en el namespace especificado
+  try:
+    nombresPods = [pod.metadata.name for pod in listaPodsSitio(nombreSitio)]
+    return 200, nombresPods
+  except client.exceptions.ApiException as e:
+    print(f"Error al obtener los Pods: {e}")
+    return 500, []
+
+def pasosInicializacion(salida):
+    # Función que extrae de la salida del paquete de inicialización los pasos ejecutados, con su duración
+    pasos = []
+    for linea in salida.splitlines():
+        try:
+            paso = json.loads(linea)
+        except ValueError:
+            continue
+        if isinstance(paso, dict) and "paso" in paso:
+            pasos.append(paso)
+    return pasos
+
+@trazada("inicializa-wp")
+def inicializaSitioWP(nombreSitio, reescribe=False, podWP=None):
+  # Función para incializar un sitio web
+  # Todos los pasos (instalación, tema, ajustes, rol y usuario gestor) se ejecutan en una única sesión exec con un
+  # solo arranque de WordPress (SCRIPT_INICIALIZA_WP); se muestra la duración de cada paso
+  # Con 'reescribe' (sitio sembrado o que ocupa una reserva) se sustituyen además los datos de la plantilla por los
+  # del sitio. Si no se indica 'podWP' se usa el primer pod de WordPress del sitio
+
+  if podWP is None:
+      resultado, pods = listaPods(nombreSitio)
+
+      # Obtenemos el nombre del pod de Wordpress
+      if resultado == 500:
+          return 500, "No se pudo obtener la lista de pods"
+
+      podWP = next((pod for pod in pods if 'wordpress' in pod), None)
+      if podWP is None:
+          return 500, "No se encuentra pod Wordpress"
+
+  # Ejecutamos el paquete de inicialización del sitio
+  comando = ["kubectl", "exec", podWP, "-n", nombreSitio, "--"] + COMANDO_INICIALIZA_WP + (["semilla"] if reescribe else [])
+  inicio = time.perf_counter()
+  proceso = subprocess.run(comando, capture_output=True, text=True)
+  pasos = pasosInicializacion(proceso.stdout)
+
+  # Duración de cada paso; en la traza se sitúan respecto al inicio del exec (el arranque de PHP empieza algo después)
+  traza = trazaActual()
+  for paso in pasos:
+      estado = "OK" if paso["ok"] else "ERROR"
+      print(f"  {paso['paso']:<70} {paso['ms']:>8.0f} ms  {estado} {paso['mensaje']}".rstrip())
+      logger.debug(f"Inicialización de {nombreSitio}: {paso['paso']} {paso['ms']} ms {estado} {paso['mensaje']}")
+      if traza is not None:
+          traza.registra(f"wp {paso['paso']}", inicio + paso["inicio"] / 1000, paso["ms"] / 1000, {"estado": estado})
+
+  if proceso.returncode != 0:
+      logger.error(f"Error: No se pudo ejecutar la inicialización de {nombreSitio}: {proceso.stderr.strip()}")
+      return 500, "No se pudo inicializar sitio"
+
+  logger.info(f"Inicialización de {nombreSitio} ejecutada en {time.perf_counter() - inicio:.1f} s ({len(pasos)} pasos)")
+  return 200, "Sitio Wordpress Inicializado"
+
+def getPodStatus(nombreSitio, nombrePod):
+    # Función que nos devuelve una lista con los estados en los que está un pod
+
+    # Obtiene el pod (de la caché si está vigente)
+    vigente, pod = leeCache("pods", nombreSitio, nombrePod)
+    if not vigente or pod is None:
+        pod = getCoreV1Api().read_namespaced_pod(name=nombrePod, namespace=nombreSitio)
+
+    # Devolvemos los estados del pod
+    return pod.status.conditions
+
+def variablePod(pod, nombre):
+    # Función que devuelve el valor literal de una variable de entorno del primer contenedor de un pod, o None
+    return next((variable.value for variable in pod.spec.containers[0].env or [] if variable.name == nombre), None)
+
+def esperaPodListo(nombreSitio, selector, timeout, condicion=None, enMarcha=False):
+    # Función que espera, mediante la API watch de Kubernetes, a que un pod del sitio con la etiqueta dada esté 'Ready'
+    # Devuelve el nombre del pod en cuanto su condición 'Ready' pasa a 'True', o None si se agota el tiempo de espera
+    # Si se indica 'condicion' (función que recibe el pod) solo se tienen en cuenta los pods que la cumplen
+    # Con enMarcha=True basta con que el pod esté en fase 'Running' (sus contenedores han arrancado)
+
+    # Obtenemos el cliente de la API de Kubernetes
+    v1 = getCoreV1Api()
+
+    limite = time.monotonic() + timeout
+    w = watch.Watch()
+
+    # Sin resourceVersion el watch devuelve primero un evento ADDED por cada pod existente, por lo que
+    # un pod que ya estuviese listo se detecta de inmediato. Si el servidor cierra el stream antes
+    # del límite (o la versión expira), volvemos a abrirlo con el tiempo restante
+    while True:
+        restante = int(limite - time.monotonic())
+        if restante <= 0:
+            logger.error(f"Tiempo de espera agotado para los pods '{selector}' de {nombreSitio}")
+            return None
+
+        try:
+            for evento in w.stream(v1.list_namespaced_pod, namespace=nombreSitio, label_selector=selector, timeout_seconds=restante):
+                pod = evento['object']
+                if evento['type'] == "DELETED" or pod.metadata.deletion_timestamp is not None:
+                    continue
+                if condicion is not None and not condicion(pod):
+                    continue
+                if (pod.status.phase == "Running") if enMarcha else isPodReady(pod.status.conditions):
+                    w.stop()
+                    logger.debug(f"Pod {pod.metadata.name} de {nombreSitio} listo")
+                    return pod.metadata.name
+                logger.debug(f"El pod {pod.metadata.name} de {nombreSitio} no está listo. Esperando...")
+        except client.exceptions.ApiException as e:
+            if e.status != 410:
+                logger.error(f"Error al observar los pods '{selector}' de {nombreSitio}: {e}")
+                return None
+
+def formateaEdad(segundos):
+    # Función que devuelve una edad en formato abreviado (como kubectl): 45s, 12m, 5h, 3d
+    segundos = int(segundos)
+    if segundos < 60:
+        return f"{segundos}s"
+    if segundos < 3600:
+        return f"{segundos // 60}m"
+    if segundos < 86400:
+        return f"{segundos // 3600}h"
+    return f"{segundos // 86400}d"
+
+def estadoFlota():
+    # Función que obtiene el estado de todos los sitios con una única llamada a la API
+    # Usa las etiquetas 'app' (nombre del sitio) y 'tier' (mysql o frontend) que ponen los manifiestos
+
+    try:
+        pods = listaPodsFlota("app,tier in (mysql,frontend)")
+    except client.exceptions.ApiException as e:
+        errores.append(f"No se ha podido obtener el estado de la flota: {e.reason}")
+        return 500, errores
+
+    ahora = datetime.datetime.now(datetime.timezone.utc)
+    sitios = {}
+
+    for pod in pods:
+        nombreSitio = pod.metadata.labels["app"]
+        sitio = sitios.setdefault(nombreSitio, {"sitio": nombreSitio, "bd": False, "wp": False, "reinicios": 0, "nodos": [], "edad": 0})
+        listo = pod.metadata.deletion_timestamp is None and isPodReady(pod.status.conditions)
+
+        if pod.metadata.labels["tier"] == "mysql":
+            sitio["bd"] = sitio["bd"] or listo
+        else:
+            sitio["wp"] = sitio["wp"] or listo
+
+        sitio["reinicios"] += sum(estado.restart_count for estado in pod.status.container_statuses or [])
+        if pod.spec.node_name and pod.spec.node_name not in sitio["nodos"]:
+            sitio["nodos"].append(pod.spec.node_name)
+        sitio["edad"] = max(sitio["edad"], int((ahora - pod.metadata.creation_timestamp).total_seconds()))
+
+    # Namespaces de la reserva: estado de la reserva y sitio que la ocupa
+    try:
+        for reserva in consultaReservas():
+            if reserva["namespace"] in sitios:
+                sitios[reserva["namespace"]]["reserva"] = {"estado": reserva["estado"], "sitio": reserva["sitio"]}
+    except sqlite3.Error as e:
+        logger.warning(f"No se han podido consultar las reservas del catálogo: {e}")
+
+    return 200, [sitios[nombreSitio] for nombreSitio in sorted(sitios)]
+
+def muestraEstadoFlota(formatoJSON=False):
+    # Función que muestra por pantalla el estado de todos los sitios, en tabla o en JSON
+    codigoResultado, sitios = estadoFlota()
+    if codigoResultado != 200:
+        return codigoResultado, sitios
+
+    if formatoJSON:
+        print(json.dumps(sitios, indent=2))
+    else:
+        print(f"{'SITIO':<30} {'BD':<8} {'WP':<8} {'REINICIOS':>9}  {'NODO':<24} {'EDAD':>6}")
+        for sitio in sitios:
+            bd = "Listo" if sitio["bd"] else "NoListo"
+            wp = "Listo" if sitio["wp"] else "NoListo"
+            nombre = sitio["sitio"]
+            if "reserva" in sitio:
+                nombre = f"{sitio['reserva']['sitio']} ({nombre})" if sitio["reserva"]["sitio"] else f"{nombre} ({sitio['reserva']['estado']})"
+            print(f"{nombre:<30} {bd:<8} {wp:<8} {sitio['reinicios']:>9}  {','.join(sitio['nodos']) or '-':<24} {formateaEdad(sitio['edad']):>6}")
+
+    listos = sum(1 for sitio in sitios if sitio["bd"] and sitio["wp"])
+    return 200, f"{listos} de {len(sitios)} sitios listos"
+
+def isPodReady(conditions):
+    # Función para comprobar si el pod se encuentra en estado 'Ready'
+    if not conditions:
+        return False
+    for condition in conditions:
+        if condition.type == "Ready" and condition.status == "True":
+            return True
+    return False
+    
+def leeJSON(fichero):
+    # Función que lee un fichero JSON con la configuración de un sitio
+    with open(fichero, 'r') as file:
+      config = json.load(file)
+    
+    return config['website']
+
+def reiniciaPod(nombreSitio, nombrePod):
+    # Función que reinicia un pod dad
+
+    resultado = 0
+
+    # Log del comando que se va a ejecutar (para debug)
+    print(f"kubectl delete pod {nombrePod} -n {nombreSitio}")
+
+    try:
+        # Ejecutar el comando kubectl
+        proceso = subprocess.Popen(
+            ["kubectl", "delete", "pod", nombrePod, "-n", nombreSitio],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+        stdout, stderr = proceso.communicate()
+
+        # Procesar la salida del comando
+        salida = stdout.decode()
+        if "deleted" in salida:  # Verifica que el pod se ha eliminado
+            resultado = 1
+
+    except Exception as e:
+        print(f"Error al ejecutar el comando: {e}")
+
+    return resultado    
+
+def reiniciaContenedor(nombreSitio, contenedor):
+  # Función que dado un sitio y la cadena BD o Wordpress ejecuta el reinicio del pod correspondiente
+   
+    # Obtenemos la lista de pods   
+    resultado, pods = listaPods(nombreSitio)
+    problemas = False
+
+    # Recorremos la lista de pods y reiniciamos el que contenga la cadena dada
+    if resultado:
+        for pod in pods:
+          if contenedor in pod:
+              if reiniciaPod(nombreSitio, pod):
+                logger.info(f"{contenedor} de {nombreSitio} inicializado correctamente")
+                errores.append("Aplicación reiniciada correctamente")
+              else:
+                  errores.append(f"No se ha podido inicializar {contenedor} de {nombreSitio}")
+                  logger.error(f"No se ha podido inicializar {contenedor} de {nombreSitio}")
+                  problemas = True            
+        if not problemas:      
+          return 200, "Proceso de reinicio completado"
+        else:
+          return 500, "No se ha podido reiniciar contenedor"
+    
+    else: 
+        return 500, "Reinicia Contenedor - No se puede obtener lista de pods" 
+
+def segundosDuracion(duracion):
+    # Función que convierte una duración como '45s', '10m', '2h' o '1d' (o un número de segundos) a segundos
+    unidades = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+    if duracion[-1:] in unidades:
+        return int(duracion[:-1]) * unidades[duracion[-1]]
+    return int(duracion)
+
+def claveMarcaTiempo(marca):
+    # Función que normaliza una marca de tiempo RFC3339Nano de Kubernetes para poder ordenarla como texto
+    # (kubelet omite los ceros finales de las fracciones de segundo)
+    segundos, _, fraccion = marca.rstrip("Z").partition(".")
+    return f"{segundos}.{fraccion.ljust(9, '0')}"
+
+def lineasLogPod(v1, nombreSitio, nombrePod, nombreContenedor=None, seguir=False, lineasFinales=None, desde=None):
+    # Generador que lee el log de un pod por bloques y devuelve sus líneas una a una como
+    # (clave de ordenación, nombre del pod, línea), sin cargar el log completo en memoria
+    respuesta = v1.read_namespaced_pod_log(
+        name=nombrePod, namespace=nombreSitio, container=nombreContenedor, follow=seguir,
+        tail_lines=lineasFinales, since_seconds=desde, timestamps=True, _preload_content=False
+    )
+    pendiente = b""
+    try:
+        for bloque in respuesta.stream(TAMANO_BLOQUE_LOG):
+            pendiente += bloque
+            *lineas, pendiente = pendiente.split(b"\n")
+            for linea in lineas:
+                marca, _, texto = linea.decode("utf-8", errors="replace").partition(" ")
+                yield claveMarcaTiempo(marca), nombrePod, texto
+        if pendiente:
+            marca, _, texto = pendiente.decode("utf-8", errors="replace").partition(" ")
+            yield claveMarcaTiempo(marca), nombrePod, texto
+    finally:
+        respuesta.release_conn()
+
+def muestraLogs(nombreSitio, contenedor, seguir=False, lineasFinales=None, desde=None, nombreContenedor=None):
+    # Función que dado un sitio y la cadena BD o Wordpress nos muestra el log asociado por pantalla
+    # El log se muestra a medida que se recibe. Si hay varios pods, sus líneas se intercalan por
+    # marca de tiempo y se preceden del nombre del pod
+
+    v1 = getCoreV1Api()
+
+    # Obtenemos los pods del tipo indicado
+    try:
+        if contenedor in SELECTOR_CONTENEDOR:
+            pods = [pod.metadata.name for pod in listaPodsSitio(nombreSitio, SELECTOR_CONTENEDOR[contenedor])]
+        else:
+            pods = [pod.metadata.name for pod in listaPodsSitio(nombreSitio) if contenedor in pod.metadata.name]
+    except client.exceptions.ApiException as e:
+        return 500, f"Logs {nombreSitio} - No se puede obtener lista de pods"
+
+    if not pods:
+        return 500, f"No se encuentra ningún pod {contenedor} de {nombreSitio}"
+
+    def muestraLinea(nombrePod, texto):
+        if len(pods) > 1:
+            print(f"[{nombrePod}] {texto}", flush=seguir)
+        else:
+            print(texto, flush=seguir)
+
+    try:
+        if not seguir:
+            # Mezcla ordenada de los logs de todos los pods, leyendo de cada uno solo lo necesario
+            generadores = [lineasLogPod(v1, nombreSitio, pod, nombreContenedor, False, lineasFinales, desde) for pod in pods]
+            for _, nombrePod, texto in heapq.merge(*generadores):
+                muestraLinea(nombrePod, texto)
+        else:
+            # En modo follow cada pod se lee en su propio hilo y las líneas se muestran según llegan
+            # (la cola está acotada para no acumular memoria si la salida es lenta)
+            cola = queue.Queue(maxsize=1000)
+
+            def sigueLog(nombrePod):
+                try:
+                    for linea in lineasLogPod(v1, nombreSitio, nombrePod, nombreContenedor, True, lineasFinales, desde):
+                        cola.put(linea)
+                except Exception as e:
+                    cola.put(("", nombrePod, f"Error leyendo el log: {e}"))
+                finally:
+                    cola.put(None)
+
+            for pod in pods:
+                threading.Thread(target=sigueLog, args=(pod,), daemon=True).start()
+
+            activos = len(pods)
+            while activos:
+                elemento = cola.get()
+                if elemento is None:
+                    activos -= 1
+                else:
+                    muestraLinea(elemento[1], elemento[2])
+
+    except KeyboardInterrupt:
+        pass
+    except Exception as e:
+        print(f"Error al leer el log: {e}")
+        errores.append(f"No se ha podido mostrar log {contenedor} de {nombreSitio}")
+        logger.error(f"No se ha podido mostrar log {contenedor} de {nombreSitio}: {e}")
+        return 500, f"No se ha podido mostrar log {contenedor} de {nombreSitio}"
+
+    logger.info(f"Log {contenedor} de {nombreSitio} mostrado correctamente")
+    return 200, f"Log {contenedor} de {nombreSitio} mostrado correctamente"
+
+@trazada("backup", operacion="backup")
+def ejecutaBackup(nombreSitio, contenedor):
+    # Función que dado un sitio y la cadena BD o Wordpress ejecuta una copia de seguridad de sus datos persistentes 
+
+    # Comprobamos que el volumen de dump puede albergar el backup antes de lanzarlo
+    directorioDump = directoriosBackup(nombreSitio, contenedor)[0][0]
+    try:
+        with tramo("comprueba-espacio"):
+            hayEspacio, necesario, libre = compruebaEspacioBackup(nombreSitio, contenedor, directorioDump, CAPACIDAD_VOLUMEN_DUMP)
+    except (OSError, sqlite3.Error) as e:
+        logger.error(f"No se ha podido comprobar el espacio libre en {directorioDump}: {e}")
+        hayEspacio = True
+    if not hayEspacio:
+        errores.append(f"Espacio insuficiente en {directorioDump}: se necesitan {formateaTamano(necesario)} y hay {formateaTamano(libre)}")
+        logger.error(f"Espacio insuficiente para el backup de {contenedor} de {nombreSitio}: necesario {necesario}, libre {libre}")
+        return 500, f"Espacio insuficiente para el backup de {contenedor} de {nombreSitio} (ejecute poda-backups)"
+
+    # Obtenemos lista de pods
+    with tramo("lista-pods"):
+        resultado, pods = listaPods(nombreSitio)
+
+    # En función del contenido del parámetro 'contenedor' ejecutaremos un script u otro
+    if resultado:
+        for pod in pods:
+            if contenedor in pod and "bd" in contenedor:
+                comando =  f"kubectl exec --stdin {pod} -n {nombreSitio} -- /bin/bash /opt/scripts/backup_database.sh"     
+            elif contenedor in pod and "wordpress" in contenedor:
+                comando = f"kubectl exec --stdin {pod} -n {nombreSitio} -- /bin/bash /opt/scripts/backup_uploads.sh"                      
+        
+        # Ejecutar el comando kubectl
+        with tramo("script-backup", contenedor=contenedor):
+            proceso = subprocess.run(comando, shell=True, capture_output=True, text=True)
+        if proceso.returncode !=0:
+          errores.append(f"No se ha podido realizar el backup de {contenedor} de {nombreSitio}")
+          logger.error(f"No se ha podido realizar el backup de {contenedor} de {nombreSitio}")
+          return 500, f"No se ha podido realizar el backup de {contenedor} de {nombreSitio}"
+        else:                          
+          # Registramos en el catálogo el fichero que acaba de generar el script
+          try:
+            with tramo("registra-catalogo"):
+              registraDirectorioBackups(nombreSitio, contenedor)
+          except (OSError, sqlite3.Error) as e:
+            logger.error(f"No se ha podido registrar en el catálogo el backup de {contenedor} de {nombreSitio}: {e}")
+          logger.info(f"Backup de {contenedor} de {nombreSitio} realizada correctamente")
+          errores.append(f"Backup de {contenedor} de {nombreSitio} realizada correctamente")
+          return 200, f"Backup de {contenedor} de {nombreSitio} realizada correctamente"
+         
+    else: 
+      return 500, f"Logs {nombreSitio} - No se puede obtener lista de pods"               
+
+def abreExecPod(nombreSitio, nombrePod, comando, stdin=False):
+    # Función que abre una sesión exec (websocket, modo binario) en un pod y devuelve el WSClient
+    # La salida se lee por canales (read_stdout/read_stderr). Se abre con websocket_call y capture_all=False porque
+    # stream() no permite desactivar la copia de toda la salida que WSClient guarda en memoria (volcados grandes)
+    apiClient = getApiClient()
+    parametros = [("command", comando), ("stderr", True), ("stdin", stdin), ("stdout", True), ("tty", False)]
+    metodo, url, cabeceras, _, _ = apiClient.param_serialize("GET", "/api/v1/namespaces/{namespace}/pods/{name}/exec",
+                                                             path_params={"namespace": nombreSitio, "name": nombrePod},
+                                                             query_params=parametros, header_params={"Accept": "*/*"},
+                                                             auth_settings=["BearerToken"], collection_formats={"command": "multi"})
+    return wsClient.websocket_call(apiClient.configuration, metodo, url, headers=cabeceras,
+                                   _preload_content=False, capture_all=False, binary=True)
+
+def buscaPod(nombreSitio, contenedor):
+    # Función que devuelve el nombre de un pod en ejecución del tipo dado ('bd' o 'wordpress') o None
+    pods = listaPodsSitio(nombreSitio, SELECTOR_CONTENEDOR[contenedor])
+    for pod in pods:
+        if pod.metadata.deletion_timestamp is None and pod.status.phase == "Running":
+            return pod.metadata.name
+    return None
+
+class EscrituraContada:
+    # Envoltorio de un fichero que cuenta los bytes escritos y calcula su SHA-256
+
+    def __init__(self, fichero):
+        self.fichero = fichero
+        self.bytes = 0
+        self.hash = hashlib.sha256()
+
+    def write(self, datos):
+        self.bytes += len(datos)
+        self.hash.update(datos)
+        return self.fichero.write(datos)
+
+    def flush(self):
+        self.fichero.flush()
+
+def abreCompresor(salida, compresion):
+    # Función que devuelve un objeto de escritura que comprime con el algoritmo dado hacia 'salida'
+    if compresion == "zstd":
+        return zstandard.ZstdCompressor(level=NIVEL_ZSTD, threads=-1).stream_writer(salida, closefd=False)
+    return gzip.GzipFile(fileobj=salida, mode="wb", compresslevel=6)
+
+def abreDescompresor(ruta):
+    # Función que abre un backup comprimido (zstd o gzip, según su extensión) para leerlo descomprimido
+    if ruta.endswith(EXTENSIONES_COMPRESION["zstd"]):
+        if not zstdDisponible():
+            raise RuntimeError("Se requiere el módulo zstandard para leer ficheros .zst")
+        return zstandard.ZstdDecompressor().stream_reader(open(ruta, "rb"), closefd=True)
+    return gzip.open(ruta, "rb")
+
+def guardaMetadatosBackup(ruta, metadatos):
+    # Función que guarda junto a un backup (<ruta>.meta) sus datos: tamaño, compresión, checksum...
+    with open(f"{ruta}.meta", "w") as file:
+        json.dump(metadatos, file)
+
+def leeMetadatosBackup(ruta):
+    # Función que devuelve los metadatos guardados junto a un backup, o None si no existen
+    try:
+        with open(f"{ruta}.meta", "r") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+@trazada("backup-streaming", operacion="backup")
+def ejecutaBackupStreaming(nombreSitio, compresion="zstd"):
+    # Función que realiza un backup de la BD de un sitio enviando la salida de mysqldump por la sesión exec
+    # directamente al almacén de backups del servidor de control, comprimiéndola a medida que llega
+    # El volcado nunca se guarda dentro del pod ni en el volumen de dump del nodo
+
+    if compresion == "zstd" and not zstdDisponible():
+        logger.warning("Módulo zstandard no disponible, se usa compresión gzip")
+        print("Módulo zstandard no disponible, se usa compresión gzip")
+        compresion = "gzip"
+
+    nombrePod = buscaPod(nombreSitio, "bd")
+    if nombrePod is None:
+        return 500, f"No se encuentra pod Base de Datos de {nombreSitio}"
+
+    directorio = f"{DIRECTORIO_BACKUPS}/{nombreSitio}/bd"
+    if not crearDirectorio(directorio):
+        return 500, errores
+
+    # Comprobamos que el almacén puede albergar el backup antes de lanzarlo
+    hayEspacio, necesario, libre = compruebaEspacioBackup(nombreSitio, "bd", directorio)
+    if not hayEspacio:
+        logger.error(f"Espacio insuficiente para el backup de bd de {nombreSitio}: necesario {necesario}, libre {libre}")
+        return 500, f"Espacio insuficiente para el backup de bd de {nombreSitio} (ejecute poda-backups)"
+
+    fecha = time.strftime('%Y%m%d%H%M%S')
+    ruta = f"{directorio}/{nombreSitio}-wordpress-DB-{fecha}.sql{EXTENSIONES_COMPRESION[compresion]}"
+    rutaParcial = f"{ruta}.parcial"
+
+    logger.info(f"Backup BD en streaming de {nombreSitio} ({nombrePod}) en {ruta}")
+    inicio = time.monotonic()
+    bytesVolcado = 0
+    mensajesError = b""
+
+    with tramo("volcado"):
+        try:
+            sesion = abreExecPod(nombreSitio, nombrePod, ["/bin/bash", "-c", COMANDO_MYSQLDUMP])
+            with open(rutaParcial, "wb") as fichero:
+                salida = EscrituraContada(fichero)
+                compresor = abreCompresor(salida, compresion)
+                while True:
+                    abierta = sesion.is_open()
+                    sesion.update(timeout=1)
+                    datos = sesion.read_stdout(timeout=0)
+                    if datos:
+                        compresor.write(datos)
+                        bytesVolcado += len(datos)
+                    mensajesError += sesion.read_stderr(timeout=0)
+                    if not abierta:
+                        break
+                compresor.close()
+            codigoRetorno = sesion.returncode
+        except Exception as e:
+            codigoRetorno = -1
+            mensajesError += str(e).encode()
+
+    if codigoRetorno != 0:
+        if os.path.exists(rutaParcial):
+            os.remove(rutaParcial)
+        errores.append(f"No se ha podido realizar el backup de bd de {nombreSitio}: {mensajesError.decode(errors='replace').strip()}")
+        logger.error(f"No se ha podido realizar el backup de bd de {nombreSitio}: {mensajesError.decode(errors='replace').strip()}")
+        return 500, f"No se ha podido realizar el backup de bd de {nombreSitio}"
+
+    os.replace(rutaParcial, ruta)
+    duracion = time.monotonic() - inicio
+    guardaMetadatosBackup(ruta, {"bytes": bytesVolcado, "comprimido": salida.bytes, "compresion": compresion, "sha256": salida.hash.hexdigest()})
+    registraBackup(nombreSitio, "bd", ruta, "streaming", salida.bytes, salida.hash.hexdigest())
+
+    velocidad = bytesVolcado / 1e6 / duracion if duracion else 0.0
+    ratio = bytesVolcado / salida.bytes if salida.bytes else 0.0
+    print(f"{bytesVolcado / 1e6:.1f} MB volcados en {duracion:.1f} s ({velocidad:.1f} MB/s), comprimidos a {salida.bytes / 1e6:.1f} MB (ratio {ratio:.1f}x, {compresion})")
+
+    logger.info(f"Backup de bd de {nombreSitio} realizada correctamente en {ruta}")
+    return 200, f"Backup de bd de {nombreSitio} realizada correctamente: {ruta}"
+
+@trazada("restaura-streaming")
+def restauraBackupStreaming(nombreSitio, ruta):
+    # Función que restaura en la BD de un sitio un backup del almacén del servidor de control,
+    # descomprimiéndolo localmente y enviándolo a mysql por la sesión exec
+
+    nombrePod = buscaPod(nombreSitio, "bd")
+    if nombrePod is None:
+        return 500, f"No se encuentra pod Base de Datos de {nombreSitio}"
+
+    # El tamaño exacto del volcado se guarda en sus metadatos; si no están hay que descomprimirlo para medirlo
+    metadatos = leeMetadatosBackup(ruta)
+    if metadatos:
+        tamano = metadatos["bytes"]
+    else:
+        tamano = 0
+        with abreDescompresor(ruta) as entrada:
+            while bloque := entrada.read(TAMANO_BLOQUE_BACKUP):
+                tamano += len(bloque)
+
+    with tramo("carga", bytes=tamano), abreDescompresor(ruta) as entrada:
+        codigoRetorno, mensajesError = enviaSQLPod(nombreSitio, nombrePod, tamano, iter(lambda: entrada.read(TAMANO_BLOQUE_BACKUP), b""))
+
+    if codigoRetorno != 0:
+        errores.append(f"No se ha podido restaurar el backup de bd de {nombreSitio}: {mensajesError.decode(errors='replace').strip()}")
+        logger.error(f"No se ha podido restaurar el backup de bd de {nombreSitio}: {mensajesError.decode(errors='replace').strip()}")
+        return 500, f"No se ha podido restaurar el backup de bd de {nombreSitio}"
+
+    logger.info(f"Backup de bd de {nombreSitio} restaurado correctamente desde {ruta}")
+    return 200, f"Backup de bd de {nombreSitio} restaurado correctamente"
+
+def enviaSQLPod(nombreSitio, nombrePod, tamano, bloques, comando=COMANDO_MYSQL):
+    # Función que envía a mysql (o al 'comando' dado), por una sesión exec en el pod de BD, los bloques de SQL dados
+    # mysql necesita fin de fichero en su entrada; 'head -c' lo provoca tras recibir exactamente 'tamano' bytes
+    # Devuelve (código de retorno, mensajes de error)
+    mensajesError = b""
+    try:
+        sesion = abreExecPod(nombreSitio, nombrePod, ["/bin/bash", "-c", f"head -c {tamano} | {comando}"], stdin=True)
+        for bloque in bloques:
+            sesion.write_stdin(bloque)
+            sesion.update(timeout=0)
+            mensajesError += sesion.read_stderr(timeout=0)
+        while sesion.is_open():
+            sesion.update(timeout=1)
+            mensajesError += sesion.read_stderr(timeout=0)
+        return sesion.returncode, mensajesError
+    except Exception as e:
+        return -1, mensajesError + str(e).encode()
+
+def cambiaContrasenaBD(nombreSitio, nombrePod, anterior, nueva):
+    # Función que cambia por exec, en el pod de BD en marcha, la contraseña de root y wordpress de 'anterior' a 'nueva'
+    # Las contraseñas viajan por la entrada de la sesión; se puede repetir si un intento anterior quedó a medias
+    if "\n" in anterior or "\n" in nueva:
+        return 500, "Las contraseñas de BD no pueden contener saltos de línea"
+    entrada = f"{anterior}\n{nueva}\n{sqlContrasenaBD(nueva)}".encode()
+    codigo, mensajesError = enviaSQLPod(nombreSitio, nombrePod, len(entrada), [entrada], COMANDO_CAMBIA_CONTRASENA_BD.format(espera=TIMEOUT_LISTO_BD))
+    if codigo != 0:
+        return 500, f"No se ha podido cambiar la contraseña de BD de {nombreSitio} (código {codigo}): {mensajesError.decode(errors='replace').strip()}"
+    logger.debug(f"Contraseña de BD de {nombreSitio} cambiada en {nombrePod}")
+    return 200, "Contraseña de BD cambiada"
+
+def directorioTablas(ruta):
+    # Función que devuelve el directorio con los trozos de un backup por tablas a partir de su manifiesto
+    return ruta[:-len(EXTENSION_TABLAS)] + ".tablas"
+
+def separaIndicesSecundarios(nombreTabla, lineas):
+    # Función que quita de un CREATE TABLE los índices secundarios (KEY, FULLTEXT, SPATIAL) para crearlos
+    # después de cargar los datos. Se mantienen la clave primaria, los UNIQUE (garantizan la integridad durante
+    # la carga) y los índices que necesita una columna AUTO_INCREMENT; si hay claves ajenas no se difiere nada
+    # Devuelve (CREATE TABLE sin esos índices, lista de ALTER TABLE para crearlos)
+    cabecera, cuerpo, cierre = lineas[0], [linea.rstrip().rstrip(",") for linea in lineas[1:-1]], lineas[-1]
+    if any(linea.lstrip().startswith("CONSTRAINT") for linea in cuerpo):
+        return "\n".join(lineas), []
+
+    autoIncremento = {coincidencia.group(1) for linea in cuerpo if (coincidencia := re.match(r"\s*`([^`]+)` .*AUTO_INCREMENT", linea))}
+    conservadas = []
+    claves = []
+    textuales = []
+    for linea in cuerpo:
+        coincidencia = re.match(r"\s*(FULLTEXT |SPATIAL )?KEY `[^`]+` \(`([^`]+)`", linea)
+        if coincidencia is None or coincidencia.group(2) in autoIncremento:
+            conservadas.append(linea)
+        elif coincidencia.group(1) == "FULLTEXT ":
+            textuales.append(linea.strip())
+        else:
+            claves.append(linea.strip())
+
+    # InnoDB solo admite crear un índice FULLTEXT por ALTER TABLE
+    alteraciones = []
+    if claves:
+        alteraciones.append(f"ALTER TABLE `{nombreTabla}` " + ", ".join(f"ADD {clave}" for clave in claves))
+    alteraciones += [f"ALTER TABLE `{nombreTabla}` ADD {clave}" for clave in textuales]
+    return "\n".join([cabecera, ",\n".join(conservadas), cierre]), alteraciones
+
+class DivisorVolcado:
+    # Reparte la salida de mysqldump (recibida por bloques) en un manifiesto con el esquema de cada tabla y
+    # trozos comprimidos con sus INSERT. El resto de sentencias (triggers, rutinas, vistas) se guardan en un
+    # trozo final que se ejecuta tras cargar los datos
+
+    def __init__(self, directorio, compresion):
+        self.directorio = directorio
+        self.compresion = compresion
+        self.pendiente = b""
+        self.tablas = {}
+        self.creando = None
+        self.trozo = None
+        self.bytes = 0
+        self.comprimido = 0
+        self.final = self.abreTrozo(f"final.sql{EXTENSIONES_COMPRESION[compresion]}")
+
+    def abreTrozo(self, nombre):
+        fichero = open(f"{self.directorio}/{nombre}", "wb")
+        salida = EscrituraContada(fichero)
+        return {"fichero": nombre, "descriptor": fichero, "salida": salida, "compresor": abreCompresor(salida, self.compresion), "bytes": 0}
+
+    def cierraTrozo(self, trozo):
+        trozo["compresor"].close()
+        trozo["descriptor"].close()
+        self.comprimido += trozo["salida"].bytes
+        return {"fichero": trozo["fichero"], "bytes": trozo["bytes"], "comprimido": trozo["salida"].bytes}
+
+    def escribeTrozo(self, trozo, linea):
+        trozo["compresor"].write(linea)
+        trozo["bytes"] += len(linea)
+        self.bytes += len(linea)
+
+    def write(self, datos):
+        self.pendiente += datos
+        *lineas, self.pendiente = self.pendiente.split(b"\n")
+        for linea in lineas:
+            self.procesaLinea(linea + b"\n")
+
+    def procesaLinea(self, linea):
+        # Definición de una tabla: se acumula hasta la línea de cierre ') ENGINE=...;'
+        if self.creando is not None:
+            self.creando[1].append(linea.decode().rstrip("\n"))
+            if linea.startswith(b")") and linea.rstrip().endswith(b";"):
+                nombreTabla, lineas = self.creando
+                lineas[-1] = lineas[-1].rstrip().rstrip(";")
+                esquema, indices = separaIndicesSecundarios(nombreTabla, lineas)
+                self.tablas[nombreTabla] = {"nombre": nombreTabla, "esquema": esquema, "indices": indices, "trozos": [], "bytes": 0}
+                self.creando = None
+            return
+
+        coincidencia = re.match(rb"CREATE TABLE `([^`]+)` \(", linea)
+        if coincidencia:
+            self.creando = (coincidencia.group(1).decode(), [linea.decode().rstrip("\n")])
+            return
+
+        coincidencia = re.match(rb"INSERT INTO `([^`]+)` ", linea)
+        if coincidencia:
+            tabla = self.tablas[coincidencia.group(1).decode()]
+            if self.trozo is not None and (self.trozo["tabla"] is not tabla or self.trozo["bytes"] >= TAMANO_TROZO_TABLA):
+                self.trozo["tabla"]["trozos"].append(self.cierraTrozo(self.trozo))
+                self.trozo = None
+            if self.trozo is None:
+                indice = list(self.tablas).index(tabla["nombre"])
+                self.trozo = self.abreTrozo(f"{indice:04d}-{len(tabla['trozos']):04d}.sql{EXTENSIONES_COMPRESION[self.compresion]}")
+                self.trozo["tabla"] = tabla
+            self.escribeTrozo(self.trozo, linea)
+            tabla["bytes"] += len(linea)
+            return
+
+        # Los DROP TABLE de cada tabla se generan en la restauración antes de crearla
+        if not re.match(rb"DROP TABLE IF EXISTS `[^`]+`;", linea) and linea.strip():
+            self.escribeTrozo(self.final, linea)
+
+    def cierra(self):
+        # Termina los trozos abiertos y devuelve la parte del manifiesto con las tablas y el trozo final
+        if self.pendiente:
+            self.procesaLinea(self.pendiente)
+            self.pendiente = b""
+        if self.trozo is not None:
+            self.trozo["tabla"]["trozos"].append(self.cierraTrozo(self.trozo))
+            self.trozo = None
+        final = self.cierraTrozo(self.final)
+        return {"tablas": list(self.tablas.values()), "final": final}
+
+    def descarta(self):
+        # Cierra los ficheros abiertos sin completar el backup
+        for trozo in (self.trozo, self.final):
+            if trozo is not None and not trozo["descriptor"].closed:
+                trozo["descriptor"].close()
+
+@trazada("backup-tablas", operacion="backup")
+def ejecutaBackupTablas(nombreSitio, compresion="zstd"):
+    # Función que realiza un backup de la BD de un sitio en formato por tablas: un único volcado consistente
+    # (mysqldump --single-transaction) recibido por la sesión exec y repartido en el servidor de control en
+    # un manifiesto (<sitio>-wordpress-DB-<fecha>.tablas.json) y un directorio con los trozos de cada tabla
+
+    if compresion == "zstd" and not zstdDisponible():
+        logger.warning("Módulo zstandard no disponible, se usa compresión gzip")
+        print("Módulo zstandard no disponible, se usa compresión gzip")
+        compresion = "gzip"
+
+    nombrePod = buscaPod(nombreSitio, "bd")
+    if nombrePod is None:
+        return 500, f"No se encuentra pod Base de Datos de {nombreSitio}"
+
+    directorio = f"{DIRECTORIO_BACKUPS}/{nombreSitio}/bd"
+    if not crearDirectorio(directorio):
+        return 500, errores
+
+    hayEspacio, necesario, libre = compruebaEspacioBackup(nombreSitio, "bd", directorio)
+    if not hayEspacio:
+        logger.error(f"Espacio insuficiente para el backup de bd de {nombreSitio}: necesario {necesario}, libre {libre}")
+        return 500, f"Espacio insuficiente para el backup de bd de {nombreSitio} (ejecute poda-backups)"
+
+    fecha = time.strftime('%Y%m%d%H%M%S')
+    ruta = f"{directorio}/{nombreSitio}-wordpress-DB-{fecha}{EXTENSION_TABLAS}"
+    directorioTrozos = directorioTablas(ruta)
+    os.makedirs(directorioTrozos)
+
+    logger.info(f"Backup BD por tablas de {nombreSitio} ({nombrePod}) en {ruta}")
+    inicio = time.monotonic()
+    mensajesError = b""
+    divisor = DivisorVolcado(directorioTrozos, compresion)
+
+    with tramo("volcado"):
+        try:
+            sesion = abreExecPod(nombreSitio, nombrePod, ["/bin/bash", "-c", COMANDO_MYSQLDUMP_TABLAS])
+            while True:
+                abierta = sesion.is_open()
+                sesion.update(timeout=1)
+                datos = sesion.read_stdout(timeout=0)
+                if datos:
+                    divisor.write(datos)
+                mensajesError += sesion.read_stderr(timeout=0)
+                if not abierta:
+                    break
+            manifiesto = divisor.cierra()
+            codigoRetorno = sesion.returncode
+        except Exception as e:
+            divisor.descarta()
+            codigoRetorno = -1
+            mensajesError += str(e).encode()
+
+    if codigoRetorno != 0:
+        shutil.rmtree(directorioTrozos, ignore_errors=True)
+        errores.append(f"No se ha podido realizar el backup de bd de {nombreSitio}: {mensajesError.decode(errors='replace').strip()}")
+        logger.error(f"No se ha podido realizar el backup de bd de {nombreSitio}: {mensajesError.decode(errors='replace').strip()}")
+        return 500, f"No se ha podido realizar el backup de bd de {nombreSitio}"
+
+    duracion = time.monotonic() - inicio
+    manifiesto.update({
+        "version": 1,
+        "sitio": nombreSitio,
+        "fecha": fecha,
+        "compresion": compresion,
+        "estadisticas": {"bytes": divisor.bytes, "comprimido": divisor.comprimido, "tablas": len(manifiesto["tablas"]), "segundos": round(duracion, 3)}
+    })
+    with open(f"{ruta}.parcial", "w") as file:
+        json.dump(manifiesto, file)
+    os.replace(f"{ruta}.parcial", ruta)
+    registraBackup(nombreSitio, "bd", ruta, "tablas", divisor.comprimido)
+
+    trozos = sum(len(tabla["trozos"]) for tabla in manifiesto["tablas"])
+    velocidad = divisor.bytes / 1e6 / duracion if duracion else 0.0
+    print(f"{len(manifiesto['tablas'])} tablas en {trozos} trozos: {divisor.bytes / 1e6:.1f} MB volcados en {duracion:.1f} s ({velocidad:.1f} MB/s), comprimidos a {divisor.comprimido / 1e6:.1f} MB ({compresion})")
+
+    logger.info(f"Backup de bd de {nombreSitio} realizada correctamente en {ruta}")
+    return 200, f"Backup de bd de {nombreSitio} realizada correctamente: {ruta}"
+
+def bloquesTrozo(ruta):
+    # Función que devuelve el contenido descomprimido de un trozo de un backup por tablas, por bloques
+    with abreDescompresor(ruta) as entrada:
+        while bloque := entrada.read(TAMANO_BLOQUE_BACKUP):
+            yield bloque
+
+def cargaTrozo(nombreSitio, nombrePod, directorio, trozo):
+    # Función que carga un trozo de datos en su propia conexión mysql, en una única transacción
+    def bloques():
+        yield PRELUDIO_CARGA
+        yield from bloquesTrozo(f"{directorio}/{trozo['fichero']}")
+        yield EPILOGO_CARGA
+    with tramo("carga-trozo", fichero=trozo["fichero"], bytes=trozo["bytes"]):
+        return enviaSQLPod(nombreSitio, nombrePod, len(PRELUDIO_CARGA) + trozo["bytes"] + len(EPILOGO_CARGA), bloques())
+
+def ejecutaSQL(nombreSitio, nombrePod, sentencias):
+    # Función que ejecuta en la BD del sitio una lista de sentencias SQL (sin ';' final) en una sesión
+    sql = PRELUDIO_CARGA + "".join(f"{sentencia};\n" for sentencia in sentencias).encode() + EPILOGO_CARGA
+    with tramo("sql", sentencias=len(sentencias)):
+        return enviaSQLPod(nombreSitio, nombrePod, len(sql), [sql])
+
+@trazada("restaura-tablas")
+def restauraBackupTablas(nombreSitio, ruta, paralelo=PARALELO_RESTAURACION):
+    # Función que restaura un backup por tablas cargando los trozos en paralelo por varias conexiones
+    # Orden: esquema (tablas sin índices secundarios), datos en paralelo, índices secundarios de cada tabla
+    # en cuanto termina su carga, y por último triggers, rutinas y vistas
+
+    nombrePod = buscaPod(nombreSitio, "bd")
+    if nombrePod is None:
+        return 500, f"No se encuentra pod Base de Datos de {nombreSitio}"
+
+    with open(ruta, "r") as file:
+        manifiesto = json.load(file)
+    directorio = directorioTablas(ruta)
+    tablas = manifiesto["tablas"]
+    inicio = time.monotonic()
+    fallos = []
+
+    logger.info(f"Restauración por tablas de {ruta} en {nombreSitio} ({nombrePod}), {len(tablas)} tablas, paralelo {paralelo}")
+
+    sentencias = []
+    for tabla in tablas:
+        sentencias += [f"DROP TABLE IF EXISTS `{tabla['nombre']}`", tabla["esquema"]]
+    with tramo("esquema", tablas=len(tablas)):
+        codigoRetorno, mensajesError = ejecutaSQL(nombreSitio, nombrePod, sentencias)
+    if codigoRetorno != 0:
+        fallos.append(f"esquema: {mensajesError.decode(errors='replace').strip()}")
+    else:
+        print(f"Esquema de {len(tablas)} tablas creado en {time.monotonic() - inicio:.1f} s")
+
+        # Las tablas más grandes se empiezan antes para que no queden al final como cola de la restauración
+        pendientes = {tabla["nombre"]: len(tabla["trozos"]) for tabla in tablas}
+        iniciosTabla = {tabla["nombre"]: time.monotonic() for tabla in tablas}
+        cargaTrozoTraza, ejecutaSQLTraza = conTraza(cargaTrozo), conTraza(ejecutaSQL)
+        with tramo("datos", paralelo=paralelo), ThreadPoolExecutor(max_workers=paralelo) as pool:
+            trabajos = {}
+            for tabla in sorted(tablas, key=lambda tabla: tabla["bytes"], reverse=True):
+                for trozo in tabla["trozos"]:
+                    trabajos[pool.submit(cargaTrozoTraza, nombreSitio, nombrePod, directorio, trozo)] = ("datos", tabla)
+            for tabla in tablas:
+                if not tabla["trozos"] and tabla["indices"]:
+                    trabajos[pool.submit(ejecutaSQLTraza, nombreSitio, nombrePod, tabla["indices"])] = ("indices", tabla)
+
+            while trabajos and not fallos:
+                terminado = next(iter(as_completed(list(trabajos))))
+                fase, tabla = trabajos.pop(terminado)
+                codigoRetorno, mensajesError = terminado.result()
+                nombreTabla = tabla["nombre"]
+                if codigoRetorno != 0:
+                    fallos.append(f"{nombreTabla} ({fase}): {mensajesError.decode(errors='replace').strip()}")
+                    break
+                duracion = time.monotonic() - iniciosTabla[nombreTabla]
+                if fase == "indices":
+                    print(f"{nombreTabla:<40} {len(tabla['indices'])} índices creados ({duracion:.1f} s)")
+                    continue
+                pendientes[nombreTabla] -= 1
+                cargados = len(tabla["trozos"]) - pendientes[nombreTabla]
+                print(f"{nombreTabla:<40} trozo {cargados}/{len(tabla['trozos'])} cargado ({formateaTamano(tabla['bytes'])}, {duracion:.1f} s)")
+                if pendientes[nombreTabla] == 0 and tabla["indices"]:
+                    trabajos[pool.submit(ejecutaSQLTraza, nombreSitio, nombrePod, tabla["indices"])] = ("indices", tabla)
+
+            if fallos:
+                pool.shutdown(wait=True, cancel_futures=True)
+
+    if not fallos and manifiesto["final"]["bytes"]:
+        with tramo("triggers-rutinas"):
+            codigoRetorno, mensajesError = enviaSQLPod(nombreSitio, nombrePod, manifiesto["final"]["bytes"], bloquesTrozo(f"{directorio}/{manifiesto['final']['fichero']}"))
+        if codigoRetorno != 0:
+            fallos.append(f"triggers y rutinas: {mensajesError.decode(errors='replace').strip()}")
+
+    if fallos:
+        errores.append(f"No se ha podido restaurar el backup de bd de {nombreSitio}: {fallos[0]}")
+        logger.error(f"No se ha podido restaurar el backup de bd de {nombreSitio}: {fallos[0]}")
+        return 500, f"No se ha podido restaurar el backup de bd de {nombreSitio}"
+
+    duracion = time.monotonic() - inicio
+    logger.info(f"Backup de bd de {nombreSitio} restaurado correctamente desde {ruta} en {duracion:.1f} s")
+    return 200, f"Backup de bd de {nombreSitio} restaurado correctamente ({len(tablas)} tablas en {duracion:.1f} s)"
+
+def rutaObjeto(hashTrozo):
+    # Función que devuelve la ruta de un trozo en el almacén de objetos (repartidos en subdirectorios por prefijo)
+    return f"{DIRECTORIO_OBJETOS}/{hashTrozo[:2]}/{hashTrozo}"
+
+def guardaTrozosFichero(ruta, estadisticas):
+    # Función que trocea un fichero, guarda en el almacén los trozos que aún no existan y devuelve sus hashes
+    trozos = []
+    with open(ruta, "rb") as fichero:
+        while trozo := fichero.read(TAMANO_TROZO_SNAPSHOT):
+            hashTrozo = hashlib.sha256(trozo).hexdigest()
+            trozos.append(hashTrozo)
+            destino = rutaObjeto(hashTrozo)
+            if os.path.exists(destino):
+                estadisticas["deduplicados"] += len(trozo)
+                continue
+            os.makedirs(os.path.dirname(destino), exist_ok=True)
+            temporal = f"{destino}.{os.getpid()}.{threading.get_ident()}"
+            with open(temporal, "wb") as salida:
+                salida.write(trozo)
+            os.replace(temporal, destino)
+            estadisticas["escritos"] += len(trozo)
+    return trozos
+
+def ultimoSnapshot(nombreSitio):
+    # Función que devuelve la ruta del snapshot de uploads más reciente de un sitio, o None
+    directorio = f"{DIRECTORIO_BACKUPS}/{nombreSitio}/wp"
+    try:
+        snapshots = sorted(nombre for nombre in os.listdir(directorio) if nombre.endswith(EXTENSION_SNAPSHOT))
+    except OSError:
+        return None
+    return f"{directorio}/{snapshots[-1]}" if snapshots else None
+
+@trazada("snapshot-uploads", operacion="backup")
+def ejecutaSnapshotUploads(nombreSitio):
+    # Función que realiza un snapshot incremental de /volumenes/<sitio>/wp/uploads
+    # Los ficheros se guardan troceados en un almacén direccionado por contenido compartido por todos los
+    # sitios, de modo que los trozos idénticos se guardan una sola vez. Los ficheros con el mismo tamaño y
+    # fecha de modificación que en el snapshot anterior no se leen. El snapshot es un manifiesto JSON
+
+    origen = f"{DIRECTORIO_VOLUMENES}/{nombreSitio}/wp/uploads"
+    if not os.path.isdir(origen):
+        return 500, f"No existe el directorio de uploads de {nombreSitio}"
+
+    directorio = f"{DIRECTORIO_BACKUPS}/{nombreSitio}/wp"
+    if not crearDirectorio(directorio):
+        return 500, errores
+
+    # Ficheros del snapshot anterior, para omitir los que no han cambiado
+    anterior = {}
+    rutaAnterior = ultimoSnapshot(nombreSitio)
+    if rutaAnterior:
+        with open(rutaAnterior, "r") as file:
+            anterior = json.load(file)["ficheros"]
+
+    inicio = time.monotonic()
+    estadisticas = {"ficheros": 0, "sinCambios": 0, "bytes": 0, "escritos": 0, "deduplicados": 0}
+    ficheros = {}
+    directorios = []
+
+    try:
+        for raiz, subdirectorios, nombres in os.walk(origen):
+            subdirectorios.sort()
+            for subdirectorio in subdirectorios:
+                directorios.append(os.path.relpath(os.path.join(raiz, subdirectorio), origen))
+            for nombre in sorted(nombres):
+                ruta = os.path.join(raiz, nombre)
+                relativa = os.path.relpath(ruta, origen)
+                info = os.lstat(ruta)
+                if not stat.S_ISREG(info.st_mode):
+                    continue
+
+                estadisticas["ficheros"] += 1
+                estadisticas["bytes"] += info.st_size
+                previo = anterior.get(relativa)
+                if previo and previo["tamano"] == info.st_size and previo["mtime_ns"] == info.st_mtime_ns:
+                    trozos = previo["trozos"]
+                    estadisticas["sinCambios"] += 1
+                else:
+                    trozos = guardaTrozosFichero(ruta, estadisticas)
+
+                ficheros[relativa] = {"tamano": info.st_size, "mtime_ns": info.st_mtime_ns, "modo": info.st_mode & 0o7777,
+                                      "uid": info.st_uid, "gid": info.st_gid, "trozos": trozos}
+    except OSError as e:
+        errores.append(f"No se ha podido realizar el snapshot de uploads de {nombreSitio}: {str(e)}")
+        logger.error(f"No se ha podido realizar el snapshot de uploads de {nombreSitio}: {str(e)}")
+        return 500, f"No se ha podido realizar el snapshot de uploads de {nombreSitio}"
+
+    fecha = time.strftime('%Y%m%d%H%M%S')
+    ruta = f"{directorio}/{nombreSitio}-UPLOADS-WP-{fecha}{EXTENSION_SNAPSHOT}"
+    manifiesto = {"sitio": nombreSitio, "fecha": fecha, "tamanoTrozo": TAMANO_TROZO_SNAPSHOT,
+                  "directorios": directorios, "ficheros": ficheros, "estadisticas": estadisticas}
+    with open(f"{ruta}.parcial", "w") as file:
+        json.dump(manifiesto, file)
+    os.replace(f"{ruta}.parcial", ruta)
+    registraBackupAlmacen(nombreSitio, "wordpress", ruta)
+
+    duracion = time.monotonic() - inicio
+    print(f"{estadisticas['ficheros']} ficheros ({estadisticas['bytes'] / 1e6:.1f} MB), {estadisticas['sinCambios']} sin cambios; "
+          f"{estadisticas['escritos'] / 1e6:.1f} MB nuevos, {estadisticas['deduplicados'] / 1e6:.1f} MB deduplicados en {duracion:.1f} s")
+
+    logger.info(f"Snapshot de uploads de {nombreSitio} realizado correctamente en {ruta}")
+    return 200, f"Backup de wordpress de {nombreSitio} realizada correctamente: {ruta}"
+
+@trazada("restaura-snapshot")
+def restauraSnapshotUploads(nombreSitio, ruta):
+    # Función que restaura los uploads de un sitio a partir de un manifiesto de snapshot
+    # Los ficheros que ya coinciden en tamaño y fecha de modificación no se reescriben
+
+    destino = f"{DIRECTORIO_VOLUMENES}/{nombreSitio}/wp/uploads"
+    try:
+        with open(ruta, "r") as file:
+            manifiesto = json.load(file)
+
+        for relativa in manifiesto["directorios"]:
+            os.makedirs(os.path.join(destino, relativa), exist_ok=True)
+
+        restaurados = 0
+        for relativa, datos in manifiesto["ficheros"].items():
+            rutaFichero = os.path.join(destino, relativa)
+            try:
+                info = os.stat(rutaFichero)
+                if info.st_size == datos["tamano"] and info.st_mtime_ns == datos["mtime_ns"]:
+                    continue
+            except FileNotFoundError:
+                os.makedirs(os.path.dirname(rutaFichero), exist_ok=True)
+
+            with open(rutaFichero, "wb") as salida:
+                for hashTrozo in datos["trozos"]:
+                    with open(rutaObjeto(hashTrozo), "rb") as trozo:
+                        salida.write(trozo.read())
+            os.chmod(rutaFichero, datos["modo"])
+            os.chown(rutaFichero, datos["uid"], datos["gid"])
+            os.utime(rutaFichero, ns=(datos["mtime_ns"], datos["mtime_ns"]))
+            restaurados += 1
+    except (OSError, ValueError, KeyError) as e:
+        errores.append(f"No se ha podido restaurar el snapshot de uploads de {nombreSitio}: {str(e)}")
+        logger.error(f"No se ha podido restaurar el snapshot de uploads de {nombreSitio}: {str(e)}")
+        return 500, f"No se ha podido restaurar el backup de wordpress de {nombreSitio}"
+
+    logger.info(f"Snapshot {ruta} restaurado en {nombreSitio} ({restaurados} ficheros)")
+    return 200, f"Backup de wordpress de {nombreSitio} restaurado correctamente ({restaurados} ficheros restaurados)"
+
+def abreCatalogo():
+    # Función que abre (y crea si no existe) el catálogo de backups
+    os.makedirs(DIRECTORIO_BACKUPS, exist_ok=True)
+    conexion = sqlite3.connect(FICHERO_CATALOGO, timeout=30)
+    conexion.row_factory = sqlite3.Row
+    conexion.execute("PRAGMA journal_mode=WAL")
+    conexion.executescript(ESQUEMA_CATALOGO)
+    return conexion
+
+def marcaBackup(ruta):
+    # Función que devuelve la fecha (epoch) de un backup a partir de su nombre (...-AAAAMMDDhhmmss...) o de su mtime
+    coincidencia = re.search(r"-(\d{14})\.", os.path.basename(ruta))
+    if coincidencia:
+        return int(time.mktime(time.strptime(coincidencia.group(1), "%Y%m%d%H%M%S")))
+    return int(os.stat(ruta).st_mtime)
+
+def compresionBackup(ruta):
+    # Función que deduce la compresión de un backup a partir de su extensión
+    if ruta.endswith(EXTENSION_SNAPSHOT):
+        return "dedup"
+    if ruta.endswith(EXTENSION_TABLAS):
+        with open(ruta, "r") as file:
+            return json.load(file)["compresion"]
+    if ruta.endswith(EXTENSIONES_COMPRESION["zstd"]):
+        return "zstd"
+    if ruta.endswith((".gz", ".tgz")):
+        return "gzip"
+    return "ninguna"
+
+def checksumFichero(ruta):
+    # Función que calcula el SHA-256 de un fichero leyéndolo por bloques
+    hashFichero = hashlib.sha256()
+    with open(ruta, "rb") as fichero:
+        while bloque := fichero.read(TAMANO_BLOQUE_BACKUP):
+            hashFichero.update(bloque)
+    return hashFichero.hexdigest()
+
+def registraBackup(nombreSitio, contenedor, ruta, formato, tamano=None, checksum=None, conexion=None):
+    # Función que añade (o actualiza) un backup en el catálogo
+    # Si no se indican tamaño o checksum se obtienen del propio fichero
+    if tamano is None:
+        tamano = os.path.getsize(ruta)
+    if checksum is None:
+        checksum = checksumFichero(ruta)
+
+    propia = conexion is None
+    if propia:
+        conexion = abreCatalogo()
+    try:
+        with conexion:
+            conexion.execute(
+                "INSERT OR REPLACE INTO backups (ruta, sitio, tipo, fichero, formato, marca, tamano, compresion, checksum) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (ruta, nombreSitio, contenedor, os.path.basename(ruta), formato, marcaBackup(ruta), tamano, compresionBackup(ruta), checksum)
+            )
+    finally:
+        if propia:
+            conexion.close()
+
+def registraBackupAlmacen(nombreSitio, contenedor, ruta, conexion=None):
+    # Función que registra un backup del almacén del servidor de control usando sus metadatos
+    if ruta.endswith(EXTENSION_SNAPSHOT):
+        with open(ruta, "r") as file:
+            tamano = json.load(file)["estadisticas"]["bytes"]
+        registraBackup(nombreSitio, contenedor, ruta, "snapshot", tamano, None, conexion)
+    elif ruta.endswith(EXTENSION_TABLAS):
+        with open(ruta, "r") as file:
+            tamano = json.load(file)["estadisticas"]["comprimido"]
+        registraBackup(nombreSitio, contenedor, ruta, "tablas", tamano, None, conexion)
+    else:
+        metadatos = leeMetadatosBackup(ruta) or {}
+        registraBackup(nombreSitio, contenedor, ruta, "streaming", metadatos.get("comprimido"), metadatos.get("sha256"), conexion)
+
+def directoriosBackup(nombreSitio, contenedor):
+    # Función que devuelve los directorios de backup de un sitio: [(directorio, formato)]
+    subdirectorio = "bd" if "bd" in contenedor else "wp"
+    return [(f"{DIRECTORIO_VOLUMENES}/{nombreSitio}/{subdirectorio}/dump", "dump"),
+            (f"{DIRECTORIO_BACKUPS}/{nombreSitio}/{subdirectorio}", "almacen")]
+
+def registraDirectorioBackups(nombreSitio, contenedor, conexion=None):
+    # Función que registra en el catálogo los backups de un sitio que aún no estén en él
+    # Devuelve el número de backups nuevos y el conjunto de rutas existentes en disco
+    propia = conexion is None
+    if propia:
+        conexion = abreCatalogo()
+
+    nuevos = 0
+    existentes = set()
+    try:
+        conocidos = {fila["ruta"] for fila in conexion.execute("SELECT ruta FROM backups WHERE sitio = ? AND tipo = ?", (nombreSitio, contenedor))}
+        for directorio, formato in directoriosBackup(nombreSitio, contenedor):
+            if not os.path.isdir(directorio):
+                continue
+            for nombre in os.listdir(directorio):
+                ruta = f"{directorio}/{nombre}"
+                if nombre.endswith((".meta", ".parcial")) or not os.path.isfile(ruta):
+                    continue
+                existentes.add(ruta)
+                if ruta in conocidos:
+                    continue
+                if formato == "dump":
+                    registraBackup(nombreSitio, contenedor, ruta, "dump", conexion=conexion)
+                else:
+                    registraBackupAlmacen(nombreSitio, contenedor, ruta, conexion)
+                nuevos += 1
+    finally:
+        if propia:
+            conexion.close()
+    return nuevos, existentes
+
+def reindexaCatalogo(nombreSitio=None):
+    # Función que reconstruye el catálogo de backups a partir de los ficheros en disco (de un sitio o de todos)
+    # Añade los backups que falten y elimina las entradas cuyo fichero ya no existe
+    if nombreSitio:
+        sitios = [nombreSitio]
+    else:
+        sitios = set()
+        for directorio in (DIRECTORIO_VOLUMENES, DIRECTORIO_BACKUPS):
+            if os.path.isdir(directorio):
+                sitios.update(nombre for nombre in os.listdir(directorio) if os.path.isdir(f"{directorio}/{nombre}") and nombre != "objetos")
+        sitios = sorted(sitios)
+
+    conexion = abreCatalogo()
+    nuevos = eliminados = 0
+    try:
+        for sitio in sitios:
+            for contenedor in ("bd", "wordpress"):
+                cantidad, existentes = registraDirectorioBackups(sitio, contenedor, conexion)
+                nuevos += cantidad
+                with conexion:
+                    for fila in conexion.execute("SELECT ruta FROM backups WHERE sitio = ? AND tipo = ?", (sitio, contenedor)).fetchall():
+                        if fila["ruta"] not in existentes:
+                            conexion.execute("DELETE FROM backups WHERE ruta = ?", (fila["ruta"],))
+                            eliminados += 1
+    finally:
+        conexion.close()
+
+    logger.info(f"Catálogo de backups reindexado: {len(sitios)} sitios, {nuevos} nuevos, {eliminados} eliminados")
+    return 200, f"Catálogo reindexado: {len(sitios)} sitios, {nuevos} backups añadidos, {eliminados} eliminados"
+
+def consultaBackups(nombreSitio, contenedor, ultimo=False, anterioresA=None):
+    # Función que consulta el catálogo de backups
+    # nombreSitio None consulta toda la flota; 'ultimo' devuelve solo el más reciente de cada sitio;
+    # 'anterioresA' (segundos) devuelve solo los backups con más antigüedad que la dada
+    condiciones = ["tipo = ?"]
+    valores = [contenedor]
+    if nombreSitio:
+        condiciones.append("sitio = ?")
+        valores.append(nombreSitio)
+    if anterioresA is not None:
+        condiciones.append("marca < ?")
+        valores.append(int(time.time()) - anterioresA)
+
+    consulta = f"SELECT * FROM backups WHERE {' AND '.join(condiciones)}"
+    if ultimo:
+        consulta = f"SELECT * FROM (SELECT *, ROW_NUMBER() OVER (PARTITION BY sitio ORDER BY marca DESC) AS orden FROM ({consulta})) WHERE orden = 1"
+
+    conexion = abreCatalogo()
+    try:
+        return conexion.execute(f"{consulta} ORDER BY sitio, marca", valores).fetchall()
+    finally:
+        conexion.close()
+
+def registraOperacion(operacion, variante, argumento, duracion, codigoResultado):
+    # Función que guarda en el catálogo la duración de una operación (despliegue, backup, restauración...): una fila
+    # en el historial y un incremento en los contadores de las cubetas que la contienen (la '+Inf' lleva la suma)
+    # Un fallo al registrarla no debe afectar a la operación, solo se anota en el log
+    resultado = "ok" if codigoResultado in (0, 200) else "error"
+    cubetas = [(str(cubeta), 0.0) for cubeta in CUBETAS_DURACION if duracion <= cubeta] + [("+Inf", duracion)]
+    try:
+        conexion = abreCatalogo()
+        try:
+            with conexion:
+                conexion.execute("INSERT INTO operaciones (operacion, variante, argumento, marca, duracion, resultado) VALUES (?, ?, ?, ?, ?, ?)",
+                                 (operacion, variante, str(argumento), int(time.time()), duracion, resultado))
+                conexion.executemany("INSERT INTO duraciones (operacion, variante, resultado, cubeta, numero, suma) VALUES (?, ?, ?, ?, 1, ?) "
+                                     "ON CONFLICT DO UPDATE SET numero = numero + 1, suma = suma + excluded.suma",
+                                     [(operacion, variante, resultado, cubeta, suma) for cubeta, suma in cubetas])
+        finally:
+            conexion.close()
+    except (OSError, sqlite3.Error) as e:
+        logger.warning(f"No se ha podido registrar la duración de {operacion} {argumento}: {e}")
+
+def formateaTamano(tamano):
+    # Función que devuelve un tamaño en bytes en formato legible
+    for unidad in ("B", "KB", "MB", "GB"):
+        if tamano < 1024:
+            return f"{tamano:.0f}{unidad}" if unidad == "B" else f"{tamano:.1f}{unidad}"
+        tamano /= 1024
+    return f"{tamano:.1f}TB"
+
+def leePoliticaRetencion(nombreSitio, ajustes=None):
+    # Función que devuelve la política de retención de un sitio: valores por defecto, fichero de políticas
+    # (defecto de la flota y valores del sitio) y, por último, los ajustes dados en la línea de comandos
+    politica = dict(POLITICA_RETENCION)
+    try:
+        with open(FICHERO_POLITICAS, "r") as file:
+            politicas = json.load(file)
+        politica.update(politicas.get("defecto", {}))
+        politica.update(politicas.get("sitios", {}).get(nombreSitio, {}))
+    except FileNotFoundError:
+        pass
+    politica.update(ajustes or {})
+    return politica
+
+def seleccionaRetenidos(backups, politica):
+    # Función que aplica la rotación abuelo-padre-hijo a una lista de backups (filas del catálogo)
+    # Conserva el más reciente de cada uno de los últimos N días, semanas y meses, y siempre el último backup
+    periodos = {
+        "diarias": lambda fecha: fecha.strftime("%Y-%m-%d"),
+        "semanales": lambda fecha: "%d-%02d" % fecha.isocalendar()[:2],
+        "mensuales": lambda fecha: fecha.strftime("%Y-%m")
+    }
+    vistos = {periodo: set() for periodo in periodos}
+    retenidos = set()
+
+    for posicion, backup in enumerate(sorted(backups, key=lambda fila: fila["marca"], reverse=True)):
+        fecha = datetime.datetime.fromtimestamp(backup["marca"])
+        if posicion == 0:
+            retenidos.add(backup["ruta"])
+        for periodo, clave in periodos.items():
+            valor = clave(fecha)
+            if valor not in vistos[periodo] and len(vistos[periodo]) < politica.get(periodo, 0):
+                vistos[periodo].add(valor)
+                retenidos.add(backup["ruta"])
+    return retenidos
+
+def trozosReferenciados(excluidos=()):
+    # Función que devuelve los trozos del almacén de objetos referenciados por los snapshots del catálogo
+    conexion = abreCatalogo()
+    try:
+        manifiestos = [fila["ruta"] for fila in conexion.execute("SELECT ruta FROM backups WHERE formato = 'snapshot'")]
+    finally:
+        conexion.close()
+
+    referenciados = set()
+    for ruta in manifiestos:
+        if ruta in excluidos:
+            continue
+        with open(ruta, "r") as file:
+            for datos in json.load(file)["ficheros"].values():
+                referenciados.update(datos["trozos"])
+    return referenciados
+
+def limpiaObjetos(excluidos, simulacion):
+    # Función que elimina (o, en simulación, solo cuenta) los trozos que dejan de estar referenciados
+    # al quitar los snapshots 'excluidos'. Devuelve los bytes liberados
+    referenciados = trozosReferenciados(excluidos)
+    liberados = 0
+    if not os.path.isdir(DIRECTORIO_OBJETOS):
+        return 0
+    for prefijo in os.listdir(DIRECTORIO_OBJETOS):
+        for hashTrozo in os.listdir(f"{DIRECTORIO_OBJETOS}/{prefijo}"):
+            if hashTrozo not in referenciados:
+                ruta = f"{DIRECTORIO_OBJETOS}/{prefijo}/{hashTrozo}"
+                liberados += os.path.getsize(ruta)
+                if not simulacion:
+                    os.remove(ruta)
+    return liberados
+
+def podaBackupsSitio(nombreSitio, contenedores, ajustes, simulacion):
+    # Función que elimina los backups de un sitio que no retiene su política
+    # Devuelve (nombre, backups eliminados, bytes liberados, snapshots eliminados, errores)
+    politica = leePoliticaRetencion(nombreSitio, ajustes)
+    eliminados = liberados = 0
+    snapshots = []
+    fallos = []
+
+    conexion = abreCatalogo()
+    try:
+        for contenedor in contenedores:
+            backups = conexion.execute("SELECT * FROM backups WHERE sitio = ? AND tipo = ?", (nombreSitio, contenedor)).fetchall()
+            retenidos = seleccionaRetenidos(backups, politica)
+            for backup in backups:
+                if backup["ruta"] in retenidos:
+                    continue
+                if backup["formato"] == "snapshot":
+                    snapshots.append(backup["ruta"])
+                eliminados += 1
+                if backup["formato"] == "tablas":
+                    liberados += backup["tamano"]
+                else:
+                    liberados += os.path.getsize(backup["ruta"]) if os.path.exists(backup["ruta"]) else 0
+                if simulacion:
+                    continue
+                try:
+                    for ruta in (backup["ruta"], f"{backup['ruta']}.meta"):
+                        if os.path.exists(ruta):
+                            os.remove(ruta)
+                    if backup["formato"] == "tablas":
+                        shutil.rmtree(directorioTablas(backup["ruta"]), ignore_errors=True)
+                    with conexion:
+                        conexion.execute("DELETE FROM backups WHERE ruta = ?", (backup["ruta"],))
+                except OSError as e:
+                    fallos.append(f"{backup['fichero']}: {str(e)}")
+    finally:
+        conexion.close()
+
+    return nombreSitio, eliminados, liberados, snapshots, fallos
+
+def podaOperaciones(ajustes=None, simulacion=False):
+    # Función que elimina del historial de operaciones del catálogo las anteriores al horizonte de la política de
+    # retención de la flota (tantos meses como backups mensuales conserva). Los contadores de los histogramas de las
+    # métricas no se tocan. Devuelve el número de operaciones eliminadas (o que se eliminarían en simulación)
+    politica = leePoliticaRetencion(None, ajustes)
+    limite = int(time.time()) - politica.get("mensuales", 0) * 31 * 86400
+    conexion = abreCatalogo()
+    try:
+        with conexion:
+            if simulacion:
+                return conexion.execute("SELECT COUNT(*) FROM operaciones WHERE marca < ?", (limite,)).fetchone()[0]
+            return conexion.execute("DELETE FROM operaciones WHERE marca < ?", (limite,)).rowcount
+    finally:
+        conexion.close()
+
+def podaBackups(nombresSitios, contenedores, ajustes=None, simulacion=False, paralelo=PARALELO_LOTE):
+    # Función que aplica la política de retención a los backups de varios sitios (None = toda la flota, y en ese
+    # caso también al historial de operaciones del catálogo)
+    # La poda de cada sitio se ejecuta en paralelo; en simulación solo se informa de lo que se liberaría
+    podaHistorial = nombresSitios is None
+
+    if nombresSitios is None:
+        conexion = abreCatalogo()
+        try:
+            nombresSitios = [fila["sitio"] for fila in conexion.execute("SELECT DISTINCT sitio FROM backups ORDER BY sitio")]
+        finally:
+            conexion.close()
+
+    with ThreadPoolExecutor(max_workers=paralelo) as pool:
+        resultados = list(pool.map(lambda nombreSitio: podaBackupsSitio(nombreSitio, contenedores, ajustes, simulacion), nombresSitios))
+
+    totalEliminados = totalLiberados = 0
+    snapshots = []
+    fallidos = 0
+    print(f"{'SITIO':<30} {'ELIMINADOS':>10} {'LIBERADO':>10}")
+    for nombreSitio, eliminados, liberados, snapshotsSitio, fallos in resultados:
+        print(f"{nombreSitio:<30} {eliminados:>10} {formateaTamano(liberados):>10}")
+        for fallo in fallos:
+            print(f"  Error: {fallo}")
+        fallidos += 1 if fallos else 0
+        totalEliminados += eliminados
+        totalLiberados += liberados
+        snapshots += snapshotsSitio
+
+    # Los trozos de los snapshots eliminados solo se liberan si ningún otro snapshot (de cualquier sitio) los usa
+    if snapshots:
+        objetos = limpiaObjetos(set(snapshots), simulacion)
+        print(f"{'(almacén de objetos)':<30} {'':>10} {formateaTamano(objetos):>10}")
+        totalLiberados += objetos
+
+    if podaHistorial:
+        try:
+            operaciones = podaOperaciones(ajustes, simulacion)
+            print(f"{'(historial de operaciones)':<30} {operaciones:>10} {'':>10}")
+        except (OSError, sqlite3.Error) as e:
+            print(f"  Error: historial de operaciones: {str(e)}")
+            fallidos += 1
+
+    accion = "se liberarían" if simulacion else "liberados"
+    mensaje = f"{totalEliminados} backups, {formateaTamano(totalLiberados)} {accion}"
+    logger.info(f"Poda de backups ({'simulación' if simulacion else 'real'}): {mensaje}")
+    if fallidos:
+        return 500, f"Poda con errores en {fallidos} sitios: {mensaje}"
+    return 200, mensaje
+
+def tamanoDirectorio(directorio):
+    # Función que calcula el tamaño total de los ficheros de un directorio (recursivamente)
+    total = 0
+    for raiz, _, nombres in os.walk(directorio):
+        for nombre in nombres:
+            try:
+                total += os.lstat(os.path.join(raiz, nombre)).st_size
+            except OSError:
+                pass
+    return total
+
+def tamanoDatosBD(nombreSitio):
+    # Función que devuelve lo que ocupan los datos de la BD del sitio en su volumen, sin binlogs, logs de redo ni
+    # tablespaces temporales y de undo (que no dependen del tamaño de los datos)
+    total = 0
+    for raiz, directorios, nombres in os.walk(f"{DIRECTORIO_VOLUMENES}/{nombreSitio}/bd/data"):
+        directorios[:] = [directorio for directorio in directorios if not directorio.startswith("#")]
+        for nombre in nombres:
+            if nombre.startswith(("binlog.", "ib_logfile", "ibtmp", "undo_")):
+                continue
+            try:
+                total += os.lstat(os.path.join(raiz, nombre)).st_size
+            except OSError:
+                pass
+    return total
+
+def perfilDesplegado(nombreSitio):
+    # Función que devuelve (perfil de BD, origen) del sitio: el de la anotación de la plantilla de su deployment de BD
+    # en el clúster y, si no se puede consultar o no existe, el del manifiesto de BD generado más recientemente
+    # (se reescriben solo cuando cambian). El perfil es None si el sitio no tiene
+    try:
+        deployment = getAppsV1Api().read_namespaced_deployment(f"{nombreSitio}-bd", nombreSitio)
+        return (deployment.spec.template.metadata.annotations or {}).get(ANOTACION_PERFIL_BD), "clúster"
+    except Exception as e:
+        logger.debug(f"No se ha podido leer el deployment de BD de {nombreSitio}: {str(e)}")
+
+    ficheros = glob.glob(f"{DIRECTORIO_SITIOS}/{nombreSitio}/{nombreSitio}-bd-*.yaml")
+    if not ficheros:
+        return None, None
+    with open(max(ficheros, key=os.path.getmtime), "r") as file:
+        encontrado = re.search(rf'{re.escape(ANOTACION_PERFIL_BD)}: "([^"]+)"', file.read())
+    return (encontrado.group(1) if encontrado else None), "manifiesto"
+
+def recomiendaPerfil(nombreSitio):
+    # Función que recomienda el perfil de BD más pequeño cuyo límite de datos ('hastaDatos') cubre los del sitio
+    if not os.path.isdir(f"{DIRECTORIO_VOLUMENES}/{nombreSitio}/bd/data"):
+        return 500, f"El sitio {nombreSitio} no tiene directorio de datos de BD en {DIRECTORIO_VOLUMENES}"
+
+    datos = tamanoDatosBD(nombreSitio)
+    recomendado = next(nombre for nombre, perfil in PERFILES_BD.items() if perfil["hastaDatos"] is None or datos <= perfil["hastaDatos"])
+    perfil = PERFILES_BD[recomendado]
+
+    resultado = f"Datos de la BD de {nombreSitio}: {formateaTamano(datos)}\n"
+    actual, origen = perfilDesplegado(nombreSitio)
+    resultado += f"Perfil actual: {actual or 'ninguno (valores por defecto de la imagen)'}{f' (según el {origen})' if origen else ''}\n"
+    resultado += f"Perfil recomendado: {recomendado} (innodb_buffer_pool_size {perfil['mycnf']['innodb_buffer_pool_size']}, "
+    resultado += f"max_connections {perfil['mycnf']['max_connections']}, memoria {perfil['memoria']}-{perfil['limiteMemoria']}, cpu {perfil['cpu']})\n"
+    resultado += f'Para aplicarlo: "perfilBD": "{recomendado}" en la configuración del sitio y volver a desplegarlo'
+    return 200, resultado
+
+def compruebaEspacioBackup(nombreSitio, contenedor, directorio, capacidad=None):
+    # Función que comprueba si en el directorio de destino hay espacio para un nuevo backup del sitio
+    # El tamaño se estima con el último backup del catálogo o, si no hay ninguno, con el de los datos
+    # Si se indica 'capacidad', se tiene en cuenta también lo que ya ocupan los backups en el volumen
+    # Devuelve (hay espacio, bytes necesarios, bytes libres)
+    anteriores = consultaBackups(nombreSitio, contenedor, ultimo=True)
+    if anteriores:
+        estimado = anteriores[0]["tamano"]
+    else:
+        datos = f"{DIRECTORIO_VOLUMENES}/{nombreSitio}/bd/data" if "bd" in contenedor else f"{DIRECTORIO_VOLUMENES}/{nombreSitio}/wp/uploads"
+        estimado = tamanoDirectorio(datos)
+    necesario = int(estimado * MARGEN_ESPACIO_BACKUP)
+
+    info = os.statvfs(directorio)
+    libre = info.f_bavail * info.f_frsize
+    if capacidad is not None:
+        libre = min(libre, capacidad - tamanoDirectorio(directorio))
+
+    return necesario <= libre, necesario, libre
+
+def ejecutaBackupFormato(nombreSitio, contenedor, formato, compresion="zstd"):
+    # Función que realiza un backup de un sitio en el formato dado (ver FORMATOS_BACKUP)
+    if formato == "streaming":
+        return ejecutaBackupStreaming(nombreSitio, compresion)
+    if formato == "tablas":
+        return ejecutaBackupTablas(nombreSitio, compresion)
+    if formato == "snapshot":
+        return ejecutaSnapshotUploads(nombreSitio)
+    return ejecutaBackup(nombreSitio, contenedor)
+
+def nodosSitios(contenedor):
+    # Función que devuelve el nodo en el que se ejecuta el pod del tipo dado de cada sitio: {sitio: nodo}
+    pods = listaPodsFlota(f"app,{SELECTOR_CONTENEDOR[contenedor]}")
+    nodos = {}
+    for pod in pods:
+        if pod.metadata.deletion_timestamp is None and pod.status.phase == "Running" and pod.spec.node_name:
+            nodos[pod.metadata.labels["app"]] = pod.spec.node_name
+    return nodos
+
+def backupFlota(contenedor, formato=None, porNodo=PARALELO_POR_NODO, compresion="zstd", ficheroInforme=None):
+    # Función que realiza un backup de todos los sitios desplegados agrupándolos por el nodo en el que están
+    # sus pods: en cada nodo se hacen como máximo 'porNodo' backups a la vez, empezando por los sitios cuyo
+    # último backup (según el catálogo) es más antiguo. Al terminar escribe un informe JSON con los tiempos
+
+    formato = formato or FORMATOS_BACKUP[contenedor][0]
+    try:
+        nodos = nodosSitios(contenedor)
+        ultimos = {fila["sitio"]: fila["marca"] for fila in consultaBackups(None, contenedor, ultimo=True)}
+    except (client.exceptions.ApiException, sqlite3.Error) as e:
+        errores.append(f"No se han podido obtener los sitios de la flota: {str(e)}")
+        logger.error(f"No se han podido obtener los sitios de la flota: {str(e)}")
+        return 500, errores
+
+    # Los sitios en espera de la reserva no tienen datos propios que guardar
+    try:
+        for reserva in consultaReservas("sitio IS NULL"):
+            nodos.pop(reserva["namespace"], None)
+    except sqlite3.Error as e:
+        logger.warning(f"No se han podido consultar las reservas del catálogo: {e}")
+
+    if not nodos:
+        return 500, f"No hay sitios con pods de {contenedor} en ejecución"
+
+    colas = {}
+    for nombreSitio in sorted(nodos, key=lambda nombreSitio: (ultimos.get(nombreSitio, 0), nombreSitio)):
+        colas.setdefault(nodos[nombreSitio], collections.deque()).append(nombreSitio)
+
+    trabajadores = porNodo * len(colas)
+    ampliaPoolApi(2 * trabajadores)
+
+    bloqueoSalida = threading.Lock()
+    informe = []
+    inicioFlota = time.monotonic()
+
+    def trabajaNodo(nodo):
+        # Realiza uno a uno los backups pendientes del nodo (cada nodo tiene 'porNodo' trabajadores)
+        cola = colas[nodo]
+        while True:
+            try:
+                nombreSitio = cola.popleft()
+            except IndexError:
+                return
+            destino = LineasConPrefijo(salidaOriginal, f"[{nombreSitio}] ", bloqueoSalida)
+            salida.asignaDestino(destino)
+            inicio = time.monotonic()
+            try:
+                codigoResultado, resultado = ejecutaBackupFormato(nombreSitio, contenedor, formato, compresion)
+            except Exception as e:
+                logger.error(f"Error en el backup de {contenedor} de {nombreSitio}: {str(e)}")
+                codigoResultado, resultado = 500, f"Excepción: {str(e)}"
+            duracion = time.monotonic() - inicio
+            print(resultado)
+            destino.flush()
+            salida.asignaDestino(None)
+            informe.append({
+                "sitio": nombreSitio,
+                "nodo": nodo,
+                "ultimoBackupPrevio": ultimos.get(nombreSitio),
+                "espera": round(inicio - inicioFlota, 3),
+                "duracion": round(duracion, 3),
+                "resultado": "OK" if codigoResultado == 200 else "ERROR",
+                "mensaje": resultado if isinstance(resultado, str) else "; ".join(map(str, resultado))
+            })
+
+    logger.info(f"Comando: backup-flota {contenedor} ({len(nodos)} sitios en {len(colas)} nodos, {porNodo} por nodo, formato {formato})")
+
+    with salidaPorHilos() as salida:
+        salidaOriginal = salida.destino()
+        with ThreadPoolExecutor(max_workers=trabajadores) as pool:
+            for nodo in colas:
+                for _ in range(porNodo):
+                    pool.submit(conTraza(trabajaNodo), nodo)
+    duracionFlota = time.monotonic() - inicioFlota
+
+    # Informe de tiempos por sitio
+    fecha = time.strftime('%Y%m%d%H%M%S')
+    ficheroInforme = ficheroInforme or f"{DIRECTORIO_INFORMES}/backup-flota-{contenedor}-{fecha}.json"
+    informe.sort(key=lambda fila: (fila["nodo"], fila["espera"]))
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(ficheroInforme)), exist_ok=True)
+        with open(ficheroInforme, "w") as file:
+            json.dump({"fecha": fecha, "tipo": contenedor, "formato": formato, "porNodo": porNodo,
+                       "duracion": round(duracionFlota, 3), "sitios": informe}, file, indent=2)
+    except OSError as e:
+        logger.error(f"No se ha podido escribir el informe {ficheroInforme}: {str(e)}")
+        ficheroInforme = None
+
+    fallidos = 0
+    print(f"\n{'SITIO':<30} {'NODO':<16} {'RESULTADO':<10} {'ESPERA':>9} {'DURACIÓN':>9}")
+    for fila in informe:
+        fallidos += fila["resultado"] != "OK"
+        print(f"{fila['sitio']:<30} {fila['nodo']:<16} {fila['resultado']:<10} {fila['espera']:>8.1f}s {fila['duracion']:>8.1f}s")
+    if ficheroInforme:
+        print(f"Informe de tiempos: {ficheroInforme}")
+
+    if fallidos:
+        return 500, f"Backup de la flota con errores: {fallidos} de {len(informe)} sitios fallidos ({duracionFlota:.1f} s)"
+    return 200, f"Backup de la flota realizado: {len(informe)} sitios en {duracionFlota:.1f} s"
+
+def listarBackup(nombreSitio, contenedor, ultimo=False, anterioresA=None):
+    # Función que dado un sitio (o None para toda la flota) y la cadena BD o Wordpress lista las copias de
+    # seguridad disponibles, consultando el catálogo de backups
+
+    descripcion = f"{contenedor} de {nombreSitio}" if nombreSitio else f"{contenedor} de todos los sitios"
+    try:
+        backups = consultaBackups(nombreSitio, contenedor, ultimo, anterioresA)
+    except sqlite3.Error as e:
+        print(f"Ocurrió un error inesperado: {e}")
+        errores.append(f"No se ha podido consultar el catálogo de backups {descripcion}")
+        logger.error(f"No se ha podido consultar el catálogo de backups {descripcion}: {e}")
+        return 500, f"No se ha podido consultar el catálogo de backups {descripcion}"
+
+    if backups:
+        print(f"{'SITIO':<24} {'FICHERO':<52} {'FECHA':<19} {'TAMAÑO':>9}  {'COMPRESIÓN':<10} {'CHECKSUM':<12}")
+        for backup in backups:
+            fecha = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(backup["marca"]))
+            print(f"{backup['sitio']:<24} {backup['fichero']:<52} {fecha:<19} {formateaTamano(backup['tamano']):>9}  {backup['compresion']:<10} {(backup['checksum'] or '')[:12]:<12}")
+        logger.info(f"Listado de backups {descripcion} realizado correctamente")
+        return 200, f"Listado de backups {descripcion} realizado correctamente ({len(backups)} backups)"
+    else:
+        print(f"No hay backups {descripcion} en el catálogo.")
+        logger.error(f"No hay backups {descripcion} en el catálogo")
+        return 500, f"No hay backups {descripcion} en el catálogo"
+        
+@trazada("restaura", operacion="restauracion")
+def restauraBackup(nombreSitio, contenedor, fichero, paralelo=PARALELO_RESTAURACION):
+    # Función que dado un sitio, la cadena BD o Wordpress y un nombre de fichero, restaura una copia de seguridad
+
+    # Los backups de BD hechos en streaming o por tablas y los snapshots de uploads están en el almacén del servidor de control
+    if "bd" in contenedor:
+        rutaAlmacen = f"{DIRECTORIO_BACKUPS}/{nombreSitio}/bd/{os.path.basename(fichero)}"
+        if os.path.isfile(rutaAlmacen) and rutaAlmacen.endswith(EXTENSION_TABLAS):
+            return restauraBackupTablas(nombreSitio, rutaAlmacen, paralelo)
+        if os.path.isfile(rutaAlmacen):
+            return restauraBackupStreaming(nombreSitio, rutaAlmacen)
+    elif fichero.endswith(EXTENSION_SNAPSHOT):
+        return restauraSnapshotUploads(nombreSitio, f"{DIRECTORIO_BACKUPS}/{nombreSitio}/wp/{os.path.basename(fichero)}")
+
+    # Obtenemos listado de pods
+    with tramo("lista-pods"):
+        resultado, pods = listaPods(nombreSitio)
+
+    if resultado:
+        # Recorremos lista de pods para obtener su nombre y generar el comando adecuado para la restauración
+        for pod in pods:
+            if contenedor in pod and "bd" in contenedor:
+                comando = f"kubectl exec --stdin {pod} -n {nombreSitio} -- bash -c \"zcat /dump/{fichero} | mysql -u\$MYSQL_USER -p\$MYSQL_PASSWORD \$MYSQL_DATABASE\""
+            elif contenedor in pod and "wordpress" in contenedor:
+                comando = f"kubectl exec --stdin {pod} -n {nombreSitio} -- tar xvzf /dump/{fichero} -C /var/www/html/wp-content/uploads"
+
+        # Ejecutar el comando kubectl
+        with tramo("restaura-kubectl", contenedor=contenedor):
+            proceso = subprocess.run(comando, shell=True, capture_output=True, text=True)
+        if proceso.returncode !=0:
+          errores.append(f"No se ha podido restaurar el backup de {contenedor} de {nombreSitio}")
+          logger.error(f"No se ha podido restaurar el backup de {contenedor} de {nombreSitio}")
+          return 500, f"No se ha podido restaurar el backup de {contenedor} de {nombreSitio}"
+        else:                          
+          logger.info(f"Backup de {contenedor} de {nombreSitio} restaurado correctamente")
+          errores.append(f"Backup de {contenedor} de {nombreSitio} restaurado correctamente")
+          return 200, f"Backup de {contenedor} de {nombreSitio} restaurado correctamente"
+         
+    else: 
+      return 500, f"Logs {nombreSitio} - No se puede obtener lista de pods"               
+
+# Último recorrido de los volúmenes de los sitios: fecha (epoch), duración y bytes de cada (sitio, volumen)
+_escaneoVolumenes = {"marca": 0, "duracion": 0.0, "volumenes": {}}
+_bloqueoEscaneo = threading.Lock()
+
+def escaneaVolumenes():
+    # Función que recorre los volúmenes de todos los sitios (VOLUMENES_SITIO) y guarda lo que ocupa cada uno
+    # Es la parte cara de las métricas (los uploads pueden tener cientos de miles de ficheros): el endpoint
+    # /metrics responde con el último recorrido, que se repite cada INTERVALO_ESCANEO_VOLUMENES segundos
+    inicio = time.monotonic()
+    volumenes = {}
+    try:
+        sitios = sorted(nombre for nombre in os.listdir(DIRECTORIO_VOLUMENES) if os.path.isdir(f"{DIRECTORIO_VOLUMENES}/{nombre}"))
+    except OSError as e:
+        logger.error(f"No se ha podido recorrer {DIRECTORIO_VOLUMENES}: {e}")
+        sitios = []
+    for nombreSitio in sitios:
+        for volumen, subdirectorio in VOLUMENES_SITIO.items():
+            ruta = f"{DIRECTORIO_VOLUMENES}/{nombreSitio}/{subdirectorio}"
+            if os.path.isdir(ruta):
+                volumenes[(nombreSitio, volumen)] = tamanoDirectorio(ruta)
+    with _bloqueoEscaneo:
+        _escaneoVolumenes.update(marca=time.time(), duracion=time.monotonic() - inicio, volumenes=volumenes)
+
+def escapaEtiqueta(valor):
+    # Función que escapa el valor de una etiqueta en el formato de texto de Prometheus
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def familiaMetrica(lineas, nombre, tipo, ayuda, muestras):
+    # Función que añade a 'lineas' una familia de métricas en el formato de texto de Prometheus
+    # 'muestras' es una lista de (sufijo del nombre, etiquetas, valor)
+    lineas.append(f"# HELP {nombre} {ayuda}")
+    lineas.append(f"# TYPE {nombre} {tipo}")
+    for sufijo, etiquetas, valor in muestras:
+        texto = ",".join(f'{clave}="{escapaEtiqueta(contenido)}"' for clave, contenido in etiquetas.items())
+        lineas.append(f"{nombre}{sufijo}{{{texto}}} {valor}" if texto else f"{nombre}{sufijo} {valor}")
+
+def generaMetricas(escanea=True):
+    # Función que devuelve las métricas de la flota y de las operaciones en el formato de texto de Prometheus
+    # El estado de los pods sale de las cachés si están activas (o de una única llamada a la API), los backups
+    # y las duraciones del catálogo, y la ocupación de los volúmenes del último recorrido ('escanea' lo repite antes)
+    lineas = []
+    ahora = time.time()
+
+    # Estado de los sitios del clúster
+    try:
+        codigoResultado, sitios = estadoFlota()
+    except Exception as e:
+        logger.error(f"Métricas: no se ha podido obtener el estado de la flota: {str(e)}")
+        codigoResultado, sitios = 500, []
+    familiaMetrica(lineas, "cluster_control_api_disponible", "gauge", "1 si se ha podido consultar el estado de la flota en la API",
+                   [("", {}, int(codigoResultado == 200))])
+    if codigoResultado == 200:
+        familiaMetrica(lineas, "cluster_control_sitios", "gauge", "Sitios con pods en el clúster", [("", {}, len(sitios))])
+        familiaMetrica(lineas, "cluster_control_sitio_listo", "gauge", "1 si el pod del componente del sitio está listo",
+                       [("", {"sitio": sitio["sitio"], "componente": componente}, int(sitio[componente])) for sitio in sitios for componente in ("bd", "wp")])
+        familiaMetrica(lineas, "cluster_control_sitio_reinicios", "gauge", "Reinicios de los contenedores del sitio",
+                       [("", {"sitio": sitio["sitio"]}, sitio["reinicios"]) for sitio in sitios])
+
+    # Backups del catálogo y duración de las operaciones
+    try:
+        conexion = abreCatalogo()
+        try:
+            backups = conexion.execute("SELECT sitio, tipo, MAX(marca) AS ultimo, COUNT(*) AS numero, SUM(tamano) AS bytes FROM backups GROUP BY sitio, tipo ORDER BY sitio, tipo").fetchall()
+            duraciones = conexion.execute("SELECT operacion, variante, resultado, cubeta, numero, suma FROM duraciones").fetchall()
+            reservas = dict(conexion.execute("SELECT estado, COUNT(*) FROM reservas GROUP BY estado").fetchall())
+        finally:
+            conexion.close()
+    except (OSError, sqlite3.Error) as e:
+        logger.error(f"Métricas: no se ha podido consultar el catálogo: {e}")
+        backups, duraciones, reservas = [], [], {}
+
+    familiaMetrica(lineas, "cluster_control_backup_ultimo_timestamp_seconds", "gauge", "Fecha del último backup del sitio",
+                   [("", {"sitio": fila["sitio"], "tipo": fila["tipo"]}, fila["ultimo"]) for fila in backups])
+    familiaMetrica(lineas, "cluster_control_backup_antiguedad_seconds", "gauge", "Antigüedad del último backup del sitio",
+                   [("", {"sitio": fila["sitio"], "tipo": fila["tipo"]}, int(ahora) - fila["ultimo"]) for fila in backups])
+    familiaMetrica(lineas, "cluster_control_backups", "gauge", "Backups del sitio en el catálogo",
+                   [("", {"sitio": fila["sitio"], "tipo": fila["tipo"]}, fila["numero"]) for fila in backups])
+    familiaMetrica(lineas, "cluster_control_backups_bytes", "gauge", "Tamaño total de los backups del sitio en el catálogo",
+                   [("", {"sitio": fila["sitio"], "tipo": fila["tipo"]}, fila["bytes"]) for fila in backups])
+
+    # Contadores agregados por cubeta: (operación, variante, resultado) -> {cubeta: (número, suma)}
+    series = {}
+    for operacion, variante, resultado, cubeta, numero, suma in duraciones:
+        series.setdefault((operacion, variante, resultado), {})[cubeta] = (numero, suma)
+    muestras = []
+    for (operacion, variante, resultado), cubetas in sorted(series.items()):
+        etiquetas = {"operacion": operacion, "variante": variante, "resultado": resultado}
+        numero, suma = cubetas.get("+Inf", (0, 0.0))
+        for cubeta in CUBETAS_DURACION:
+            muestras.append(("_bucket", {**etiquetas, "le": cubeta}, cubetas.get(str(cubeta), (0, 0.0))[0]))
+        muestras += [("_bucket", {**etiquetas, "le": "+Inf"}, numero), ("_sum", etiquetas, round(suma, 3)), ("_count", etiquetas, numero)]
+    familiaMetrica(lineas, "cluster_control_operacion_duracion_seconds", "histogram", "Duración de despliegues, backups, restauraciones y eliminaciones", muestras)
+
+    # Reserva de sitios en espera (la latencia de ocupación es la operación 'reclamo' del histograma anterior)
+    familiaMetrica(lineas, "cluster_control_reserva_sitios", "gauge", "Sitios de la reserva por estado",
+                   [("", {"estado": estado}, reservas.get(estado, 0)) for estado in ("libre", "preparando", "fallida")])
+    familiaMetrica(lineas, "cluster_control_reserva_profundidad", "gauge", "Profundidad configurada de la reserva",
+                   [("", {}, leeConfiguracionReserva()["profundidad"])])
+
+    # Ocupación de los volúmenes de los sitios y espacio libre en los discos
+    if escanea:
+        escaneaVolumenes()
+    with _bloqueoEscaneo:
+        escaneo = dict(_escaneoVolumenes)
+    if escaneo["marca"]:
+        familiaMetrica(lineas, "cluster_control_volumen_bytes", "gauge", "Bytes ocupados en el volumen del sitio",
+                       [("", {"sitio": nombreSitio, "volumen": volumen}, tamano) for (nombreSitio, volumen), tamano in sorted(escaneo["volumenes"].items())])
+        familiaMetrica(lineas, "cluster_control_volumen_capacidad_bytes", "gauge", "Capacidad de los volúmenes de dump de cada sitio",
+                       [("", {"volumen": volumen}, CAPACIDAD_VOLUMEN_DUMP) for volumen in VOLUMENES_SITIO if volumen.endswith("-dump")])
+        familiaMetrica(lineas, "cluster_control_escaneo_volumenes_timestamp_seconds", "gauge", "Fecha del último recorrido de los volúmenes",
+                       [("", {}, int(escaneo["marca"]))])
+        familiaMetrica(lineas, "cluster_control_escaneo_volumenes_duracion_seconds", "gauge", "Duración del último recorrido de los volúmenes",
+                       [("", {}, round(escaneo["duracion"], 3))])
+
+    discos = []
+    for ruta in (DIRECTORIO_VOLUMENES, DIRECTORIO_BACKUPS):
+        try:
+            info = os.statvfs(ruta)
+            discos.append((ruta, info.f_bavail * info.f_frsize, info.f_blocks * info.f_frsize))
+        except OSError:
+            pass
+    familiaMetrica(lineas, "cluster_control_disco_libre_bytes", "gauge", "Espacio libre en el disco", [("", {"ruta": ruta}, libre) for ruta, libre, _ in discos])
+    familiaMetrica(lineas, "cluster_control_disco_total_bytes", "gauge", "Tamaño del disco", [("", {"ruta": ruta}, total) for ruta, _, total in discos])
+
+    # Cachés del demonio (si el proceso las tiene activas)
+    if _caches:
+        familiaMetrica(lineas, "cluster_control_cache_consultas_total", "counter", "Consultas a las cachés del estado del clúster",
+                       [("", {"cache": cache.nombre, "resultado": resultado}, valor) for cache in _caches.values()
+                        for resultado, valor in (("acierto", cache.aciertos), ("fallo", cache.fallos))])
+
+    return "\n".join(lineas) + "\n"
+
+def escribeMetricas(fichero):
+    # Función que escribe las métricas en un fichero para el 'textfile collector' de node_exporter
+    # (se escriben en un temporal y se renombra, para que nunca se lea un fichero a medias)
+    temporal = f"{fichero}.{os.getpid()}.tmp"
+    with open(temporal, "w") as file:
+        file.write(generaMetricas())
+    os.replace(temporal, fichero)
+
+def exportaMetricas(puerto=PUERTO_METRICAS, fichero=None, intervalo=None):
+    # Función que exporta las métricas: en un fichero (una vez, o cada 'intervalo' segundos) o, si no se indica
+    # fichero, en el endpoint HTTP /metrics. En este modo se mantienen las cachés del clúster y los volúmenes se
+    # recorren en segundo plano, de modo que cada consulta de Prometheus no cuesta llamadas a la API ni recorridos
+    if fichero is not None:
+        while True:
+            try:
+                escribeMetricas(fichero)
+            except OSError as e:
+                errores.append(f"No se han podido escribir las métricas en {fichero}: {e}")
+                logger.error(f"No se han podido escribir las métricas en {fichero}: {e}")
+                return 500, errores
+            if intervalo is None:
+                return 200, f"Métricas escritas en {fichero}"
+            time.sleep(intervalo)
+
+    class PeticionMetricas(servidorHTTP.BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            datos = generaMetricas(escanea=False).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(datos)))
+            self.end_headers()
+            self.wfile.write(datos)
+
+        def log_message(self, formato, *args):
+            logger.debug(f"Métricas: {formato % args}")
+
+    def escaneaPeriodicamente():
+        while True:
+            try:
+                escaneaVolumenes()
+            except Exception as e:
+                logger.warning(f"Métricas: error recorriendo los volúmenes: {str(e)}")
+            time.sleep(INTERVALO_ESCANEO_VOLUMENES)
+
+    if not _caches:
+        try:
+            iniciaCaches()
+        except Exception as e:
+            logger.warning(f"Métricas: no se han podido iniciar las cachés: {str(e)}")
+    threading.Thread(target=escaneaPeriodicamente, name="escaneo-volumenes", daemon=True).start()
+
+    try:
+        servidor = servidorHTTP.ThreadingHTTPServer(("", puerto), PeticionMetricas)
+    except OSError as e:
+        errores.append(f"No se puede escuchar en el puerto {puerto}: {e}")
+        return 500, errores
+
+    with servidor:
+        logger.info(f"Métricas en http://0.0.0.0:{puerto}/metrics")
+        print(f"Métricas en http://0.0.0.0:{puerto}/metrics")
+        try:
+            servidor.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    return 200, "Exportador de métricas detenido"
+
+def extraeOpcion(parametros, opcion, porDefecto=None):
+    # Función que extrae de la lista de parámetros una opción con valor ('--opcion valor') y devuelve el valor
+    if opcion not in parametros:
+        return porDefecto
+    posicion = parametros.index(opcion)
+    if posicion + 1 >= len(parametros):
+        raise ValueError(f"La opción {opcion} requiere un valor")
+    valor = parametros[posicion + 1]
+    del parametros[posicion:posicion + 2]
+    return valor
+
+def extraeIndicador(parametros, opcion):
+    # Función que extrae de la lista de parámetros una opción sin valor ('--opcion') e indica si estaba
+    if opcion not in parametros:
+        return False
+    parametros.remove(opcion)
+    return True
+
+class SalidaSocket:
+    # Destino de salida que envía lo escrito al cliente del demonio como mensajes JSON en líneas ({clave: texto})
+
+    def __init__(self, conexion, clave, bloqueo):
+        self.conexion = conexion
+        self.clave = clave
+        self.bloqueo = bloqueo
+
+    def write(self, texto):
+        if texto:
+            with self.bloqueo:
+                self.conexion.sendall((json.dumps({self.clave: texto}) + "\n").encode())
+        return len(texto)
+
+    def flush(self):
+        pass
+
+class PeticionDemonio(socketserver.StreamRequestHandler):
+    # Atiende una petición al demonio: una línea JSON {"argumentos": [...], "version": ...}
+    # Responde con mensajes {"salida": texto} y {"error": texto} a medida que el comando escribe y, al terminar,
+    # {"codigo": código de salida}. Si la versión no coincide o el comando se ejecuta siempre en el cliente (ver
+    # ejecutaEnCliente) responde {"rechazado": motivo}
+
+    def envia(self, mensaje):
+        with self.bloqueo:
+            self.connection.sendall((json.dumps(mensaje) + "\n").encode())
+
+    def handle(self):
+        self.bloqueo = threading.Lock()
+        try:
+            peticion = json.loads(self.rfile.readline())
+            argumentos = peticion["argumentos"]
+        except (ValueError, KeyError) as e:
+            self.envia({"rechazado": f"Petición no válida: {str(e)}"})
+            return
+        if peticion.get("version") != VERSION_CODIGO:
+            self.envia({"rechazado": "Versión distinta del código"})
+            return
+        if ejecutaEnCliente(argumentos):
+            self.envia({"rechazado": "El comando se ejecuta en el proceso del cliente"})
+            return
+
+        logger.info(f"Demonio: petición {' '.join(argumentos)}")
+        sys.stdout.asignaDestino(SalidaSocket(self.connection, "salida", self.bloqueo))
+        sys.stderr.asignaDestino(SalidaSocket(self.connection, "error", self.bloqueo))
+        errores.clear()
+        codigo = 0
+        try:
+            main(argumentos)
+        except SystemExit as e:
+            codigo = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        except (BrokenPipeError, ConnectionResetError):
+            logger.info(f"Demonio: el cliente de {' '.join(argumentos)} ha cerrado la conexión")
+            return
+        except Exception as e:
+            logger.error(f"Demonio: error en {' '.join(argumentos)}: {str(e)}")
+            print(f"Ocurrió un error inesperado: {e}", file=sys.stderr)
+            codigo = 1
+        finally:
+            sys.stdout.asignaDestino(None)
+            sys.stderr.asignaDestino(None)
+
+        try:
+            self.envia({"codigo": codigo})
+        except OSError:
+            pass
+
+class ServidorDemonio(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    # Servidor del demonio: un hilo por petición
+    daemon_threads = True
+
+def demonio(rutaSocket=SOCKET_DEMONIO):
+    # Función que ejecuta el demonio: atiende los comandos por un socket Unix en el mismo proceso, de modo que
+    # el cliente de la API, sus conexiones y las cachés se mantienen entre comandos
+    # La salida de cada petición se envía a su cliente a través de la salida por hilo
+    global _modoDemonio
+
+    # Si el socket existe pero no responde es de un demonio anterior que terminó sin borrarlo
+    if os.path.exists(rutaSocket):
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as prueba:
+                prueba.connect(rutaSocket)
+            return 500, f"Ya hay un demonio escuchando en {rutaSocket}"
+        except OSError:
+            os.remove(rutaSocket)
+
+    _modoDemonio = True
+    sys.stdout = SalidaPorHilo(sys.stdout)
+    sys.stderr = SalidaPorHilo(sys.stderr)
+
+    # El cliente de la API se crea al arrancar para que el primer comando no pague la conexión
+    try:
+        getApiClient()
+        iniciaCaches()
+    except Exception as e:
+        logger.warning(f"Demonio: no se ha podido crear el cliente de la API al arrancar: {str(e)}")
+
+    with ServidorDemonio(rutaSocket, PeticionDemonio) as servidor:
+        os.chmod(rutaSocket, 0o660)
+        logger.info(f"Demonio escuchando en {rutaSocket} (versión {VERSION_CODIGO})")
+        print(f"Demonio escuchando en {rutaSocket}")
+        try:
+            servidor.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.remove(rutaSocket)
+
+    sys.stdout = sys.stdout.original
+    sys.stderr = sys.stderr.original
+    logger.info("Demonio detenido")
+    return 200, "Demonio detenido"
+
+def main(args=None):
+  # Obtener los argumentos de la línea de comandos (o los recibidos por el demonio)
+  if args is None:
+      args = sys.argv[1:]
+  
+  # Extraer la acción y los parámetros
+  if not args:
+      print("Error: No se recibieron argumentos.")
+      printUso()
+      sys.exit(1)
+  else:
+      args = resuelveSitios(args)
+      accion = args[0]
+      parametros = args[1:]
+
+  # Con --traza <fichero> el comando se ejecuta midiendo sus fases, que se guardan en formato Chrome trace
+  if "--traza" in parametros:
+      try:
+          ficheroTraza = extraeOpcion(parametros, "--traza")
+      except ValueError as e:
+          print(f"Error: {e}")
+          printUso()
+          sys.exit(1)
+
+      traza = Traza()
+      asignaTraza(traza)
+      try:
+          with tramo(accion, parametros=" ".join(parametros)):
+              return main([accion, *parametros])
+      finally:
+          asignaTraza(None)
+          try:
+              traza.guarda(ficheroTraza)
+              print(f"Traza guardada en {ficheroTraza}")
+          except OSError as e:
+              print(f"No se ha podido guardar la traza en {ficheroTraza}: {e}")
+
+  # Despliega sitio
+  if accion == "despliega":
+      sinSemilla = extraeIndicador(parametros, "--sin-semilla")
+      sinReserva = extraeIndicador(parametros, "--sin-reserva")
+      forzar = extraeIndicador(parametros, "--forzar")
+      if len(parametros) != 1:
+          print("Error: Se requiere como parámetro un fichero JSON de configuración.")
+          printUso()
+          sys.exit(1)
+      
+      ficheroConfig = parametros[0]   
+
+      codigoResultado, resultado = despliegaSitio(ficheroConfig, usaSemilla=not sinSemilla, usaReserva=not sinReserva, forzar=forzar)
+      print(resultado)      
+
+  # Recomienda un perfil de BD según el tamaño de los datos del sitio
+  elif accion == "recomienda-perfil":
+      if len(parametros) != 1:
+          print("Error: Se requiere un parámetro: nombre de sitio.")
+          printUso()
+          sys.exit(1)
+
+      codigoResultado, resultado = recomiendaPerfil(parametros[0])
+      print(resultado)
+
+  # Repone la reserva de sitios en espera
+  elif accion == "repone-reserva":
+      try:
+          profundidad = int(extraeOpcion(parametros, "--profundidad", leeConfiguracionReserva()["profundidad"]))
+          paralelo = int(extraeOpcion(parametros, "--paralelo", PARALELO_LOTE))
+      except ValueError:
+          profundidad = paralelo = -1
+
+      if parametros or profundidad < 0 or paralelo < 1:
+          print("Error: Opciones admitidas: --profundidad N (N >= 0) y --paralelo N (N >= 1).")
+          printUso()
+          sys.exit(1)
+
+      codigoResultado, resultado = reponeReserva(profundidad, paralelo)
+      if codigoResultado != 200:
+          logger.error(f"Reposición de la reserva con errores:\n{resultado}")
+      print(resultado)
+
+  # Crea la semilla de sitios de las imágenes actuales
+  elif accion == "crea-semilla":
+      reemplaza = extraeIndicador(parametros, "--reemplaza")
+      if len(parametros) != 1:
+          print("Error: Se requiere como parámetro el fichero JSON de configuración del sitio plantilla.")
+          printUso()
+          sys.exit(1)
+
+      codigoResultado, resultado = creaSemilla(parametros[0], reemplaza)
+      print(resultado)
+  
+  # Despliega varios sitios a la vez
+  elif accion == "despliega-lote":
+      try:
+          paralelo = int(extraeOpcion(parametros, "--paralelo", PARALELO_LOTE))
+      except ValueError:
+          paralelo = 0
+
+      if len(parametros) != 1 or paralelo < 1:
+          print("Error: Se requiere como parámetro un directorio o fichero lista y, opcionalmente, --paralelo N (N >= 1).")
+          printUso()
+          sys.exit(1)
+
+      codigoResultado, resultado = despliegaLote(parametros[0], paralelo)
+      print(resultado)
+
+  # Elimina despliegue
+  elif accion == "quita-despliegue-sitio":
+      try:
+          paralelo = int(extraeOpcion(parametros, "--paralelo", PARALELO_LOTE))
+      except ValueError:
+          paralelo = 0
+
+      if len(parametros) < 1 or paralelo < 1:
+          print("Error: Se requiere al menos un parámetro: nombre de sitio.")
+          printUso()
+          sys.exit(1)
+      
+      logger.info(f"Comando: Elimina despliegue {' '.join(parametros)}")
+
+      if len(parametros) == 1:
+          codigoResultado, resultado = eliminaDespliegueSitio(parametros[0])
+      else:
+          codigoResultado, resultado = eliminaDesplieguesSitios(parametros, paralelo)
+      if codigoResultado == 200:
+          print(resultado)
+      else:
+          print(resultado)
+
+  # Listado de pods de un sitio
+  elif accion == "lista-pods":
+      if len(parametros) != 1:
+          print("Error: Se requiere un parámetro: nombre de sitio.")
+          printUso()
+          sys.exit(1)
+
+      nombreSitio = parametros[0]
+      logger.info(f"Comando: Lista pods {nombreSitio}")
+
+      codigoResultado, resultado = listaPods(nombreSitio)
+      if codigoResultado == 200:
+          print(resultado)
+      else:
+          print(resultado)
+  
+  # Inicializa sitio web
+  elif accion == "inicializa-sitio":
+    if len(parametros) != 1:
+        print("Error: Se requiere un parámetro: nombre de sitio.")
+        printUso()
+        sys.exit(1)
+    nombreSitio = parametros[0]
+    logger.info(f"Comando: Inicializa sitio WP {nombreSitio}")
+    codigoResultado, resultado = inicializaSitioWP(nombreSitio)
+    if codigoResultado == 200:
+        print(resultado)
+    else:
+        print(resultado)
+
+  # Devuelve estado de los pods de un sitio
+  elif accion == "estado-pods":
+    if len(parametros) != 1:
+        print("Error: Se requiere un parámetro: nombre de sitio.")
+        printUso()
+        sys.exit(1)
+    nombreSitio = parametros[0]
+    logger.info(f"Comando: Estado pods {nombreSitio}")
+    _,pods=listaPods(nombreSitio)    
+    for pod in pods:
+      print(pod)
+      resultado = getPodStatus(nombreSitio, pod)
+      print(resultado)
+
+  # Devuelve el estado de todos los sitios del clúster
+  elif accion == "estado-flota":
+    if parametros not in ([], ["--json"]):
+        print("Error: El único parámetro admitido es --json.")
+        printUso()
+        sys.exit(1)
+    formatoJSON = parametros == ["--json"]
+    logger.info("Comando: Estado flota")
+    codigoResultado, resultado = muestraEstadoFlota(formatoJSON)
+    if not formatoJSON or codigoResultado != 200:
+        print(resultado)
+
+  # Reinicia un pod de un determinado sitio
+  elif accion == "reinicia-contenedor":
+    if len(parametros) != 2:
+        print("Error: Se requieren dos parámetros: nombre de sitio y wordpress o bd.")
+        printUso()
+        sys.exit(1)
+    
+    nombreSitio, tipo = parametros
+
+    logger.info(f"Comando: reinicia-contenedor {nombreSitio} {tipo}")
+    codigoResultado, resultado = reiniciaContenedor(nombreSitio, tipo)
+    if codigoResultado == 200:
+        print(resultado)
+    else:
+        print(resultado)
+
+  # Muestra los logs de un pod de un determinado sitio
+  elif accion == "muestra-logs":
+    try:
+        seguir = extraeIndicador(parametros, "--follow")
+        lineasFinales = extraeOpcion(parametros, "--tail")
+        lineasFinales = int(lineasFinales) if lineasFinales is not None else None
+        desde = extraeOpcion(parametros, "--since")
+        desde = segundosDuracion(desde) if desde is not None else None
+        nombreContenedor = extraeOpcion(parametros, "--contenedor")
+    except ValueError as e:
+        print(f"Error: {e}")
+        printUso()
+        sys.exit(1)
+
+    if len(parametros) != 2:
+        print("Error: Se requieren dos parámetros: nombre de sitio y wordpress o bd.")
+        printUso()
+        sys.exit(1)
+
+    nombreSitio, tipo = parametros
+    logger.info(f"Comando: muestra-logs {nombreSitio} {tipo}")
+    codigoResultado, resultado = muestraLogs(nombreSitio, tipo, seguir, lineasFinales, desde, nombreContenedor)
+    if codigoResultado == 200:
+        print(resultado)
+    else:
+        print(resultado)  
+  
+  # Realiza una copia de seguridad de la base de datos de un determinado sitio
+  elif accion == "ejecuta-backup-bd":
+    try:
+        enStreaming = extraeIndicador(parametros, "--streaming")
+        porTablas = extraeIndicador(parametros, "--por-tablas")
+        compresion = extraeOpcion(parametros, "--compresion", "zstd")
+    except ValueError as e:
+        print(f"Error: {e}")
+        printUso()
+        sys.exit(1)
+
+    if len(parametros) != 1 or compresion not in EXTENSIONES_COMPRESION or (enStreaming and porTablas):
+        print("Error: Se requieren un parámetro: nombre de sitio")
+        printUso()
+        sys.exit(1)
+
+    nombreSitio = parametros[0]
+    logger.info(f"Comando: ejecuta-backup-bd {nombreSitio}")
+    if enStreaming:
+        codigoResultado, resultado = ejecutaBackupStreaming(nombreSitio, compresion)
+    elif porTablas:
+        codigoResultado, resultado = ejecutaBackupTablas(nombreSitio, compresion)
+    else:
+        codigoResultado, resultado = ejecutaBackup(nombreSitio, "bd")
+    if codigoResultado == 200:
+        print(resultado)
+    else:
+        print(resultado) 
+
+  # Realiza una copia de seguridad del Wordpress (carpeta UPLOADS) de un determinado sitio  
+  elif accion == "ejecuta-backup-wp":
+    enSnapshot = extraeIndicador(parametros, "--snapshot")
+    if len(parametros) != 1:
+        print("Error: Se requieren un parámetro: nombre de sitio")
+        printUso()
+        sys.exit(1)
+
+    nombreSitio = parametros[0]
+    logger.info(f"Comando: ejecuta-backup-wp {nombreSitio}")
+    if enSnapshot:
+        codigoResultado, resultado = ejecutaSnapshotUploads(nombreSitio)
+    else:
+        codigoResultado, resultado = ejecutaBackup(nombreSitio,"wordpress")
+    if codigoResultado == 200:
+        print(resultado)
+    else:
+        print(resultado)   
+
+  # Realiza el backup de todos los sitios de la flota, repartiéndolos por nodos
+  elif accion == "backup-flota":
+    try:
+        formato = extraeOpcion(parametros, "--formato")
+        porNodo = int(extraeOpcion(parametros, "--por-nodo", PARALELO_POR_NODO))
+        compresion = extraeOpcion(parametros, "--compresion", "zstd")
+        ficheroInforme = extraeOpcion(parametros, "--informe")
+    except ValueError as e:
+        print(f"Error: {e}")
+        printUso()
+        sys.exit(1)
+
+    contenedor = {"bd": "bd", "wp": "wordpress"}.get(parametros[0]) if len(parametros) == 1 else None
+    if contenedor is None or porNodo < 1 or compresion not in EXTENSIONES_COMPRESION or formato not in (None, *FORMATOS_BACKUP[contenedor]):
+        print("Error: Se requiere un parámetro: \"bd\" o \"wp\"")
+        printUso()
+        sys.exit(1)
+
+    codigoResultado, resultado = backupFlota(contenedor, formato, porNodo, compresion, ficheroInforme)
+    print(resultado)
+
+  # Lista las copias de seguridad de la base de datos de un determinado sitio
+  elif accion == "listar-backup-bd":
+    try:
+        todos = extraeIndicador(parametros, "--todos")
+        ultimo = extraeIndicador(parametros, "--ultimo")
+        anterioresA = extraeOpcion(parametros, "--anteriores-a")
+        anterioresA = segundosDuracion(anterioresA) if anterioresA is not None else None
+    except ValueError as e:
+        print(f"Error: {e}")
+        printUso()
+        sys.exit(1)
+
+    if len(parametros) != (0 if todos else 1):
+        print("Error: Se requieren un parámetro: nombre de sitio (o --todos)")
+        printUso()
+        sys.exit(1)
+
+    nombreSitio = None if todos else parametros[0]
+    logger.info(f"Comando: listar-backup-bd {nombreSitio or '--todos'}")
+    codigoResultado, resultado = listarBackup(nombreSitio,"bd", ultimo, anterioresA)
+    if codigoResultado == 200:
+        print(resultado)
+    else:
+        print(resultado) 
+
+  # Lista las copias de seguridad de Wordpress de un determinado sitio
+  elif accion == "listar-backup-wp":
+    try:
+        todos = extraeIndicador(parametros, "--todos")
+        ultimo = extraeIndicador(parametros, "--ultimo")
+        anterioresA = extraeOpcion(parametros, "--anteriores-a")
+        anterioresA = segundosDuracion(anterioresA) if anterioresA is not None else None
+    except ValueError as e:
+        print(f"Error: {e}")
+        printUso()
+        sys.exit(1)
+
+    if len(parametros) != (0 if todos else 1):
+        print("Error: Se requieren un parámetro: nombre de sitio (o --todos)")
+        printUso()
+        sys.exit(1)
+
+    nombreSitio = None if todos else parametros[0]
+    logger.info(f"Comando: listar-backup-wp {nombreSitio or '--todos'}")
+    codigoResultado, resultado = listarBackup(nombreSitio,"wordpress", ultimo, anterioresA)
+    if codigoResultado == 200:
+        print(resultado)
+    else:
+        print(resultado) 
+
+  # Elimina los backups que no retiene la política de retención
+  elif accion == "poda-backups":
+    try:
+        todos = extraeIndicador(parametros, "--todos")
+        simulacion = extraeIndicador(parametros, "--dry-run")
+        tipo = extraeOpcion(parametros, "--tipo")
+        paralelo = int(extraeOpcion(parametros, "--paralelo", PARALELO_LOTE))
+        ajustes = {}
+        for periodo in POLITICA_RETENCION:
+            valor = extraeOpcion(parametros, f"--{periodo}")
+            if valor is not None:
+                ajustes[periodo] = int(valor)
+    except ValueError as e:
+        print(f"Error: {e}")
+        printUso()
+        sys.exit(1)
+
+    if len(parametros) != (0 if todos else 1) or tipo not in (None, "bd", "wp") or paralelo < 1:
+        print("Error: Se requiere un parámetro: nombre de sitio (o --todos)")
+        printUso()
+        sys.exit(1)
+
+    contenedores = {"bd": ["bd"], "wp": ["wordpress"], None: ["bd", "wordpress"]}[tipo]
+    nombresSitios = None if todos else parametros
+    logger.info(f"Comando: poda-backups {'--todos' if todos else parametros[0]}")
+    codigoResultado, resultado = podaBackups(nombresSitios, contenedores, ajustes, simulacion, paralelo)
+    print(resultado)
+
+  # Reconstruye el catálogo de backups a partir de los ficheros en disco
+  elif accion == "reindexa-backups":
+    if len(parametros) > 1:
+        print("Error: Se admite como máximo un parámetro: nombre de sitio")
+        printUso()
+        sys.exit(1)
+
+    nombreSitio = parametros[0] if parametros else None
+    logger.info(f"Comando: reindexa-backups {nombreSitio or ''}")
+    codigoResultado, resultado = reindexaCatalogo(nombreSitio)
+    print(resultado)
+
+  # Resatura una copia de seguridad de la base de datos de un determinado sitio
+  elif accion == "restaurar-backup-wp":
+    if len(parametros) != 2:
+        print("Error: Se requieren dos parámetros: nombre de sitio y fichero a restaurar")
+        printUso()
+        sys.exit(1)
+
+    nombreSitio, fichero = parametros
+    logger.info(f"Comando: restaurar-backup-wp {nombreSitio}")
+    codigoResultado, resultado = restauraBackup(nombreSitio, "wordpress", fichero)
+    if codigoResultado == 200:
+        print(resultado)
+    else:
+        print(resultado) 
+
+  # Resatura una copia de seguridad de Wordpress de un determinado sitio
+  elif accion == "restaurar-backup-bd":
+    try:
+        paralelo = int(extraeOpcion(parametros, "--paralelo", PARALELO_RESTAURACION))
+    except ValueError as e:
+        print(f"Error: {e}")
+        printUso()
+        sys.exit(1)
+
+    if len(parametros) != 2 or paralelo < 1:
+        print("Error: Se requieren dos parámetros: nombre de sitio y fichero a restaurar")
+        printUso()
+        sys.exit(1)
+
+    nombreSitio, fichero = parametros
+    logger.info(f"Comando: restaurar-backup-bd {nombreSitio}")
+    codigoResultado, resultado = restauraBackup(nombreSitio, "bd", fichero, paralelo)
+    if codigoResultado == 200:
+        print(resultado)
+    else:
+        print(resultado) 
+
+  # Exporta las métricas de la flota para Prometheus
+  elif accion == "metricas":
+    try:
+        puerto = int(extraeOpcion(parametros, "--puerto", PUERTO_METRICAS))
+        fichero = extraeOpcion(parametros, "--fichero")
+        intervalo = extraeOpcion(parametros, "--intervalo")
+        intervalo = segundosDuracion(intervalo) if intervalo is not None else None
+    except ValueError as e:
+        print(f"Error: {e}")
+        printUso()
+        sys.exit(1)
+
+    if parametros or (intervalo is not None and fichero is None):
+        print("Error: --intervalo solo se admite junto con --fichero")
+        printUso()
+        sys.exit(1)
+
+    codigoResultado, resultado = exportaMetricas(puerto, fichero, intervalo)
+    print(resultado)
+
+  # Muestra el estado de las cachés del demonio
+  elif accion == "estado-cache":
+    codigoResultado, resultado = estadoCaches()
+    print(resultado)
+
+  # Atiende los comandos por un socket Unix
+  elif accion == "demonio":
+    try:
+        rutaSocket = extraeOpcion(parametros, "--socket", SOCKET_DEMONIO)
+    except ValueError as e:
+        print(f"Error: {e}")
+        printUso()
+        sys.exit(1)
+
+    if parametros:
+        printUso()
+        sys.exit(1)
+
+    codigoResultado, resultado = demonio(rutaSocket)
+    print(resultado)
+
+  else:
+      printUso()
+      sys.exit(1)
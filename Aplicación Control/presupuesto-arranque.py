@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Comprobación del presupuesto de arranque de cluster-control.py
+
+Ejecuta cada comando (sin demonio, en el propio proceso) y mide su mejor tiempo real, descontando el de arrancar
+el intérprete sin hacer nada (TOTAL-BASE). Antes se compila el módulo cluster_control en __pycache__, como en la
+instalación. Sale con código 1 si algún comando supera su presupuesto o si un comando local importa el SDK de
+kubernetes (lo comprueba con 'python3 -X importtime', que da además el tiempo de importación de los módulos de
+primer nivel como orientación).
+
+Uso: presupuesto-arranque.py [repeticiones]
+
+© 2024 - JICR
+
+"""
+
+# Librerías necesarias
+import sys
+import os
+import subprocess
+import time
+import py_compile
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cluster-control.py")
+MODULO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cluster_control.py")
+
+# Comandos que solo usan el sistema de ficheros local: (argumentos, presupuesto en ms)
+COMANDOS_LOCALES = [
+    ([], 50),
+    (["listar-backup-bd", "--todos"], 50),
+    (["listar-backup-wp", "--todos"], 50),
+    (["estado-cache"], 50),
+    (["recomienda-perfil", "inexistente"], 50)
+]
+
+# Módulos que no debe importar ningún comando local
+MODULOS_PROHIBIDOS = ["kubernetes", "yaml"]
+
+def importaciones(argumentos):
+    # Función que ejecuta python con -X importtime y devuelve {módulo: (tiempo acumulado en µs, nivel)}
+    entorno = dict(os.environ, CLUSTER_CONTROL_SOCKET="/nonexistent/cluster-control.sock")
+    proceso = subprocess.run([sys.executable, "-X", "importtime", *argumentos], capture_output=True, text=True, env=entorno)
+    modulos = {}
+    for linea in proceso.stderr.splitlines():
+        if not linea.startswith("import time:") or "cumulative" in linea:
+            continue
+        _, acumulado, nombre = linea[len("import time:"):].split("|")
+        modulos[nombre.strip()] = (int(acumulado), len(nombre) - len(nombre.lstrip()))
+    return modulos
+
+def tiempoArranque(argumentos, base):
+    # Función que devuelve el tiempo (ms) de las importaciones de primer nivel que no hace el intérprete por sí solo
+    modulos = importaciones([SCRIPT, *argumentos])
+    propios = {nombre: acumulado for nombre, (acumulado, nivel) in modulos.items() if nivel == 1 and nombre not in base}
+    return sum(propios.values()) / 1000, modulos
+
+def calienta():
+    # Función que compila el módulo cluster_control en __pycache__, como al instalarlo (py_compile lo escribe
+    # aunque el entorno tenga PYTHONDONTWRITEBYTECODE)
+    py_compile.compile(MODULO, doraise=True)
+
+def ejecuta(argumentos):
+    # Función que devuelve el tiempo real (ms) de una ejecución de python con los argumentos dados
+    entorno = dict(os.environ, CLUSTER_CONTROL_SOCKET="/nonexistent/cluster-control.sock")
+    inicio = time.perf_counter()
+    subprocess.run([sys.executable, *argumentos], capture_output=True, env=entorno)
+    return (time.perf_counter() - inicio) * 1000
+
+def tiempoSobreBase(argumentos, repeticiones):
+    # Función que devuelve el mejor tiempo real (ms) de 'repeticiones' ejecuciones del comando menos el mejor del
+    # intérprete sin hacer nada; se alternan para que la carga de la máquina afecte por igual a los dos
+    comando = []
+    base = []
+    for _ in range(repeticiones):
+        comando.append(ejecuta([SCRIPT, *argumentos]))
+        base.append(ejecuta(["-c", "pass"]))
+    return min(comando) - min(base)
+
+def main():
+    args = sys.argv[1:]
+    if len(args) > 1:
+        sys.stderr.write("\nUso: presupuesto-arranque.py [repeticiones]\n\n")
+        sys.exit(1)
+    repeticiones = int(args[0]) if args else 10
+
+    calienta()
+    base = set(importaciones(["-c", "pass"]))
+
+    fallos = 0
+    print(f"{'COMANDO':<32} {'IMPORTACIÓN':>12} {'TOTAL-BASE':>11} {'PRESUPUESTO':>12}  RESULTADO")
+    for argumentos, presupuesto in COMANDOS_LOCALES:
+        importacion, modulos = tiempoArranque(argumentos, base)
+        total = tiempoSobreBase(argumentos, repeticiones)
+        prohibidos = [modulo for modulo in MODULOS_PROHIBIDOS if modulo in modulos]
+
+        if prohibidos:
+            resultado = f"ERROR: importa {', '.join(prohibidos)}"
+        elif total > presupuesto:
+            resultado = "ERROR: supera el presupuesto"
+        else:
+            resultado = "OK"
+        fallos += resultado != "OK"
+
+        comando = " ".join(argumentos) or "(uso)"
+        print(f"{comando:<32} {importacion:>10.1f}ms {total:>9.1f}ms {presupuesto:>10}ms  {resultado}")
+
+    if fallos:
+        print(f"{fallos} comandos fuera de presupuesto")
+        sys.exit(1)
+    print("Todos los comandos dentro de presupuesto")
+
+if __name__ == "__main__":
+    main()